@@ -5,7 +5,7 @@ planner by name. A planner configuration names a UP engine, and the engine is
 resolved at run time from the plugins installed in the environment (or from a
 module / class the configuration points at). See :mod:`pypmt_eval_toolkit.engines`.
 
-Six stages, one per CLI subcommand:
+The stages, one per CLI subcommand:
 
 ``init``      write a starter experiment directory (limits + planner configs);
 ``engines``   list the UP engines this environment can actually run;
@@ -16,10 +16,22 @@ Six stages, one per CLI subcommand:
               arrays that run them;
 ``solve``     run *one* (planner, task) pair under its own time/memory limits
               and dump a JSON result;
+``solve-batch`` run a slice of a command file, paying for the UP import once
+              and forking one isolated ``solve`` per pair;
+``run-local`` run a sweep on one machine, starting a task only when its memory
+              limit and a core are free, with a resumable journal;
+``worker``    the same, on any number of machines sharing the sandbox, each
+              taking the next pair from a lease-based queue as it frees up;
+``merge``     combine the sandboxes of a sweep split across sites (``generate
+              --shard``) into one;
+``ingest``    bring the sandbox's ``results.sqlite`` up to date, parsing only the
+              result files that changed (``analyze`` and ``report`` do it first);
 ``analyze``   aggregate those JSONs into a CSV and a coverage table;
-``report``    paper-ready tables (text + LaTeX) and figures.
+``report``    paper-ready tables (text + LaTeX) and figures;
+``profile-report`` merge the stacks ``solve --profile`` sampled into ranked
+              hot-function tables and flame-graph input.
 
-Everything except ``solve``/``engines`` is import-light on purpose: they never
+Everything except ``solve``/``solve-batch``/``engines`` is import-light on purpose: they never
 touch ``unified_planning``, so a sweep can be generated on a laptop and only the
 compute nodes need the planners installed.
 """
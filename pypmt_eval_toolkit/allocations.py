@@ -0,0 +1,163 @@
+"""Which code holds the memory: ``solve --trace-allocations``.
+
+A ``MEMOUT`` row says that a run ran out of memory, not what filled it. For an
+engine written in Python -- pyPMT's SMT planners, pyperplan -- ``tracemalloc``
+can say: the runner starts tracing before the problem is parsed and, when the
+solve ends, records the allocation sites holding the most memory and the peak
+of traced memory into the result's ``allocations`` section.
+
+"When the solve ends" includes the ``MemoryError`` and limit handlers. Inside
+an ``except`` block the traceback still holds every frame it unwound, so the
+grounded problem, the encoder's formulas and the solver's bindings are all
+still alive to be counted. The snapshot is taken there, not in a ``finally``,
+where they would already be gone; the ``finally`` only stops tracing, so a
+run that ended some other way does not leave it on.
+
+Tracing has a cost: allocations get slower, and every live block carries a
+traceback of ``--trace-frames`` frames. It is opt-in, for diagnosing a memory
+problem, not for the sweep whose times end up in a paper. Native memory a C
+extension allocates behind Python's allocator (a solver's own heap) is not
+traced; the gap between ``peak-traced-mb`` and ``peak-memory-mb`` is that.
+"""
+
+from __future__ import annotations
+
+import os
+import sysconfig
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+from .profiler import module_name
+
+DEFAULT_FRAMES = 8
+TOP_SITES = 25
+
+_MB = 1024.0 * 1024.0
+
+
+def start(frames: int = DEFAULT_FRAMES) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, frames))
+
+
+def stop() -> None:
+    """Stop tracing without a snapshot; nothing if :func:`record` already did."""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def record(result: Dict[str, Any], top: int = TOP_SITES) -> None:
+    """Snapshot the live allocations into ``result['allocations']`` and stop.
+
+    Called once; later calls find tracing off and leave the first record be.
+    """
+    if not tracemalloc.is_tracing():
+        return
+    frames = tracemalloc.get_traceback_limit()
+    current, peak = tracemalloc.get_traced_memory()
+    section: Dict[str, Any] = {
+        'frames': frames,
+        'peak-traced-mb': round(peak / _MB, 2),
+        'current-traced-mb': round(current / _MB, 2),
+        'sites': [],
+    }
+    result['allocations'] = section
+    try:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        statistics = snapshot.statistics('traceback')
+    except MemoryError:
+        # Copying the traces needs memory too; the peak is still worth having.
+        tracemalloc.stop()
+        section['note'] = 'no snapshot: out of memory while taking it'
+        return
+    tracemalloc.stop()
+    for stat in statistics[:top]:
+        owner = _owner(stat.traceback)
+        section['sites'].append({
+            'size-mb': round(stat.size / _MB, 3),
+            'blocks': stat.count,
+            'module': module_name(owner.filename),
+            'line': owner.lineno,
+            # Outermost first, like a printed traceback; the last is the allocation.
+            'traceback': [f'{module_name(frame.filename)}:{frame.lineno}'
+                          for frame in stat.traceback],
+        })
+
+
+def _owner(traceback: tracemalloc.Traceback) -> tracemalloc.Frame:
+    """The innermost frame outside the standard library.
+
+    A block allocated inside ``linecache`` or ``copy`` belongs to whoever
+    called them; attributing it to the stdlib says nothing about the engine.
+    Falls back to the allocating frame when the whole traceback is stdlib.
+    """
+    for frame in reversed(traceback):                        # most recent first
+        if not _is_stdlib(frame.filename):
+            return frame
+    return traceback[-1]
+
+
+_STDLIB = sysconfig.get_paths().get('stdlib') or ''
+
+
+def _is_stdlib(filename: str) -> bool:
+    if filename.startswith('<frozen'):
+        return True
+    return bool(_STDLIB) and filename.startswith(_STDLIB + os.sep) \
+        and f'{os.sep}site-packages{os.sep}' not in filename
+
+
+def component(module: str) -> str:
+    """What a site is attributed to: the top two levels of its module path.
+
+    ``unified_planning.grounders`` vs ``pypmt.encoders`` vs ``z3.z3`` is the
+    distinction that matters when reading a memory problem.
+    """
+    return '.'.join(module.split('.')[:2])
+
+
+def rollup(rows: Sequence[Dict[str, Any]], top: int = 3) -> List[str]:
+    """Text lines: per planner and track, traced peaks and where memory sat.
+
+    Sizes are summed over each group's runs, so a component that holds a lot
+    in a few runs and one that holds a little in all of them rank by the
+    memory they account for overall.
+    """
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        if row.get('traced_peak_mb') is not None:
+            groups[(row['planner'], row['track'])].append(row)
+    if not groups:
+        return []
+    lines = ['Allocation attribution (--trace-allocations: live Python memory when the solve ended)',
+             '']
+    header = f'{"planner":<26}{"track":<12}{"runs":>6}{"max peak MB":>13}  top components'
+    lines.append(header)
+    lines.append('-' * 78)
+    for (planner, track), group in sorted(groups.items(), key=lambda item: str(item[0])):
+        held: Dict[str, float] = defaultdict(float)
+        for row in group:
+            for module, size in row.get('allocation_sites') or ():
+                held[component(module)] += size
+        total = sum(held.values()) or 1.0
+        ranked = sorted(held.items(), key=lambda item: -item[1])[:top]
+        components = ', '.join(f'{name} {100.0 * size / total:.0f}%' for name, size in ranked)
+        peak = max(row['traced_peak_mb'] for row in group)
+        lines.append(f'{str(planner):<26}{str(track or "-"):<12}{len(group):>6}'
+                     f'{peak:>13.1f}  {components or "-"}')
+    lines.append('')
+    return lines
+
+
+def site_sizes(payload: Dict[str, Any]) -> Optional[List[tuple]]:
+    """``(module, MB)`` of a result's recorded sites, for :func:`rollup`."""
+    section = payload.get('allocations')
+    if not section:
+        return None
+    return [(site.get('module') or '?', site.get('size-mb') or 0.0)
+            for site in section.get('sites') or []]
@@ -14,22 +14,47 @@ Three things a naive aggregation gets wrong and this one does not:
 from __future__ import annotations
 
 import csv
+import io
 import json
 import os
-from collections import Counter, defaultdict
-from typing import Any, Dict, List, Optional, Sequence
-
-from .runner import KILLED, SOLVED
+import re
+import time
+from collections import Counter, defaultdict, deque
+from itertools import chain
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set,
+                    Tuple)
+
+from .allocations import rollup as allocation_rollup, site_sizes
+from .columns import Columns
+from .runner import BULKY, KILLED, LAST_KEYS, SKIPPED_PREDICTED, SOLVED
+from .shards import ShardResults, latest
 
 MISSING = 'MISSING'
 
 _CSV_COLUMNS = [
     'planner', 'engine', 'suite', 'track', 'domain', 'instance', 'ipc', 'status',
     'up_status', 'plan_length', 'makespan', 'validated', 'parse_seconds',
-    'solve_seconds', 'total_seconds', 'peak_memory_mb', 'time_limit', 'memory_limit',
-    'task_id', 'domain_file', 'problem_file',
+    'solve_seconds', 'total_seconds', 'startup_seconds', 'import_seconds', 'resolve_seconds',
+    'construct_seconds', 'compile_seconds', 'search_seconds', 'validate_seconds',
+    'end_to_end_seconds', 'peak_memory_mb', 'user_seconds',
+    'system_seconds', 'children_cpu_seconds', 'cpu_utilization', 'major_faults',
+    'minor_faults', 'voluntary_switches', 'involuntary_switches', 'read_mb', 'write_mb',
+    'scratch_peak_mb', 'traced_peak_mb', 'time_limit', 'memory_limit', 'rung', 'rung_seconds',
+    'ladder_seconds', 'task_id', 'domain_file', 'problem_file',
 ]
 
+# A run that got less than this share of a CPU over its wall time was most
+# likely waiting for one: a contended node, not a slow planner. Runs shorter
+# than the minimum are left out, their wall time being mostly start-up I/O.
+LOW_UTILIZATION = 0.5
+_UTILIZATION_MIN_SECONDS = 5.0
+
+# Default for `analyze/report/ingest --jobs`: result files read at once. Enough
+# to hide a network filesystem's latency without flooding its metadata server.
+DEFAULT_JOBS = 8
+_CHUNK = 1 << 16
+_SPACE = re.compile(r'[ \t\n\r]*')
+
 
 def analyze(args) -> int:
     sandbox = os.path.abspath(os.path.expanduser(args.sandbox_dir))
@@ -38,50 +63,146 @@ def analyze(args) -> int:
         print(f'No results directory at {results_dir}')
         return 1
 
-    rows = load_rows(sandbox, results_dir)
-
-    if not rows:
+    jobs = args.jobs or DEFAULT_JOBS
+    started = time.monotonic()
+    rows = iter_rows(sandbox, results_dir, database=not args.no_database, jobs=jobs)
+    first = next(rows, None)
+    if first is None:
         print(f'No results found under {results_dir}')
         return 1
 
+    # The rows are not kept: each becomes its CSV line and a pair of the cube as
+    # it is read, and the tables are computed from the cube's pairs.
+    from .cube import cube_path, refresh
+    collected = _Collector()
+    cube = refresh(sandbox, results_dir, collected.rows(chain([first], rows)))
+    loaded = time.monotonic() - started
+    columns = Columns(cube.rows(), _is_solved)
+
     out_dir = args.output_dir or os.path.join(sandbox, 'analysis')
     os.makedirs(out_dir, exist_ok=True)
     csv_path = os.path.join(out_dir, 'results.csv')
-    _write_csv(csv_path, rows)
+    collected.write(csv_path)
 
-    report = _report(rows, per_domain=args.per_domain)
+    report = _report(columns, per_domain=args.per_domain, notable=collected.notable)
     summary_path = os.path.join(out_dir, 'summary.txt')
     with open(summary_path, 'w') as handle:
         handle.write(report + '\n')
     with open(os.path.join(out_dir, 'summary.json'), 'w') as handle:
-        json.dump(_summary_dict(rows), handle, indent=2)
+        json.dump(_summary_dict(columns), handle, indent=2)
 
     print(report)
     print()
     print(f'CSV     : {csv_path}')
     print(f'Summary : {summary_path}')
-    _list_errors(sandbox, rows)
+    print(f'Loaded  : {collected.count} pairs in {loaded:.1f}s ({jobs} reader(s))')
+    if os.path.isfile(cube_path(sandbox)):
+        print(f'Cube    : {cube_path(sandbox)}')
+    _list_errors(sandbox, collected.notable)
+    _list_starved(collected.notable)
+    _list_unsettled(collected.notable)
     return 0
 
 
+class _Collector:
+    """The CSV lines of the rows passing through, and the few rows the listings need.
+
+    A line is kept as text with its place in the CSV's order, a few hundred
+    bytes, instead of the row it came from.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.notable: List[Dict[str, Any]] = []
+        self._text = io.StringIO()
+        self._writer = csv.DictWriter(self._text, fieldnames=_CSV_COLUMNS, extrasaction='ignore')
+        self._lines: List[Tuple[Tuple[str, ...], int, int]] = []
+        self._names: Dict[str, str] = {}
+
+    def rows(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """`rows`, unchanged, each collected on the way."""
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.count += 1
+        start = self._text.tell()
+        self._writer.writerow(row)
+        key = tuple(self._names.setdefault(value, value) for value in
+                    (row['planner'] or '', row['track'] or '', row['domain'] or '',
+                     row['instance'] or ''))
+        self._lines.append((key, start, self._text.tell()))
+        if _notable(row):
+            self.notable.append(row)
+
+    def write(self, path: str) -> None:
+        """The CSV, sorted by planner, track, domain and instance."""
+        text = self._text.getvalue()
+        with open(path, 'w', newline='') as handle:
+            csv.DictWriter(handle, fieldnames=_CSV_COLUMNS).writeheader()
+            for _key, start, end in sorted(self._lines, key=lambda line: line[0]):
+                handle.write(text[start:end])
+
+
+def _notable(row: Dict[str, Any]) -> bool:
+    """Whether `row` is one the listings after the report or the allocation table name."""
+    return (row['status'] == 'ERROR' or row['validated'] is False
+            or row.get('traced_peak_mb') is not None or _starved(row) or _unsettled(row))
+
+
 # ----------------------------------------------------------------------
 # Loading
 # ----------------------------------------------------------------------
 
-def load_rows(sandbox: str, results_dir: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Every (planner, task) pair of a sandbox as a flat row.
+def load_rows(sandbox: str, results_dir: Optional[str] = None, memory_series: bool = False,
+              database: bool = False, jobs: int = DEFAULT_JOBS) -> List[Dict[str, Any]]:
+    """Every (planner, task) pair of a sandbox as a flat row: :func:`iter_rows`, as a list."""
+    return list(iter_rows(sandbox, results_dir, memory_series, database, jobs))
+
+
+def iter_rows(sandbox: str, results_dir: Optional[str] = None, memory_series: bool = False,
+              database: bool = False, jobs: int = DEFAULT_JOBS) -> Iterator[Dict[str, Any]]:
+    """Every (planner, task) pair of a sandbox as a flat row, one at a time.
 
     Result files first, then the pairs that produced no result file: a leftover
     ``.running`` marker becomes ``KILLED``, a task in ``tasks.json`` with
     nothing at all becomes ``MISSING``. Shared by ``analyze`` and ``report`` so
-    both compute coverage over the same denominator.
+    both compute coverage over the same denominator. Only the pairs seen so far
+    are kept, not their rows, so a caller that folds the rows into something
+    smaller never holds them all.
+
+    Results appended to ``shards/`` (``generate --result-sink shards``) count
+    like result files: of a pair with both, the later run is kept, and a start
+    record no result followed is ``KILLED`` like a leftover marker.
+
+    With `memory_series`, each row also carries its run's memory-over-time
+    series as ``(seconds, MB)`` pairs. Off by default: over a full sweep the
+    series outweigh everything else in the rows put together.
+
+    With `database`, the results, markers and shards come from the sandbox's
+    ``results.sqlite`` (:mod:`pypmt_eval_toolkit.resultsdb`), brought up to
+    date first, rather than from parsing every file again. Only for the
+    sandbox's own ``results/``; if the database cannot be used, the files are
+    read as without it.
+
+    Files are found in one walk and read `jobs` at a time, each only up to its
+    plan, engine statistics and logs (and memory series, unless wanted): see
+    :func:`read_result`.
     """
-    results_dir = results_dir or os.path.join(sandbox, 'results')
-    rows = _load_results(results_dir)
-    rows += _killed_rows(results_dir, {(r['planner'], r['task_id']) for r in rows})
+    default_dir = os.path.join(sandbox, 'results')
+    results_dir = results_dir or default_dir
+    rows = None
+    if database and os.path.abspath(results_dir) == os.path.abspath(default_dir):
+        rows = _database_rows(sandbox, memory_series, jobs)
+    if rows is None:
+        rows = _file_rows(sandbox, results_dir, memory_series, jobs)
+    known: Set[Tuple[Optional[str], Optional[str]]] = set()
+    for row in rows:
+        known.add((row['planner'], row['task_id']))
+        yield row
     expected = _expected_pairs(os.path.join(sandbox, 'tasks.json'), results_dir)
-    rows += _missing_rows(expected, {(r['planner'], r['task_id']) for r in rows})
-    return rows
+    yield from _missing_rows(expected, known)
 
 
 def is_solved(row: Dict[str, Any]) -> bool:
@@ -89,22 +210,251 @@ def is_solved(row: Dict[str, Any]) -> bool:
     return _is_solved(row)
 
 
-def _load_results(results_dir: str) -> List[Dict[str, Any]]:
-    rows = []
-    for dirpath, _dirnames, filenames in os.walk(results_dir):
-        for name in sorted(filenames):
-            if not name.endswith('.json'):
-                continue
-            path = os.path.join(dirpath, name)
+def skip_keys(memory_series: bool = False) -> Tuple[str, ...]:
+    """The sections of a result the rows do without."""
+    return tuple(key for key in BULKY if not (memory_series and key == 'memory-series'))
+
+
+def read_result(path: str, skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """The JSON object in the file at `path`, without its top-level keys in `skip`.
+
+    A result names the sections it ends with in ``last-keys``; the file is read
+    no further than the last of them that is not skipped -- the plan and the
+    logs are most of a result file. Other files (older results, markers) are
+    read whole. Raises ``OSError`` or ``ValueError`` like :func:`json.load`.
+    """
+    with open(path, 'r') as handle:
+        if not skip:
+            return json.load(handle)
+        return _Projection(handle, skip).read()
+
+
+def read_all(paths: Sequence[str], skip: Iterable[str] = (),
+             jobs: int = DEFAULT_JOBS) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """``(path, object)`` of each of `paths` that reads as a JSON object, in order, as read."""
+    skip = tuple(skip)
+
+    def read(path: str) -> Tuple[str, Any]:
+        try:
+            return path, read_result(path, skip)
+        except (OSError, ValueError):
+            return path, None
+
+    return ((path, payload) for path, payload in bounded_map(read, paths, jobs)
+            if isinstance(payload, dict))
+
+
+def bounded_map(function: Callable[[Any], Any], items: Iterable[Any],
+                jobs: int = DEFAULT_JOBS) -> Iterator[Any]:
+    """`function` of each of `items`, in order, on `jobs` threads.
+
+    At most four calls per thread are in flight at a time, so a million files
+    never become a million pending reads.
+    """
+    if jobs <= 1:
+        yield from map(function, items)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending: deque = deque()
+        for item in items:
+            if len(pending) >= 4 * jobs:
+                yield pending.popleft().result()
+            pending.append(pool.submit(function, item))
+        while pending:
+            yield pending.popleft().result()
+
+
+class _Projection:
+    """Reads a JSON object key by key, in chunks, and stops where the rest of its
+    ``last-keys`` tail is skipped."""
+
+    def __init__(self, handle, skip: Iterable[str]):
+        self.handle = handle
+        self.skip = set(skip)
+        self.text = ''
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def read(self) -> Dict[str, Any]:
+        head = self._head()
+        if head is not None:
+            return head
+        at = self._expect(0, '{')
+        payload: Dict[str, Any] = {}
+        remaining = None                       # tail sections still to read, after last-keys
+        while remaining != 0:
+            at = self._space(at)
+            if self._char(at) == '}':
+                return payload
+            key, at = self._value(at)
+            at = self._expect(at, ':')
+            value, at = self._value(at)
+            if key == LAST_KEYS:
+                remaining = self._needed(value)
+            else:
+                if key not in self.skip:
+                    payload[key] = value
+                if remaining is not None:
+                    remaining -= 1
+            at = self._space(at)
+            if self._char(at) == ',':
+                at += 1
+        return payload
+
+    def _head(self) -> Optional[Dict[str, Any]]:
+        """Everything before ``last-keys`` in one decode, when it is a top-level key, then the
+        tail sections up to the last one needed; else None, and the object is read key by
+        key."""
+        marker = f'"{LAST_KEYS}"'
+        searched = 0
+        while True:
+            at = self.text.find(marker, max(searched - len(marker), 0))
+            if at >= 0:
+                break
+            searched = len(self.text)
+            if not self._more():
+                return None
+        try:
+            tail, end = self._value(self._expect(at + len(marker), ':'))
+            head = json.loads(self.text[:at].rstrip().rstrip(',') + '}')
+            remaining = self._needed(tail)
+            if not isinstance(head, dict) or remaining is None:
+                return None
+            payload = {key: value for key, value in head.items() if key not in self.skip}
+            for _section in range(remaining):
+                key, end = self._value(self._expect(end, ','))
+                value, end = self._value(self._expect(end, ':'))
+                if key not in self.skip:
+                    payload[key] = value
+        except ValueError:
+            return None
+        return payload
+
+    def _needed(self, tail: Any) -> Optional[int]:
+        """How many of the ``last-keys`` sections to read: up to the last one not skipped."""
+        if not isinstance(tail, list):
+            return None
+        needed = len(tail)
+        while needed and tail[needed - 1] in self.skip:
+            needed -= 1
+        return needed
+
+    def _more(self) -> bool:
+        """Read the next chunk, as long again as what was read so far; False at the end."""
+        chunk = '' if self.eof else self.handle.read(max(_CHUNK, len(self.text)))
+        self.eof = not chunk
+        self.text += chunk
+        return bool(chunk)
+
+    def _char(self, at: int) -> str:
+        while at >= len(self.text):
+            if not self._more():
+                raise ValueError('unexpected end of the JSON object')
+        return self.text[at]
+
+    def _space(self, at: int) -> int:
+        while True:
+            end = _SPACE.match(self.text, at).end()
+            if end < len(self.text) or not self._more():
+                return end
+
+    def _expect(self, at: int, char: str) -> int:
+        at = self._space(at)
+        if self._char(at) != char:
+            raise ValueError(f'expected {char!r} at character {at}')
+        return at + 1
+
+    def _value(self, at: int) -> Tuple[Any, int]:
+        at = self._space(at)
+        self._char(at)
+        while True:
             try:
-                with open(path, 'r') as handle:
-                    payload = json.load(handle)
-            except (OSError, json.JSONDecodeError):
+                value, end = self.decoder.raw_decode(self.text, at)
+            except ValueError:                            # cut short by the chunk: read on
+                if not self._more():
+                    raise
                 continue
-            if 'status' not in payload:      # a marker file, handled separately
-                continue
-            rows.append(_row(payload))
-    return rows
+            # A number that ends the chunk may go on in the next one.
+            if end < len(self.text) or not self._more():
+                return value, end
+
+
+def _discover(results_dir: str) -> Tuple[List[str], List[str]]:
+    """The result files and the ``.running`` markers with no result beside them, in one walk."""
+    results, markers = [], []
+    for dirpath, _dirnames, filenames in os.walk(results_dir):
+        names = set(filenames)
+        for name in sorted(filenames):
+            if name.endswith('.json'):
+                results.append(os.path.join(dirpath, name))
+            elif name.endswith('.running') and name[: -len('.running')] + '.json' not in names:
+                markers.append(os.path.join(dirpath, name))
+    return results, markers
+
+
+def _database_rows(sandbox: str, memory_series: bool,
+                   jobs: int = DEFAULT_JOBS) -> Optional[Iterator[Dict[str, Any]]]:
+    """Every result and marker's row from ``results.sqlite``; None if it cannot be used."""
+    import sqlite3
+    from .resultsdb import DATABASE, ResultsDatabase
+
+    results = None
+    try:
+        results = ResultsDatabase(sandbox)
+        results.sync(jobs)
+    except (sqlite3.Error, OSError) as error:
+        if results is not None:
+            results.close()
+        print(f'note: {os.path.join(sandbox, DATABASE)}: {error}; reading the result files')
+        return None
+
+    def rows() -> Iterator[Dict[str, Any]]:
+        with results:
+            yield from results.rows(memory_series)
+
+    return rows()
+
+
+def _file_rows(sandbox: str, results_dir: str, memory_series: bool,
+               jobs: int = DEFAULT_JOBS) -> Iterator[Dict[str, Any]]:
+    """The rows of the result files, of the shards' results, and of the leftover markers and
+    unfinished start records, as they are read."""
+    shards = ShardResults.load(os.path.join(sandbox, 'shards'))
+    result_files, marker_files = _discover(results_dir)
+    skip = skip_keys(memory_series)
+    known: Set[Tuple[Optional[str], Optional[str]]] = set()
+    for _path, payload in read_all(result_files, skip, jobs):
+        if 'status' not in payload:
+            continue                           # not a result
+        pair = _pair(payload)
+        if pair in shards.results:
+            payload = latest(payload, shards.results[pair])
+        known.add(pair)
+        yield _result_row(payload, memory_series)
+    for pair, payload in shards.results.items():
+        if pair not in known:
+            known.add(pair)
+            yield _result_row(payload, memory_series)
+    # A marker or a start record counts only for a pair with no result anywhere.
+    markers = [payload for _path, payload in read_all(marker_files, skip, jobs)]
+    for payload in markers + list(shards.unfinished()):
+        row = _row(dict(payload, status=KILLED))
+        if (row['planner'], row['task_id']) not in known:
+            known.add((row['planner'], row['task_id']))
+            yield row
+
+
+def _result_row(payload: Dict[str, Any], memory_series: bool) -> Dict[str, Any]:
+    row = _row(payload)
+    if memory_series:
+        row['memory_series'] = _memory_series(payload)
+    return row
+
+
+def _pair(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    return (payload.get('planner') or {}).get('tag'), (payload.get('task') or {}).get('task-id')
 
 
 def _row(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -113,6 +463,17 @@ def _row(payload: Dict[str, Any]) -> Dict[str, Any]:
     metrics = payload.get('metrics') or {}
     timings = payload.get('timings') or {}
     limits = payload.get('limits') or {}
+    resources = payload.get('resources') or {}
+    phases = timings.get('phases') or {}
+    checking = _sum(phases.get('rebind'), phases.get('validate'))
+    compiling = _sum(*(v for k, v in phases.items() if k.startswith('compile:')))
+    own = resources.get('self') or {}
+    children = resources.get('children') or {}
+    io = resources.get('io') or {}
+    # Under a limit ladder the result is the last rung's; the lower rungs it
+    # went through are kept alongside, each with its own runtime.
+    rungs = [r for r in payload.get('rungs') or [] if isinstance(r, dict)]
+    totals = [r.get('total-seconds') for r in rungs] + [timings.get('total-seconds')]
     return {
         'planner': planner.get('tag'),
         'engine': planner.get('engine'),
@@ -129,34 +490,55 @@ def _row(payload: Dict[str, Any]) -> Dict[str, Any]:
         'parse_seconds': _round(timings.get('parse-seconds')),
         'solve_seconds': _round(timings.get('solve-seconds')),
         'total_seconds': _round(timings.get('total-seconds')),
+        'startup_seconds': _round(timings.get('amortized-startup-seconds')),
+        'import_seconds': _round(phases.get('import')),
+        'resolve_seconds': _round(phases.get('resolve')),
+        'construct_seconds': _round(phases.get('construct')),
+        'compile_seconds': compiling,
+        'search_seconds': _round(phases.get('search')),
+        'validate_seconds': checking,
+        # What the planner cost a user: everything but the harness's own check.
+        'end_to_end_seconds': (_round(timings['total-seconds'] - (checking or 0.0))
+                               if phases and timings.get('total-seconds') is not None else None),
         'peak_memory_mb': metrics.get('peak-memory-mb'),
+        'user_seconds': _sum(own.get('user-seconds'), children.get('user-seconds')),
+        'system_seconds': _sum(own.get('system-seconds'), children.get('system-seconds')),
+        'children_cpu_seconds': _sum(children.get('user-seconds'),
+                                     children.get('system-seconds')),
+        'cpu_utilization': resources.get('cpu-utilization'),
+        'major_faults': _sum(own.get('major-faults'), children.get('major-faults')),
+        'minor_faults': _sum(own.get('minor-faults'), children.get('minor-faults')),
+        'voluntary_switches': _sum(own.get('voluntary-switches'),
+                                   children.get('voluntary-switches')),
+        'involuntary_switches': _sum(own.get('involuntary-switches'),
+                                     children.get('involuntary-switches')),
+        'read_mb': _megabytes(io.get('read-bytes')),
+        'write_mb': _megabytes(io.get('write-bytes')),
+        'scratch_peak_mb': resources.get('scratch-peak-mb'),
+        'traced_peak_mb': (payload.get('allocations') or {}).get('peak-traced-mb'),
+        'allocation_sites': site_sizes(payload),
         'time_limit': limits.get('time-seconds'),
         'memory_limit': limits.get('memory-mb'),
+        'rung': limits.get('rung'),
+        'rungs': limits.get('rungs'),
+        'rung_seconds': ';'.join('' if t is None else f'{t:.3f}' for t in totals) if rungs else None,
+        'ladder_seconds': _sum(*totals) if rungs else None,
+        'lower_rungs': rungs,
         'task_id': task.get('task-id'),
         'domain_file': task.get('domain-file'),
         'problem_file': task.get('problem-file'),
     }
 
 
-def _killed_rows(results_dir: str, known: set) -> List[Dict[str, Any]]:
-    """``.running`` markers with no result file beside them."""
-    rows = []
-    for dirpath, _dirnames, filenames in os.walk(results_dir):
-        for name in filenames:
-            if not name.endswith('.running'):
-                continue
-            if name[: -len('.running')] + '.json' in filenames:
-                continue
-            try:
-                with open(os.path.join(dirpath, name), 'r') as handle:
-                    payload = json.load(handle)
-            except (OSError, json.JSONDecodeError):
-                continue
-            payload['status'] = KILLED
-            row = _row(payload)
-            if (row['planner'], row['task_id']) not in known:
-                rows.append(row)
-    return rows
+def _memory_series(payload: Dict[str, Any]) -> List[Tuple[float, float]]:
+    """``(seconds, RSS MB)`` of a result's ``memory-series``; empty without one."""
+    series = payload.get('memory-series') or {}
+    columns = series.get('columns') or []
+    if 'seconds' not in columns or 'rss-mb' not in columns:
+        return []
+    at, rss = columns.index('seconds'), columns.index('rss-mb')
+    return [(point[at], point[rss]) for point in series.get('points') or []
+            if len(point) > max(at, rss) and point[rss] is not None]
 
 
 def _expected_pairs(tasks_file: str, results_dir: str) -> List[Dict[str, Any]]:
@@ -218,11 +600,16 @@ def _is_solved(row: Dict[str, Any]) -> bool:
     return row['status'] == SOLVED and row['validated'] is not False
 
 
-def _report(rows: Sequence[Dict[str, Any]], per_domain: bool = False) -> str:
+def _report(columns: Columns, per_domain: bool = False,
+            notable: Sequence[Dict[str, Any]] = ()) -> str:
     lines = ['=' * 78, 'pyPMT evaluation summary', '=' * 78, '']
 
-    planners = sorted({r['planner'] for r in rows if r['planner']})
-    tracks = sorted({r['track'] for r in rows if r['track']})
+    planners = columns.present('planner')
+    tracks = columns.present('track')
+    attempted = columns.count(('planner', 'track'))
+    solved = columns.count(('planner', 'track'), where=columns.solved)
+    planner_attempted = columns.count(('planner',))
+    planner_solved = columns.count(('planner',), where=columns.solved)
 
     lines.append('Coverage (solved & validated / attempted)')
     lines.append('')
@@ -230,77 +617,100 @@ def _report(rows: Sequence[Dict[str, Any]], per_domain: bool = False) -> str:
     lines.append(header)
     lines.append('-' * len(header))
     for planner in planners:
-        cells = []
-        planner_rows = [r for r in rows if r['planner'] == planner]
-        for track in tracks:
-            track_rows = [r for r in planner_rows if r['track'] == track]
-            cells.append(_coverage_cell(track_rows))
-        cells.append(_coverage_cell(planner_rows))
+        cells = [_coverage_cell(solved.get((planner, track), 0), attempted.get((planner, track), 0))
+                 for track in tracks]
+        cells.append(_coverage_cell(planner_solved.get((planner,), 0),
+                                    planner_attempted.get((planner,), 0)))
         lines.append(f'{planner:<26}' + ''.join(f'{c:>16}' for c in cells))
     lines.append('')
 
     lines.append('Status breakdown')
     lines.append('')
-    statuses = sorted({r['status'] for r in rows if r['status']})
+    statuses = columns.present('status')
+    counts = columns.count(('planner', 'status'))
     header = f'{"planner":<26}' + ''.join(f'{s[:12]:>14}' for s in statuses)
     lines.append(header)
     lines.append('-' * len(header))
     for planner in planners:
-        counts = Counter(r['status'] for r in rows if r['planner'] == planner)
-        lines.append(f'{planner:<26}' + ''.join(f'{counts.get(s, 0):>14}' for s in statuses))
+        lines.append(f'{planner:<26}' +
+                     ''.join(f'{counts.get((planner, s), 0):>14}' for s in statuses))
     lines.append('')
+    lines.extend(_predicted_note(columns))
 
     lines.append('Runtime on solved instances (seconds)')
     lines.append('')
     header = f'{"planner":<26}{"solved":>10}{"mean":>10}{"median":>10}{"max":>10}{"mean MB":>10}'
     lines.append(header)
     lines.append('-' * len(header))
+    times = columns.values('total_seconds', ('planner',), where=columns.solved)
+    memory = columns.values('peak_memory_mb', ('planner',), where=columns.solved)
     for planner in planners:
-        solved = [r for r in rows if r['planner'] == planner and _is_solved(r)]
-        times = [r['total_seconds'] for r in solved if r['total_seconds'] is not None]
-        memory = [r['peak_memory_mb'] for r in solved if r['peak_memory_mb'] is not None]
+        planner_times = times.get((planner,), [])
         lines.append(
-            f'{planner:<26}{len(solved):>10}'
-            f'{_fmt(_mean(times)):>10}{_fmt(_median(times)):>10}'
-            f'{_fmt(max(times) if times else None):>10}{_fmt(_mean(memory)):>10}'
+            f'{planner:<26}{planner_solved.get((planner,), 0):>10}'
+            f'{_fmt(_mean(planner_times)):>10}{_fmt(_median(planner_times)):>10}'
+            f'{_fmt(max(planner_times) if planner_times else None):>10}'
+            f'{_fmt(_mean(memory.get((planner,), []))):>10}'
         )
     lines.append('')
 
     if len(planners) > 1:
-        lines.extend(_pairwise_section(rows, planners))
+        lines.extend(_pairwise_section(columns, planners))
 
     if per_domain:
-        lines.extend(_per_domain_section(rows, planners))
+        lines.extend(_per_domain_section(columns, planners))
+
+    lines.extend(allocation_rollup(notable))
 
     return '\n'.join(lines)
 
 
-def _coverage_cell(rows: Sequence[Dict[str, Any]]) -> str:
-    if not rows:
+def _predicted_note(columns: Columns) -> List[str]:
+    """How many unsolved pairs were predicted (``run-local --cutoff``), not measured."""
+    counts = columns.count(('planner', 'status'))
+    predicted = {planner: count for (planner, status), count in counts.items()
+                 if status == SKIPPED_PREDICTED}
+    if not predicted:
+        return []
+    attempted = columns.count(('planner',))
+    solved = columns.count(('planner',), where=columns.solved)
+    lines = [f'{sum(predicted.values())} pair(s) were not run but PREDICTED unsolved '
+             f'({SKIPPED_PREDICTED}: the smaller instances of their domain ran out of time or '
+             f'memory in a row). They count as attempted and unsolved:']
+    for planner, count in sorted(predicted.items()):
+        unsolved = attempted[(planner,)] - solved.get((planner,), 0)
+        lines.append(f'  {planner:<24} {count} of its {unsolved} unsolved predicted, '
+                     f'{unsolved - count} measured')
+    lines.append('')
+    return lines
+
+
+def _coverage_cell(solved: int, attempted: int) -> str:
+    if not attempted:
         return '-'
-    solved = sum(1 for r in rows if _is_solved(r))
-    return f'{solved}/{len(rows)} ({100.0 * solved / len(rows):.0f}%)'
+    return f'{solved}/{attempted} ({100.0 * solved / attempted:.0f}%)'
 
 
-def _pairwise_section(rows: Sequence[Dict[str, Any]], planners: Sequence[str]) -> List[str]:
+def _pairwise_section(columns: Columns, planners: Sequence[str]) -> List[str]:
     """Coverage restricted to the tasks *every* planner attempted.
 
     Without this, a planner that only ran the temporal track looks better or
     worse than one that ran everything for reasons that have nothing to do with
     the planner.
     """
-    by_planner = defaultdict(dict)
-    for row in rows:
-        if row['task_id']:
-            by_planner[row['planner']][row['task_id']] = row
-    common = set.intersection(*(set(by_planner[p]) for p in planners)) if planners else set()
+    by_planner = defaultdict(set)
+    for planner, task_id in columns.count(('planner', 'task_id')):
+        if task_id:
+            by_planner[planner].add(task_id)
+    solved = columns.count(('planner', 'task_id'), where=columns.solved)
+    common = set.intersection(*(by_planner[p] for p in planners)) if planners else set()
     if not common:
         return []
     lines = ['Head-to-head on the {} tasks every planner attempted'.format(len(common)), '']
     header = f'{"planner":<26}{"solved":>10}{"unique":>10}'
     lines.append(header)
     lines.append('-' * len(header))
-    solved_sets = {p: {t for t in common if _is_solved(by_planner[p][t])} for p in planners}
+    solved_sets = {p: {t for t in common if (p, t) in solved} for p in planners}
     for planner in planners:
         others = set().union(*(solved_sets[p] for p in planners if p != planner)) if len(planners) > 1 else set()
         unique = solved_sets[planner] - others
@@ -309,40 +719,52 @@ def _pairwise_section(rows: Sequence[Dict[str, Any]], planners: Sequence[str]) -
     return lines
 
 
-def _per_domain_section(rows: Sequence[Dict[str, Any]], planners: Sequence[str]) -> List[str]:
+def _per_domain_section(columns: Columns, planners: Sequence[str]) -> List[str]:
     lines = ['Per-domain coverage', '']
     header = f'{"track":<10}{"domain":<38}' + ''.join(f'{p[:14]:>16}' for p in planners)
     lines.append(header)
     lines.append('-' * len(header))
-    domains = sorted({(r['track'] or '', r['domain'] or '') for r in rows})
-    for track, domain in domains:
-        cells = []
-        for planner in planners:
-            subset = [r for r in rows
-                      if r['planner'] == planner and r['domain'] == domain and r['track'] == track]
-            cells.append(_coverage_cell(subset))
+    attempted: Dict[Tuple[str, str, Any], int] = Counter()
+    solved: Dict[Tuple[str, str, Any], int] = Counter()
+    for counts, into in ((columns.count(('track', 'domain', 'planner')), attempted),
+                         (columns.count(('track', 'domain', 'planner'), where=columns.solved),
+                          solved)):
+        for (track, domain, planner), count in counts.items():
+            into[(track or '', domain or '', planner)] += count
+    for track, domain in sorted({(track, domain) for track, domain, _planner in attempted}):
+        cells = [_coverage_cell(solved[(track, domain, planner)],
+                                attempted[(track, domain, planner)]) for planner in planners]
         lines.append(f'{track:<10}{domain[:37]:<38}' + ''.join(f'{c:>16}' for c in cells))
     lines.append('')
     return lines
 
 
-def _summary_dict(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+def _summary_dict(columns: Columns) -> Dict[str, Any]:
     summary: Dict[str, Any] = {'planners': {}}
-    for planner in sorted({r['planner'] for r in rows if r['planner']}):
-        planner_rows = [r for r in rows if r['planner'] == planner]
+    attempted = columns.count(('planner', 'track'))
+    solved = columns.count(('planner', 'track'), where=columns.solved)
+    statuses = columns.count(('planner', 'status'))
+    engines = columns.count(('planner', 'engine'))
+    for planner in columns.present('planner'):
+        status_counts = {status: count for (p, status), count in sorted(statuses.items(), key=str)
+                         if p == planner}
         entry: Dict[str, Any] = {
-            'engine': next((r['engine'] for r in planner_rows if r['engine']), None),
-            'attempted': len(planner_rows),
-            'solved': sum(1 for r in planner_rows if _is_solved(r)),
-            'status-counts': dict(Counter(r['status'] for r in planner_rows)),
+            'engine': next((engine for engine in columns.levels['engine']
+                            if engine and (planner, engine) in engines), None),
+            'attempted': sum(status_counts.values()),
+            'solved': sum(count for (p, _track), count in solved.items() if p == planner),
+            'status-counts': status_counts,
+            'measured': sum(count for status, count in status_counts.items()
+                            if status != SKIPPED_PREDICTED),
+            'predicted': status_counts.get(SKIPPED_PREDICTED, 0),
             'per-track': {},
         }
-        for track in sorted({r['track'] for r in planner_rows if r['track']}):
-            track_rows = [r for r in planner_rows if r['track'] == track]
-            entry['per-track'][track] = {
-                'attempted': len(track_rows),
-                'solved': sum(1 for r in track_rows if _is_solved(r)),
-            }
+        for (p, track), count in sorted(attempted.items(), key=lambda item: item[0][1] or ''):
+            if p == planner and track:
+                entry['per-track'][track] = {
+                    'attempted': count,
+                    'solved': solved.get((planner, track), 0),
+                }
         summary['planners'][planner] = entry
     return summary
 
@@ -363,17 +785,57 @@ def _list_errors(sandbox: str, rows: Sequence[Dict[str, Any]]) -> None:
             print(f'  ... and {len(errors) - 10} more')
 
 
+def _list_starved(rows: Sequence[Dict[str, Any]]) -> None:
+    """Runs that spent most of their wall time without a CPU."""
+    starved = [r for r in rows if _starved(r)]
+    if not starved:
+        return
+    print(f'\n{len(starved)} run(s) used less than {LOW_UTILIZATION:.0%} of a CPU over their '
+          f'wall time -- likely throttled by contention, so their times are suspect:')
+    for row in sorted(starved, key=lambda r: r['cpu_utilization'])[:10]:
+        print(f"  {row['planner']:<20} {row['task_id']:<40} "
+              f"{row['cpu_utilization']:.0%} of {row['total_seconds']:.0f}s")
+    if len(starved) > 10:
+        print(f'  ... and {len(starved) - 10} more')
+
+
+def _list_unsettled(rows: Sequence[Dict[str, Any]]) -> None:
+    """Pairs of a limit ladder that ran out below its last rung."""
+    unsettled = [r for r in rows if _unsettled(r)]
+    if not unsettled:
+        return
+    print(f'\n{len(unsettled)} pair(s) hit a limit below the last rung of the ladder; their '
+          f'status is not final yet -- run generate again to escalate them:')
+    for row in unsettled[:10]:
+        print(f"  {row['planner']:<20} {row['task_id']:<40} "
+              f"{row['status']} at rung {row['rung']} of {row['rungs']}")
+    if len(unsettled) > 10:
+        print(f'  ... and {len(unsettled) - 10} more')
+
+
+def _starved(row: Dict[str, Any]) -> bool:
+    return (row.get('cpu_utilization') is not None
+            and (row.get('total_seconds') or 0) >= _UTILIZATION_MIN_SECONDS
+            and row['cpu_utilization'] < LOW_UTILIZATION)
+
+
+def _unsettled(row: Dict[str, Any]) -> bool:
+    return (row['status'] in ('TIMEOUT', 'MEMOUT') and row.get('rung') is not None
+            and row['rung'] + 1 < (row.get('rungs') or 0))
+
+
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
 
-def _write_csv(path: str, rows: Sequence[Dict[str, Any]]) -> None:
-    with open(path, 'w', newline='') as handle:
-        writer = csv.DictWriter(handle, fieldnames=_CSV_COLUMNS, extrasaction='ignore')
-        writer.writeheader()
-        for row in sorted(rows, key=lambda r: (r['planner'] or '', r['track'] or '',
-                                               r['domain'] or '', r['instance'] or '')):
-            writer.writerow(row)
+def _sum(*values) -> Optional[float]:
+    """Sum of the values that are there; ``None`` when none is."""
+    present = [v for v in values if v is not None]
+    return _round(sum(present)) if present else None
+
+
+def _megabytes(value) -> Optional[float]:
+    return _round(value / (1024.0 * 1024.0)) if value is not None else None
 
 
 def _mean(values: Sequence[float]) -> Optional[float]:
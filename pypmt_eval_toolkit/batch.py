@@ -0,0 +1,181 @@
+"""Run a slice of a command file in one process: ``pypmtevalcli solve-batch``.
+
+A standalone ``solve`` pays the same fixed price before it parses anything:
+interpreter start-up, ``import unified_planning.shortcuts``, plugin discovery
+and engine resolution. On a classical sweep, where most instances finish in a
+second or two, that price is a large share of the whole sweep.
+
+``solve-batch`` pays it once. The parent imports UP and resolves the engine of
+every planner in the slice, then forks one child per (planner, task) pair. The
+child inherits the warm interpreter and runs exactly what ``solve`` runs -- its
+own alarm, its own address-space limit, its own scratch directory, its own
+result file -- so a batched pair is measured the way a standalone one is. A
+child that crashes or is killed takes nothing but its own pair with it, and a
+planner whose engine fails to resolve in the parent, however it fails, has its
+pairs recorded as ``ERROR`` while the rest of the batch runs.
+
+Each result records the batch it ran in (``run.batch``) and its share of the
+start-up cost (``timings.amortized-startup-seconds``), so the per-task timings
+stay comparable with unbatched runs.
+
+``--jobs K`` keeps up to K children running at once, which is how a bundled
+slurm array element (``generate --tasks-per-job``) uses its ``cpus-per-task``.
+Before the first child starts, every pair of the slice gets its ``.running``
+marker: when slurm kills the job part-way, the pairs it never reached show up
+as ``KILLED`` in ``analyze``, like the one it interrupted, not as missing.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from .generator import read_commands, solve_arguments
+
+
+def solve_batch(args) -> int:
+    started = time.monotonic()
+    commands = read_commands(args.cmd_file)
+    selected = _select(commands, args.slice, args.indices)
+    if not selected:
+        print(f'No command selected from {args.cmd_file}', file=sys.stderr)
+        return 1
+
+    from .cli import _build_parser
+    from .pairindex import PairNotFound, apply
+    parser = _build_parser()
+    runs = []
+    for index, command in selected:
+        try:
+            task_args = parser.parse_args(solve_arguments(command))
+        except SystemExit:
+            # argparse has already said what is wrong with the line.
+            print(f'skipping line {index + 1} of {args.cmd_file}: not a valid solve command',
+                  file=sys.stderr)
+            continue
+        try:
+            apply(task_args)                         # a `solve --from-index` line
+        except (PairNotFound, OSError, ValueError) as error:
+            print(f'skipping line {index + 1} of {args.cmd_file}: {error}', file=sys.stderr)
+            continue
+        runs.append((index, task_args))
+
+    # Every engine is resolved once, here; the children find it registered.
+    configs = sorted({os.path.abspath(os.path.expanduser(a.planner_cfg)) for _i, a in runs})
+    from .runner import preload, write_failed, write_pending_marker
+    failures = preload(configs)
+    for path, error in failures.items():
+        print(f'note: {path}: {type(error).__name__}: {error}; its tasks are recorded as ERROR',
+              file=sys.stderr)
+    startup = _process_age(started)
+
+    # One shard for the batch, should its solves append to shards.
+    from .shards import ENV, shard_name
+    os.environ.setdefault(ENV, shard_name())
+    pending = []
+    for index, task_args in runs:
+        error = failures.get(os.path.abspath(os.path.expanduser(task_args.planner_cfg)))
+        if error is not None and write_failed(task_args, error):
+            continue                                 # recorded as ERROR; nothing to run
+        pending.append((index, task_args))
+    runs = pending
+    for _index, task_args in runs:
+        write_pending_marker(task_args)
+
+    jobs = max(1, getattr(args, 'jobs', None) or 1)
+    print(f'[batch] {len(runs)} task(s), start-up {startup:.2f}s '
+          f'({startup / max(1, len(runs)):.3f}s per task)'
+          + (f', {jobs} at a time' if jobs > 1 else ''))
+    exits = 0
+    running = set()
+    for position, (index, task_args) in enumerate(runs):
+        task_args.batch = {
+            'size': len(runs),
+            'position': position,
+            'line': index + 1,
+            'command-file': os.path.abspath(args.cmd_file),
+            'parent-pid': os.getpid(),
+            'startup-seconds': round(startup, 4),
+        }
+        if len(running) >= jobs:
+            exits += _reap(running) != 0
+        running.add(_fork_child(task_args))
+    while running:
+        exits += _reap(running) != 0
+    if exits:
+        print(f'[batch] {exits} task(s) exited abnormally; their pairs show up as '
+              f'KILLED or ERROR in analyze', file=sys.stderr)
+    print(f'[batch] done in {time.monotonic() - started:.1f}s')
+    return 0
+
+
+def _fork_child(task_args) -> int:
+    """Fork and run one pair in the child; the child's pid."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:                                             # the child
+        code = 1
+        try:
+            code = task_args.func(task_args) or 0
+        except BaseException:                                # noqa: BLE001 -- never return into the parent's loop
+            import traceback
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+def _reap(running: set) -> int:
+    """Wait for one of the `running` children; its exit status."""
+    pid, status = os.wait()
+    running.discard(pid)
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _select(commands: Sequence[str], slice_spec: Optional[str],
+            indices: Optional[Sequence[str]]) -> List[Tuple[int, str]]:
+    """``(index, command)`` pairs chosen by ``--slice`` and/or ``--indices``.
+
+    Both are 0-based, like a slurm array index: ``--slice 100:200`` is lines 101
+    to 200 of the file, ``--indices 3,7 9`` lines 4, 8 and 10.
+    """
+    chosen: List[int] = []
+    if slice_spec:
+        start, _, end = slice_spec.partition(':')
+        chosen.extend(range(int(start or 0), min(len(commands), int(end) if end else len(commands))))
+    for entry in indices or []:
+        chosen.extend(int(part) for part in str(entry).split(',') if part.strip())
+    if not slice_spec and not indices:
+        chosen = list(range(len(commands)))
+    seen = set()
+    selected = []
+    for index in chosen:
+        if 0 <= index < len(commands) and index not in seen:
+            seen.add(index)
+            selected.append((index, commands[index]))
+    return selected
+
+
+def _process_age(fallback_start: float) -> float:
+    """Seconds since this process started, interpreter start-up included.
+
+    Read from ``/proc``, since nothing inside the interpreter saw it start; on
+    a platform without it, the time since ``solve_batch`` was entered.
+    """
+    try:
+        with open('/proc/self/stat', 'r') as handle:
+            fields = handle.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime', 'r') as handle:
+            uptime = float(handle.read().split()[0])
+        started_ticks = int(fields[19])                      # field 22 of stat(5)
+        return max(0.0, uptime - started_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - fallback_start
+
@@ -0,0 +1,174 @@
+"""A disk cache of parsed problems, shared by every run: ``solve --cache-dir``.
+
+Every planner of an experiment parses the same (domain, problem) pair with
+``PDDLReader``; on a large IPC instance the parse alone takes tens of seconds,
+paid once per planner. With a cache directory, whichever run parses an
+instance first stores the parsed problem and the others load it.
+
+Entries are content-addressed: the key hashes the *contents* of the domain and
+problem files together with the ``unified_planning`` and Python versions, so a
+regenerated benchmark file or an upgraded UP never serves a stale problem, and
+two copies of the same file share one entry. An entry is a pickle of the
+problem, written to a temporary file and renamed into place, so a reader sees
+a whole entry or none; two runs filling the same entry at once both write the
+same bytes. The directory is capped in size and trimmed least recently used
+first (a hit refreshes the entry's mtime), so it can live on node-local scratch
+as well as in the sandbox.
+
+A pickled problem carries its UP ``Environment`` with it -- expressions are
+shared nodes that only compare equal within one environment -- so a run that
+loads a problem adopts that environment as UP's global one before it resolves
+its engine; see :func:`pypmt_eval_toolkit.runner._cached_problem`.
+
+``solve --precompile`` stores a second kind of entry, keyed by the pipeline
+as well: the problem, the problem its ``compilationlist`` turned it into, and
+the functions that map the compiled problem's actions back. All three are
+pickled together, so they share one environment when they are loaded.
+
+Unpickling runs code: point ``--cache-dir`` only at a directory the people
+running the sweep control.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import platform
+import time
+from typing import Any, Optional
+
+DEFAULT_MAX_MB = 4096
+SUFFIX = '.pickle'
+# Bumped whenever what goes into an entry changes.
+FORMAT = 2
+
+
+class ProblemCache:
+    def __init__(self, directory: str, max_mb: Optional[float] = None):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_mb = DEFAULT_MAX_MB if max_mb is None else max_mb
+
+    def key(self, domain_file: str, problem_file: str, *extra: str) -> str:
+        """The entry of a (domain, problem) pair; `extra` tells apart what was
+        done to it (a compilation pipeline, say)."""
+        import unified_planning
+        digest = hashlib.sha256()
+        for part in (f'format={FORMAT}', f'up={unified_planning.__version__}',
+                     f'python={platform.python_version()}', *extra):
+            digest.update(part.encode() + b'\0')
+        for path in (domain_file, problem_file):
+            digest.update(file_digest(path).encode() + b'\0')
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        """The cached problem, or ``None``; an unreadable entry is dropped."""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as handle:
+                problem = _Unpickler(handle).load()
+        except FileNotFoundError:
+            return None
+        except Exception:                                    # noqa: BLE001 -- any bad entry is a miss
+            _remove(path)
+            return None
+        try:
+            os.utime(path)                                   # most recently used
+        except OSError:
+            pass
+        return problem
+
+    def put(self, key: str, problem: Any) -> bool:
+        """Store `problem`; ``False`` when it could not be (full disk, unpicklable)."""
+        path = self.path(key)
+        tmp = f'{path}.tmp.{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as handle:
+                _Pickler(handle, protocol=pickle.HIGHEST_PROTOCOL).dump(problem)
+            os.replace(tmp, path)
+        except Exception:                                    # noqa: BLE001 -- a cache never fails a run
+            _remove(tmp)
+            return False
+        self.trim()
+        return True
+
+    def trim(self) -> None:
+        """Evict least recently used entries until the cache is under its cap.
+
+        Trims to 90% of the cap, so a full cache is not re-scanned on every
+        store. Several runs trimming at once may race to remove the same entry;
+        whoever loses finds it gone and moves on.
+        """
+        if not self.max_mb or self.max_mb <= 0:
+            return
+        entries = []
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(self.directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if not name.endswith(SUFFIX):
+                    # A temporary file an interrupted store left behind.
+                    if time.time() - stat.st_mtime > 3600:
+                        _remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        cap = self.max_mb * 1024 * 1024
+        if total <= cap:
+            return
+        for _mtime, size, path in sorted(entries):
+            if total <= 0.9 * cap:
+                break
+            _remove(path)
+            total -= size
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles UP's module-level type singletons by name.
+
+    ``BOOL`` and ``TIME`` are compared by identity (the type checker asks
+    ``t != BOOL``); a pickled copy of either would make every Boolean
+    expression of the loaded problem ill-typed.
+    """
+
+    def persistent_id(self, obj):
+        for name, singleton in _singletons().items():
+            if obj is singleton:
+                return name
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        try:
+            return _singletons()[pid]
+        except KeyError:
+            raise pickle.UnpicklingError(f'unknown persistent id {pid!r}') from None
+
+
+def _singletons():
+    from unified_planning.model import types
+    return {'up.types.BOOL': types.BOOL, 'up.types.TIME': types.TIME}
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
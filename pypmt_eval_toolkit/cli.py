@@ -77,21 +77,72 @@ def _build_parser() -> argparse.ArgumentParser:
     generate.add_argument('--venv-dir', help='virtualenv the commands should activate')
     generate.add_argument('--apptainer-image', help='run each command inside this image instead')
     generate.add_argument('--skip-existing', action='store_true',
-                          help='skip pairs that already have a result (resume a sweep)')
+                          help='skip pairs that already have a result (resume a sweep); one whose '
+                               'fingerprint no longer matches is reported and run again')
     generate.add_argument('--per-task-scripts', action='store_true',
                           help='also emit one .sbatch per task (default is job arrays)')
     generate.add_argument('--no-validate', action='store_true',
                           help='do not validate returned plans (default: validate)')
+    generate.add_argument('--cache-dir', default=None,
+                          help='have every solve share parsed problems through this directory')
+    generate.add_argument('--result-store', default=None, metavar='DIR',
+                          help='import results with a matching fingerprint from this store instead '
+                               'of running them, and have every solve publish to it')
+    generate.add_argument('--result-sink', choices=('files', 'shards'), default='files',
+                          help='where solves write results: a JSON file per pair (default), or '
+                               'records appended to one shard per job under <sandbox>/shards')
+    generate.add_argument('--supervise', action='store_true',
+                          help='run every solve under the out-of-process watchdog (see solve --supervise)')
+    generate.add_argument('--order', choices=('natural', 'longest-first'), default=None,
+                          help='command order: the benchmark\'s own (default), or the longest '
+                               'expected pairs first, spread across arrays and bundles')
+    generate.add_argument('--prior', nargs='+', default=None, metavar='SANDBOX',
+                          help='earlier sandboxes whose results estimate each pair\'s runtime '
+                               '(implies --order longest-first)')
+    generate.add_argument('--right-size', nargs='+', default=None, metavar='SANDBOX',
+                          help='ask slurm for less time and memory for pairs that used little in '
+                               'these earlier sandboxes, in a few classes with arrays of their '
+                               'own; the solve limits stay as they are')
+    generate.add_argument('--tasks-per-job', type=int, default=None, metavar='N',
+                          help='pack N pairs into each slurm array element, run through solve-batch '
+                               'cpus-per-task at a time (default: 1)')
+    generate.add_argument('--seconds-per-job', type=int, default=None, metavar='SECONDS',
+                          help='pack as many pairs per array element as fit in this many seconds '
+                               'at their time limit')
+    generate.add_argument('--packed-nodes', type=int, default=None, metavar='N',
+                          help='instead of job arrays, N whole-node jobs that each run their '
+                               'share of the pairs through run-local, pinned to cores')
+    generate.add_argument('--node-cores', type=int, default=None, metavar='C',
+                          help='cores of one node, for --packed-nodes '
+                               '(default: cfgs.slurm.cores-per-node)')
+    generate.add_argument('--node-memory', default=None, metavar='SIZE',
+                          help='memory of one node, e.g. 256GB, for --packed-nodes '
+                               '(default: cfgs.slurm.memory-per-node; otherwise cores decide)')
+    generate.add_argument('--indexed', action='store_true',
+                          help='write each planner\'s pairs to an index (cmds/<tag>.pairs) that '
+                               'solve --from-index seeks into, and short commands that refer to it')
+    generate.add_argument('--shard', default=None, metavar='I/N',
+                          help='generate only shard I of N (0-based) of the pairs, for one of N '
+                               'sites; combine the sandboxes with merge')
+    generate.add_argument('--shard-by', choices=('hash', 'domain', 'runtime'), default=None,
+                          help='how to split: by a hash of each pair (default), by whole domains, '
+                               'or balanced by expected runtime (same --prior at every site)')
     generate.add_argument('--local-jobs', type=int, default=4,
                           help='default parallelism baked into run_local.sh (default: 4)')
     generate.set_defaults(func=_generate)
 
     # -- solve ---------------------------------------------------------
     solve = subparsers.add_parser('solve', help='run ONE (planner, task) pair (called by slurm)')
-    solve.add_argument('--planner-cfg', '--planner-cfg-file', required=True)
-    solve.add_argument('--domain', required=True)
-    solve.add_argument('--problem', required=True)
-    solve.add_argument('--results-dir', '--results-dump-dir', required=True)
+    # Required, unless --from-index supplies them.
+    solve.add_argument('--planner-cfg', '--planner-cfg-file', default=None)
+    solve.add_argument('--domain', default=None)
+    solve.add_argument('--problem', default=None)
+    solve.add_argument('--results-dir', '--results-dump-dir', default=None)
+    solve.add_argument('--from-index', default=None, metavar='PAIRS',
+                       help='take the pair, its limits and directories from an index written by '
+                            'generate --indexed (cmds/<tag>.pairs)')
+    solve.add_argument('--index', type=int, default=None, metavar='N',
+                       help='which pair of --from-index, 0-based')
     solve.add_argument('--task-id', default=None,
                        help='defaults to <suite>:<domain>:<instance>')
     solve.add_argument('--suite', default='')
@@ -111,11 +162,133 @@ def _build_parser() -> argparse.ArgumentParser:
                        help='seconds; 0 disables the runner-side limit')
     solve.add_argument('--memory-limit', type=int, default=8192,
                        help='MB; 0 disables the runner-side limit')
+    solve.add_argument('--memory-sample-interval', type=float, default=None, metavar='SECONDS',
+                       help='how often to sample the memory of the solve and every process it '
+                            'starts (default: 0.5; 0 falls back to the peak of this process)')
+    solve.add_argument('--profile', action='store_true',
+                       help='sample the solve\'s Python stacks and write <task>.folded next '
+                            'to the result (also "profile": true in the planner config)')
+    solve.add_argument('--trace-allocations', action='store_true',
+                       help='trace Python allocations with tracemalloc from the parse on, and '
+                            'record the top allocation sites and the traced peak (slows the run)')
+    solve.add_argument('--trace-frames', type=int, default=None, metavar='N',
+                       help='frames kept per traced allocation (default: 8)')
+    solve.add_argument('--cache-dir', default=None,
+                       help='share parsed problems through this directory (sandbox or node-local '
+                            'scratch); the first run to parse an instance fills it')
+    solve.add_argument('--cache-max-mb', type=float, default=None,
+                       help='size cap of the parse cache, trimmed least recently used first '
+                            '(default: 4096)')
+    solve.add_argument('--result-store', default=None, metavar='DIR',
+                       help='also publish the finished result here, by fingerprint, for other '
+                            'sandboxes to reuse (see generate --result-store)')
+    solve.add_argument('--shard-dir', default=None, metavar='DIR',
+                       help='append the result (and the start record standing in for the '
+                            '.running marker) to this job\'s shard in DIR instead of writing '
+                            'files (see generate --result-sink)')
+    solve.add_argument('--rung', default=None, metavar='I/N',
+                       help='the run is rung I (0-based) of an N-rung limit ladder; a result '
+                            'from a lower rung is kept in this one\'s "rungs" (set by generate)')
+    solve.add_argument('--precompile', action='store_true',
+                       help='run the planner\'s compilationlist in the runner and hand the engine '
+                            'the compiled problem; with --cache-dir, planners with the same '
+                            'pipeline share it (also "precompile": true in the planner config)')
+    solve.add_argument('--supervise', action='store_true',
+                       help='solve in a child watched from outside: the limits apply to the '
+                            'whole process tree, and a stuck solve is still killed and reported')
     # Accepted and ignored: the older toolkit passed it, and old command files
     # must keep running against the new CLI.
     solve.add_argument('--exp-details-dir', default=None, help=argparse.SUPPRESS)
     solve.set_defaults(func=_solve, validate=True)
 
+    # -- solve-batch ---------------------------------------------------
+    batch = subparsers.add_parser(
+        'solve-batch', help='run a slice of a command file, importing UP once')
+    batch.add_argument('--cmd-file', required=True,
+                       help='a cmds/<planner>.txt (or any file of solve commands)')
+    batch.add_argument('--slice', default=None, metavar='START:END',
+                       help='0-based, end exclusive, like a slurm array index '
+                            '(default: the whole file)')
+    batch.add_argument('--indices', nargs='+', default=None,
+                       help='0-based line indices, space or comma separated')
+    batch.add_argument('--jobs', type=int, default=1,
+                       help='pairs to run at once (default: 1)')
+    batch.set_defaults(func=_solve_batch)
+
+    # -- run-local -----------------------------------------------------
+    local = subparsers.add_parser(
+        'run-local', help='run a sweep on this machine, admitting tasks by memory and cores')
+    local.add_argument('--sandbox-dir', required=True)
+    local.add_argument('--cmd-file', nargs='+', default=None,
+                       help='command file(s) to run (default: <sandbox>/cmds/generated_cmds.sh)')
+    local.add_argument('--jobs', type=int, default=None,
+                       help='tasks at a time (default: the cores this process may use)')
+    local.add_argument('--memory-mb', type=float, default=None,
+                       help='what the running tasks\' memory limits may add up to '
+                            '(default: 90%% of the memory available at start)')
+    local.add_argument('--journal', default=None,
+                       help='default: <sandbox>/local/journal.jsonl')
+    local.add_argument('--fresh', action='store_true',
+                       help='ignore the journal and run every command again')
+    local.add_argument('--stride', default=None, metavar='I/N',
+                       help='run every N-th command starting at the I-th (0-based), '
+                            'so N machines can share one command file')
+    local.add_argument('--pin-cores', action='store_true',
+                       help='bind each running task to a core of its own')
+    local.add_argument('--kill-wait', type=float, default=None, metavar='SECONDS',
+                       help='on Ctrl-C, SIGKILL tasks this long after SIGTERM (default: 30)')
+    local.add_argument('--cutoff', type=int, default=None, metavar='K',
+                       help='run each planner\'s instances of a domain smallest first, one at a '
+                            'time, and record the rest as SKIPPED-PREDICTED after K TIMEOUT/'
+                            'MEMOUT in a row')
+    local.set_defaults(func=_run_local)
+
+    # -- worker --------------------------------------------------------
+    worker = subparsers.add_parser(
+        'worker', help='take pairs from a sandbox shared by several machines, as they free up')
+    worker.add_argument('--queue', required=True, metavar='SANDBOX',
+                        help='the sandbox whose command file the workers share')
+    worker.add_argument('--cmd-file', nargs='+', default=None,
+                        help='command file(s) to take pairs from '
+                             '(default: <sandbox>/cmds/generated_cmds.sh)')
+    worker.add_argument('--jobs', type=int, default=None,
+                        help='tasks at a time on this machine (default: its usable cores)')
+    worker.add_argument('--memory-mb', type=float, default=None,
+                        help='what the running tasks\' memory limits may add up to '
+                             '(default: 90%% of the memory available at start)')
+    worker.add_argument('--pin-cores', action='store_true',
+                        help='bind each running task to a core of its own')
+    worker.add_argument('--name', default=None,
+                        help='this worker\'s name in the queue (default: <host>-<pid>)')
+    worker.add_argument('--heartbeat', type=float, default=None, metavar='SECONDS',
+                        help='how often to renew the leases of running pairs (default: 30)')
+    worker.add_argument('--lease-seconds', type=float, default=None, metavar='SECONDS',
+                        help='a lease not renewed for this long is taken for a dead worker\'s '
+                             'and its pair runs again (default: 600)')
+    worker.add_argument('--kill-wait', type=float, default=None, metavar='SECONDS',
+                        help='on Ctrl-C, SIGKILL tasks this long after SIGTERM (default: 30)')
+    worker.set_defaults(func=_worker)
+
+    # -- merge ---------------------------------------------------------
+    merge = subparsers.add_parser(
+        'merge', help='combine the sandboxes of one sweep (shards, sites) into one')
+    merge.add_argument('--sandbox-dir', required=True, help='the new, combined sandbox')
+    merge.add_argument('--from', dest='sources', nargs='+', required=True, metavar='SANDBOX',
+                       help='the sandboxes to combine')
+    merge.add_argument('--force', action='store_true',
+                       help='merge even when limits or planner fingerprints disagree')
+    merge.set_defaults(func=_merge)
+
+    # -- ingest --------------------------------------------------------
+    ingest = subparsers.add_parser(
+        'ingest', help='bring <sandbox>/results.sqlite up to date with the result files')
+    ingest.add_argument('--sandbox-dir', required=True)
+    ingest.add_argument('--rebuild', action='store_true',
+                        help='start the database over instead of reading only what changed')
+    ingest.add_argument('--jobs', type=int, default=None,
+                        help='result files read at once (default: 8)')
+    ingest.set_defaults(func=_ingest)
+
     # -- analyze -------------------------------------------------------
     analyze = subparsers.add_parser('analyze', help='aggregate results into a CSV and a report')
     analyze.add_argument('--sandbox-dir', default=None)
@@ -124,8 +297,26 @@ def _build_parser() -> argparse.ArgumentParser:
     analyze.add_argument('--output-dir', default=None, help='default: <sandbox>/analysis')
     analyze.add_argument('--error-logs-dir', default=None, help=argparse.SUPPRESS)
     analyze.add_argument('--per-domain', action='store_true', help='add a per-domain table')
+    analyze.add_argument('--no-database', action='store_true',
+                         help='parse every result file instead of using <sandbox>/results.sqlite')
+    analyze.add_argument('--jobs', type=int, default=None,
+                         help='result files read at once (default: 8)')
     analyze.set_defaults(func=_analyze)
 
+    # -- profile-report ------------------------------------------------
+    profiles = subparsers.add_parser(
+        'profile-report', help='merge the --profile stacks of a sweep into hot-function tables')
+    profiles.add_argument('--sandbox-dir', required=True)
+    profiles.add_argument('--results-dir', '--dump-results-dir', default=None,
+                          help='default: <sandbox>/results')
+    profiles.add_argument('--output-dir', default=None, help='default: <sandbox>/profiles')
+    profiles.add_argument('--by', choices=('planner', 'domain'), default='planner',
+                          help='merge per planner, or per planner and domain (default: planner)')
+    profiles.add_argument('--planners', nargs='+', default=None, help='only these planner tags')
+    profiles.add_argument('--top', type=int, default=30,
+                          help='functions per table (default: 30)')
+    profiles.set_defaults(func=_profile_report)
+
     # -- report --------------------------------------------------------
     report = subparsers.add_parser(
         'report', help='paper-ready tables (text + LaTeX) and plots')
@@ -135,8 +326,18 @@ def _build_parser() -> argparse.ArgumentParser:
     report.add_argument('--output-dir', default=None, help='default: <sandbox>/report')
     report.add_argument('--formats', default='pdf,png',
                         help='figure formats, comma separated (default: pdf,png)')
+    report.add_argument('--runtime', choices=('total', 'end-to-end', 'search'), default='total',
+                        help='time the plots and the IPC time score rank by: total, end-to-end '
+                             '(total without plan validation) or search (default: total)')
     report.add_argument('--no-plots', action='store_true',
                         help='tables only; skip the figures (no matplotlib needed)')
+    report.add_argument('--no-database', action='store_true',
+                        help='parse every result file instead of using <sandbox>/results.sqlite')
+    report.add_argument('--jobs', type=int, default=None,
+                        help='result files read at once (default: 8)')
+    report.add_argument('--from-cube', action='store_true',
+                        help='tables only, from <sandbox>/analysis/cube.json as the last analyze '
+                             'or report left it, without reading any result')
     report.set_defaults(func=_report)
 
     return parser
@@ -259,6 +460,19 @@ def _generate(args) -> int:
 
 
 def _solve(args) -> int:
+    from .pairindex import PairNotFound, apply
+    try:
+        apply(args)
+    except (PairNotFound, OSError, ValueError) as error:
+        print(f'pypmtevalcli solve: error: {error}', file=sys.stderr)
+        return 2
+    missing = [flag for flag, value in (('--planner-cfg', args.planner_cfg),
+                                        ('--domain', args.domain), ('--problem', args.problem),
+                                        ('--results-dir', args.results_dir)) if not value]
+    if missing:
+        print(f'pypmtevalcli solve: error: the following arguments are required: '
+              f'{", ".join(missing)} (or --from-index)', file=sys.stderr)
+        return 2
     from .runner import solve
     if not args.task_id:
         args.task_id = ':'.join(part for part in (args.suite, args.domain_name, args.instance)
@@ -266,6 +480,31 @@ def _solve(args) -> int:
     return solve(args)
 
 
+def _solve_batch(args) -> int:
+    from .batch import solve_batch
+    return solve_batch(args)
+
+
+def _run_local(args) -> int:
+    from .scheduler import run_local
+    return run_local(args)
+
+
+def _worker(args) -> int:
+    from .workqueue import worker
+    return worker(args)
+
+
+def _merge(args) -> int:
+    from .merge import merge
+    return merge(args)
+
+
+def _ingest(args) -> int:
+    from .resultsdb import ingest
+    return ingest(args)
+
+
 def _analyze(args) -> int:
     from .analyzer import analyze
     if not args.sandbox_dir:
@@ -283,5 +522,10 @@ def _report(args) -> int:
     return report(args)
 
 
+def _profile_report(args) -> int:
+    from .profiler import profile_report
+    return profile_report(args)
+
+
 if __name__ == '__main__':
     sys.exit(main())
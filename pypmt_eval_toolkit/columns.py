@@ -0,0 +1,146 @@
+"""The rows of a sweep as columns, for ``analyze``'s and ``report``'s tables.
+
+The tables used to be nested scans over the row dicts: the rows of a planner,
+then of each of its tracks, and the per-domain tables the whole list again for
+every (domain, planner) cell -- domains x planners passes over the whole
+sweep, the slowest part of ``analyze --per-domain`` and ``report`` on a sweep
+of several planners on all three tracks.
+
+:class:`Columns` holds what the tables read, one array per field:
+
+* the categories (planner, engine, track, domain, status, task id) as small
+  integer codes into a list of the values seen, first seen first;
+* the numbers (times, memory, plan length and makespan) as doubles, ``NaN``
+  where a row has none;
+* whether each row counts as solved, as a byte.
+
+That is a few dozen bytes a row instead of the kilobyte or two of a dict.
+Every table is then one grouped reduction over them: :meth:`Columns.count`
+counts the rows of each combination of categories in one pass, and
+:meth:`Columns.values` collects a number's values per combination the same
+way. With NumPy installed (``pip install "pypmt-eval-toolkit[fast]"``) the
+columns are NumPy arrays and both run vectorized; without it they are
+:mod:`array` arrays and plain loops, with the same results.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as _np
+except ImportError:                                          # pragma: no cover
+    _np = None
+
+CATEGORIES = ('planner', 'engine', 'track', 'domain', 'status', 'task_id')
+NUMBERS = ('total_seconds', 'runtime_seconds', 'peak_memory_mb', 'plan_length', 'makespan',
+           'time_limit')
+
+Key = Tuple[Any, ...]
+
+
+class Columns:
+    """The category codes, numbers and solved flags of rows, read once."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]],
+                 solved: Callable[[Dict[str, Any]], bool]):
+        self.levels: Dict[str, List[Any]] = {name: [] for name in CATEGORIES}
+        lookup: Dict[str, Dict[Any, int]] = {name: {} for name in CATEGORIES}
+        codes = {name: array('i') for name in CATEGORIES}
+        numbers = {name: array('d') for name in NUMBERS}
+        flags = array('b')
+        for row in rows:
+            for name in CATEGORIES:
+                value = row.get(name)
+                code = lookup[name].get(value)
+                if code is None:
+                    code = lookup[name][value] = len(self.levels[name])
+                    self.levels[name].append(value)
+                codes[name].append(code)
+            for name in NUMBERS:
+                value = row.get(name)
+                numbers[name].append(math.nan if value is None else float(value))
+            flags.append(1 if solved(row) else 0)
+        self.size = len(flags)
+        if _np is not None:
+            self.codes = {name: _np.frombuffer(column, dtype=_np.int32)
+                          for name, column in codes.items()}
+            self.numbers = {name: _np.frombuffer(column, dtype=_np.float64)
+                            for name, column in numbers.items()}
+            self.solved = _np.frombuffer(flags, dtype=_np.int8).astype(bool)
+        else:
+            self.codes, self.numbers, self.solved = codes, numbers, flags
+
+    def __len__(self) -> int:
+        return self.size
+
+    def present(self, name: str) -> List[Any]:
+        """The values a category takes, sorted, without the empty ones."""
+        return sorted(value for value in self.levels[name] if value)
+
+    # -- reductions -------------------------------------------------------
+
+    def count(self, by: Sequence[str], where=None) -> Dict[Key, int]:
+        """How many rows (of `where`) have each combination of the categories `by`."""
+        if _np is not None:
+            keys, counts = _np.unique(self._keys(by, where), return_counts=True)
+            return {self._decode(by, int(key)): int(count) for key, count in zip(keys, counts)}
+        counts = Counter(self._tuples(by, where))
+        return {tuple(self.levels[name][code] for name, code in zip(by, codes)): count
+                for codes, count in counts.items()}
+
+    def values(self, number: str, by: Sequence[str], where=None) -> Dict[Key, List[float]]:
+        """The values of the column `number` that are there, per combination of `by`."""
+        column = self.numbers[number]
+        if _np is not None:
+            keep = ~_np.isnan(column)
+            if where is not None:
+                keep &= where
+            keys = self._keys(by, keep)
+            picked = column[keep]
+            order = _np.argsort(keys, kind='stable')
+            keys, picked = keys[order], picked[order]
+            cuts = _np.flatnonzero(_np.diff(keys)) + 1
+            return {self._decode(by, int(group[0])): values.tolist()
+                    for group, values in zip(_np.split(keys, cuts), _np.split(picked, cuts))
+                    if len(group)}
+        grouped: Dict[Key, List[float]] = defaultdict(list)
+        for index, codes in self._indexed(by, where):
+            value = column[index]
+            if value == value:                                        # not NaN
+                grouped[tuple(self.levels[name][code]
+                              for name, code in zip(by, codes))].append(value)
+        return dict(grouped)
+
+    # -- internals -------------------------------------------------------
+
+    def _keys(self, by: Sequence[str], where):
+        """One int64 per row (of `where`): the codes of `by` in mixed radix."""
+        keys = _np.zeros(self.size, dtype=_np.int64)
+        for name in by:
+            keys = keys * max(len(self.levels[name]), 1) + self.codes[name]
+        return keys if where is None else keys[where]
+
+    def _decode(self, by: Sequence[str], key: int) -> Key:
+        values = []
+        for name in reversed(by):
+            radix = max(len(self.levels[name]), 1)
+            key, code = divmod(key, radix)
+            values.append(self.levels[name][code])
+        return tuple(reversed(values))
+
+    def _tuples(self, by: Sequence[str], where):
+        columns = [self.codes[name] for name in by]
+        if where is None:
+            return zip(*columns)
+        return (codes for codes, keep in zip(zip(*columns), where) if keep)
+
+    def _indexed(self, by: Sequence[str], where):
+        columns = [self.codes[name] for name in by]
+        for index, codes in enumerate(zip(*columns)):
+            if where is None or where[index]:
+                yield index, codes
+
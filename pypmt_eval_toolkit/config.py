@@ -17,7 +17,7 @@ import json
 import os
 import re
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 DEFAULT_EXP_DETAILS: Dict[str, Any] = {
     'name': 'default',
@@ -29,6 +29,11 @@ DEFAULT_EXP_DETAILS: Dict[str, Any] = {
         # the job vanishing into a slurm cancellation with no result file.
         'slurm-time-headroom': '00:05:00',
         'slurm-memory-headroom': '1GB',
+        # Optional escalation, e.g. [{"timelimit": "00:01:00", "memorylimit": "2GB"},
+        # ..., {"timelimit": "00:30:00", "memorylimit": "8GB"}]: every pair runs
+        # at the first rung, and only its TIMEOUT/MEMOUT at the next. The last
+        # rung is the experiment's limits.
+        'limit-ladder': [],
         'slurm': {
             'cpus-per-task': 1,
             'partition': None,
@@ -36,6 +41,9 @@ DEFAULT_EXP_DETAILS: Dict[str, Any] = {
             'qos': None,
             'max-parallel-jobs': 50,
             'max-array-size': 1000,
+            # Only for `generate --packed-nodes`: what one whole node offers.
+            'cores-per-node': None,
+            'memory-per-node': None,
             'extra-directives': [],
         },
     },
@@ -76,6 +84,8 @@ class PlannerConfig:
     modules: List[str] = field(default_factory=list)
     engine_class: Optional[Union[str, Dict[str, str]]] = None
     path: Optional[str] = None
+    precompile: bool = False                # "precompile": true, as solve --precompile
+    profile: bool = False                   # "profile": true, as solve --profile
 
     @classmethod
     def from_file(cls, path: str) -> 'PlannerConfig':
@@ -93,6 +103,8 @@ class PlannerConfig:
             modules=_as_list(raw.get('up-planner-module') or raw.get('modules')),
             engine_class=raw.get('up-planner-class') or raw.get('engine-class'),
             path=os.path.abspath(path),
+            precompile=bool(raw.get('precompile')),
+            profile=bool(raw.get('profile')),
         )
 
     def runs_track(self, track: str) -> bool:
@@ -111,21 +123,43 @@ class Experiment:
     # -- resource limits, normalised ------------------------------------
     @property
     def time_limit_seconds(self) -> int:
-        return parse_time(self._cfg('timelimit', '00:30:00'))
+        return self.limit_ladder[-1][0]
 
     @property
     def memory_limit_mb(self) -> int:
-        return parse_memory(self._cfg('memorylimit', '8GB'))
+        return self.limit_ladder[-1][1]
+
+    @property
+    def limit_ladder(self) -> List[Tuple[int, int]]:
+        """``(seconds, MB)`` of each rung of ``limit-ladder``, the last one authoritative.
+
+        Without a ladder, the single rung of ``timelimit``/``memorylimit``. A rung
+        that leaves one of the two out keeps the flat setting for it.
+        """
+        flat = (parse_time(self._cfg('timelimit', '00:30:00')),
+                parse_memory(self._cfg('memorylimit', '8GB')))
+        rungs = self._cfg('limit-ladder', None) or []
+        return [(parse_time(rung['timelimit']) if 'timelimit' in rung else flat[0],
+                 parse_memory(rung['memorylimit']) if 'memorylimit' in rung else flat[1])
+                for rung in rungs] or [flat]
 
     @property
     def slurm_time(self) -> str:
-        head = parse_time(self._cfg('slurm-time-headroom', '00:05:00'))
-        return format_time(self.time_limit_seconds + head)
+        return self.slurm_time_for(1)
 
     @property
     def slurm_memory(self) -> str:
+        return self.slurm_memory_for(1)
+
+    def slurm_time_for(self, rounds: int, time_limit: Optional[int] = None) -> str:
+        """``--time`` of a job that runs `rounds` tasks one after another."""
+        head = parse_time(self._cfg('slurm-time-headroom', '00:05:00'))
+        return format_time(max(1, rounds) * (time_limit or self.time_limit_seconds) + head)
+
+    def slurm_memory_for(self, parallel: int, memory_limit: Optional[int] = None) -> str:
+        """``--mem`` of a job that runs `parallel` tasks at once."""
         head = parse_memory(self._cfg('slurm-memory-headroom', '1GB'))
-        return f'{self.memory_limit_mb + head}M'
+        return f'{max(1, parallel) * (memory_limit or self.memory_limit_mb) + head}M'
 
     @property
     def slurm(self) -> Dict[str, Any]:
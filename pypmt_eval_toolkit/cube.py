@@ -0,0 +1,288 @@
+"""What ``analyze`` and ``report`` aggregate, kept in the sandbox: ``analysis/cube.json``.
+
+Both used to rebuild every number from the rows on every run, ``report``
+including the per-task index its IPC scores need. ``analyze`` and ``report``
+now keep one :class:`Cube` per sandbox and bring it up to date with the rows
+they load, touching only the pairs whose outcome changed since the last run:
+
+``pairs``
+    each (planner, task)'s outcome, the dozen fields the tables read (status,
+    whether the plan validated, the times, memory, plan length and makespan);
+``counts``
+    pairs and solved pairs per (planner, track, domain, status);
+``histograms``
+    the total time and peak memory of solved pairs per (planner, track),
+    binned on a log scale, ``bins-per-decade`` bins to a factor of ten, from
+    ``MIN_TIME`` seconds and 1 MB up;
+``best``
+    each task's best time (for each ``report --runtime``) and best plan cost
+    over the planners that solved it;
+``points``
+    the IPC time points (again for each ``--runtime``) and quality points each
+    planner earned on each task;
+``scores``
+    their sums: the IPC time score and quality score of each planner.
+
+A changed pair moves its counts and histogram bins and re-scores its task for
+every planner; nothing else is recomputed. A score is summed exactly
+(:func:`math.fsum`) from the points kept, so a cube updated a thousand times
+has the scores a fresh one would. ``report --from-cube`` renders its
+tables from the cube alone, without reading a result; scripts can read the
+file the same way. A cube written by another version of the toolkit is
+started over.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from math import floor, fsum, log10
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import __version__
+from .analyzer import is_solved
+from .report import MIN_TIME, RUNTIMES, _cost, _use_runtime
+
+CUBE = os.path.join('analysis', 'cube.json')
+FORMAT = 2
+BINS_PER_DECADE = 10
+MIN_MEMORY = 1.0
+
+FIELDS = ('planner', 'task_id', 'engine', 'track', 'domain', 'status', 'validated',
+          'total_seconds', 'end_to_end_seconds', 'search_seconds', 'solve_seconds',
+          'peak_memory_mb', 'plan_length', 'makespan', 'time_limit')
+
+Pair = Tuple[Optional[str], Optional[str]]
+State = Tuple[Any, ...]
+
+
+def cube_path(sandbox: str) -> str:
+    return os.path.join(sandbox, CUBE)
+
+
+class Cube:
+    """The aggregates of one sandbox's rows, kept up to date pair by pair."""
+
+    def __init__(self):
+        self.pairs: Dict[Pair, State] = {}
+        self.tasks: Dict[Optional[str], Dict[Optional[str], State]] = defaultdict(dict)
+        self.counts: Dict[Tuple[Any, ...], List[int]] = {}
+        self.histograms: Dict[str, Dict[Tuple[Any, Any, int], int]] = {'runtime': {},
+                                                                       'memory': {}}
+        self.best_time: Dict[str, Dict[Optional[str], float]] = {basis: {} for basis in RUNTIMES}
+        self.best_cost: Dict[Optional[str], float] = {}
+        # Points per planner and task: {basis: {planner: {task id: points}}}, {planner: {...}}.
+        self.time_points: Dict[str, Dict[Optional[str], Dict[Optional[str], float]]] = {
+            basis: defaultdict(dict) for basis in RUNTIMES}
+        self.quality_points: Dict[Optional[str], Dict[Optional[str], float]] = defaultdict(dict)
+
+    # -- loading and saving ---------------------------------------------
+
+    @classmethod
+    def load(cls, path: str) -> 'Cube':
+        """The cube at `path`; an empty one when there is none or another version wrote it."""
+        cube = cls()
+        try:
+            with open(path, 'r') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return cube
+        if payload.get('format') != FORMAT or payload.get('toolkit') != __version__:
+            return cube
+        try:
+            cube._restore(payload)
+        except (KeyError, TypeError, ValueError):
+            return cls()
+        return cube
+
+    def save(self, path: str) -> None:
+        """Write the cube to `path` atomically."""
+        payload = {
+            'format': FORMAT,
+            'toolkit': __version__,
+            'pairs': {'columns': list(FIELDS), 'rows': [list(state) for _pair, state
+                                                          in sorted(self.pairs.items(), key=str)]},
+            'counts': {'columns': ['planner', 'track', 'domain', 'status', 'pairs', 'solved'],
+                       'rows': [list(key) + counts for key, counts
+                                in sorted(self.counts.items(), key=str)]},
+            'histograms': {
+                'bins-per-decade': BINS_PER_DECADE,
+                'floors': {'runtime': MIN_TIME, 'memory': MIN_MEMORY},
+                'columns': ['planner', 'track', 'bin', 'pairs'],
+                **{name: [list(key) + [count] for key, count in sorted(bins.items(), key=str)]
+                   for name, bins in self.histograms.items()},
+            },
+            'best': {'time': self.best_time, 'cost': self.best_cost},
+            'points': {'time': self.time_points, 'quality': self.quality_points},
+            'scores': {'time': {basis: {planner: fsum(points.values())
+                                        for planner, points in planners.items()}
+                                for basis, planners in self.time_points.items()},
+                       'quality': {planner: fsum(points.values())
+                                   for planner, points in self.quality_points.items()}},
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp.{os.getpid()}'
+        with open(tmp, 'w') as handle:
+            json.dump(payload, handle, separators=(',', ':'), default=str)
+        os.replace(tmp, path)
+
+    # -- updating -------------------------------------------------------
+
+    def update(self, rows: Iterable[Dict[str, Any]], complete: bool = False) -> int:
+        """Fold `rows` in; the number of pairs whose outcome changed.
+
+        With `complete`, `rows` are all of the sandbox's pairs, and the pairs
+        of the cube that are not among them are taken out.
+        """
+        incoming: Dict[Pair, State] = {}
+        for row in rows:
+            incoming[(row.get('planner'), row.get('task_id'))] = tuple(row.get(f) for f in FIELDS)
+        changed = {pair: state for pair, state in incoming.items()
+                   if self.pairs.get(pair) != state}
+        gone = [pair for pair in self.pairs if pair not in incoming] if complete else []
+        affected = {task_id for _planner, task_id in list(changed) + gone}
+        for pair in gone:
+            self._count(self.pairs.pop(pair), -1)
+            self.tasks[pair[1]].pop(pair[0], None)
+        for pair, state in changed.items():
+            if pair in self.pairs:
+                self._count(self.pairs[pair], -1)
+            self.pairs[pair] = state
+            self.tasks[pair[1]][pair[0]] = state
+            self._count(state, +1)
+        for task_id in affected:
+            if not self.tasks.get(task_id):
+                self.tasks.pop(task_id, None)
+            self._score(task_id)
+        return len(changed) + len(gone)
+
+    # -- reading ----------------------------------------------------------
+
+    def rows(self, basis: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every pair as a row with the analyzer's keys, for the tables, one at a time.
+
+        With `basis` (a ``report --runtime``), each row's ``runtime_seconds`` is its time.
+        """
+        for state in self.pairs.values():
+            row = dict(zip(FIELDS, state))
+            if basis:
+                _use_runtime((row,), basis)
+            yield row
+
+    def fallbacks(self, basis: str) -> int:
+        """How many pairs have no `basis` time and stand in its fallback."""
+        column, fallback = (FIELDS.index(name) for name in RUNTIMES[basis])
+        return sum(1 for state in self.pairs.values()
+                   if state[column] is None and state[fallback] is not None)
+
+    def scores(self, planners: Iterable[str], basis: str) -> Dict[str, Dict[str, float]]:
+        """Each planner's IPC time score (on the `basis` time) and quality score."""
+        return {planner: {'time': fsum(self.time_points[basis].get(planner, {}).values()),
+                          'quality': fsum(self.quality_points.get(planner, {}).values())}
+                for planner in planners}
+
+    # -- internals -------------------------------------------------------
+
+    def _restore(self, payload: Dict[str, Any]) -> None:
+        if list(payload['pairs']['columns']) != list(FIELDS):
+            raise ValueError('the pairs hold other fields')
+        for values in payload['pairs']['rows']:
+            state = tuple(values)
+            self.pairs[(state[0], state[1])] = state
+            self.tasks[state[1]][state[0]] = state
+        for values in payload['counts']['rows']:
+            self.counts[tuple(values[:4])] = [int(values[4]), int(values[5])]
+        for name, bins in self.histograms.items():
+            for planner, track, at, count in payload['histograms'][name]:
+                bins[(planner, track, int(at))] = int(count)
+        for basis in RUNTIMES:
+            self.best_time[basis].update(payload['best']['time'][basis])
+            for planner, points in payload['points']['time'][basis].items():
+                self.time_points[basis][planner].update(points)
+        self.best_cost.update(payload['best']['cost'])
+        for planner, points in payload['points']['quality'].items():
+            self.quality_points[planner].update(points)
+
+    def _count(self, state: State, sign: int) -> None:
+        row = dict(zip(FIELDS, state))
+        solved = is_solved(row)
+        key = (row['planner'], row['track'], row['domain'], row['status'])
+        counts = self.counts.setdefault(key, [0, 0])
+        counts[0] += sign
+        counts[1] += sign * solved
+        if counts == [0, 0]:
+            del self.counts[key]
+        if not solved:
+            return
+        for name, value, least in (('runtime', row['total_seconds'], MIN_TIME),
+                                   ('memory', row['peak_memory_mb'], MIN_MEMORY)):
+            if value is None:
+                continue
+            bins = self.histograms[name]
+            at = (row['planner'], row['track'], _bin(value, least))
+            bins[at] = bins.get(at, 0) + sign
+            if not bins[at]:
+                del bins[at]
+
+    def _score(self, task_id: Optional[str]) -> None:
+        """Score one task again, for every planner, from its pairs as they are now.
+
+        Quality follows the satisficing-track rule (``best_cost / cost``, 0 when
+        unsolved); time follows the agile-track rule
+        (``1 / (1 + log10(t / t_best))``, 0 when unsolved). Both are summed
+        over instances, so the maximum a planner can reach is the instance count.
+        """
+        if not task_id:
+            return
+        solved = [dict(zip(FIELDS, state)) for state in self.tasks.get(task_id, {}).values()]
+        solved = [row for row in solved if is_solved(row)]
+        for basis, (column, fallback) in RUNTIMES.items():
+            for points in self.time_points[basis].values():
+                points.pop(task_id, None)
+            times = {}
+            for row in solved:
+                value = row[column] if row[column] is not None else row[fallback]
+                if value is not None:
+                    times[row['planner']] = max(float(value), MIN_TIME)
+            self.best_time[basis].pop(task_id, None)
+            if not times:
+                continue
+            best = min(times.values())
+            for planner, value in times.items():
+                self.time_points[basis][planner][task_id] = 1.0 / (1.0 + log10(value / best))
+            self.best_time[basis][task_id] = best
+        for points in self.quality_points.values():
+            points.pop(task_id, None)
+        costs = {row['planner']: _cost(row) for row in solved if _cost(row) not in (None, 0)}
+        self.best_cost.pop(task_id, None)
+        if costs:
+            best = min(costs.values())
+            for planner, value in costs.items():
+                self.quality_points[planner][task_id] = best / value
+            self.best_cost[task_id] = best
+
+
+def _bin(value: float, least: float) -> int:
+    """The log-scale bin of `value`: ``floor(bins-per-decade * log10(value))``."""
+    return floor(BINS_PER_DECADE * log10(max(float(value), least)))
+
+
+def refresh(sandbox: str, results_dir: Optional[str], rows: Iterable[Dict[str, Any]]) -> Cube:
+    """The sandbox's cube, brought up to date with `rows` -- all of its pairs, read once.
+
+    Kept (loaded and saved) only for the sandbox's own ``results/``; for any
+    other results directory the cube is built for this run and not written.
+    """
+    own = os.path.join(sandbox, 'results')
+    if os.path.abspath(results_dir or own) != os.path.abspath(own):
+        cube = Cube()
+        cube.update(rows, complete=True)
+        return cube
+    cube = Cube.load(cube_path(sandbox))
+    if cube.update(rows, complete=True) or not os.path.exists(cube_path(sandbox)):
+        try:
+            cube.save(cube_path(sandbox))
+        except OSError as error:
+            print(f'note: could not write {cube_path(sandbox)}: {error}')
+    return cube
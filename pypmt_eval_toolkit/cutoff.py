@@ -0,0 +1,163 @@
+"""Give up on a domain early: ``run-local --cutoff K``.
+
+The instances of a benchmark domain grow with their number, and a planner that
+ran out of time on instances 5, 6 and 7 almost never solves 8 through 20 --
+yet each of them still costs a full time limit to find that out.
+
+With ``--cutoff K``, ``run-local`` runs each planner's instances of a domain
+one after another, smallest first (instance names in
+:func:`~pypmt_eval_toolkit.tasks.natural_key` order); different domains and
+planners still run side by side, as many as ``--jobs`` and the memory allow.
+Once K results in a row are ``TIMEOUT`` or ``MEMOUT``, the rest of that
+domain is not run. Each remaining pair gets a result with the status
+``SKIPPED-PREDICTED`` and a ``predicted`` section naming the K results it was
+predicted from; it has no timings and no metrics, since nothing was measured.
+Any other result starts the count again; a pair that died without one leaves
+the count where it was.
+
+``analyze`` and ``report`` count a predicted pair as attempted and unsolved,
+and say how many of the unsolved pairs were predicted rather than measured.
+To measure them after all, delete their result files, ``generate
+--skip-existing`` and run again without ``--cutoff``.
+
+The journal records a predicted pair as done, so a resumed ``run-local`` does
+not run it; the count a domain had reached is picked up again from the results
+of its pairs that already ran.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .runner import MEMOUT, SKIPPED_PREDICTED, TIMEOUT, previous_result, write_predicted
+from .scheduler import CommandTask, Scheduler
+from .shards import ShardResults
+from .tasks import natural_key
+
+# A planner's instances of one domain: (results directory, suite, domain).
+Chain = Tuple[str, str, str]
+
+
+def chain_up(tasks: Sequence[CommandTask]) -> List[CommandTask]:
+    """Parse every task's solve command and put each domain's pairs in size order.
+
+    A domain's pairs keep the positions its pairs had in `tasks`, so the order
+    between domains is the command file's. A command that cannot be parsed is
+    left where it was, outside any chain.
+    """
+    from .cli import _build_parser
+    from .pairindex import PairNotFound, apply
+
+    parser = _build_parser()
+    members: Dict[Chain, List[CommandTask]] = {}
+    for task in tasks:
+        try:
+            pair = parser.parse_args(_arguments(task.command))
+            apply(pair)
+        except (SystemExit, PairNotFound, OSError, ValueError):
+            continue
+        if not (pair.task_id and pair.results_dir):
+            continue
+        task.pair = pair
+        task.chain = (os.path.abspath(pair.results_dir), pair.suite or '', pair.domain_name or '')
+        members.setdefault(task.chain, []).append(task)
+    ordered = list(tasks)
+    for chain, chained in members.items():
+        slots = [index for index, task in enumerate(ordered) if task.chain == chain]
+        for index, task in zip(slots, sorted(chained, key=_size)):
+            ordered[index] = task
+    return ordered
+
+
+class CutoffScheduler(Scheduler):
+    """``run-local``'s scheduler, one pair of a chain at a time, cut off after K misses."""
+
+    def __init__(self, tasks: Sequence[CommandTask], finished: set, cutoff: int, *args, **kwargs):
+        ordered = chain_up(tasks)
+        super().__init__([task for task in ordered if task.key not in finished], *args, **kwargs)
+        self.cutoff = cutoff
+        self.busy: set = set()
+        self.misses: Dict[Chain, List[str]] = {}
+        self.predicted = 0
+        # A resumed run's counts, from the shards read once rather than once a pair.
+        sharded: Dict[str, ShardResults] = {}
+        for task in ordered:
+            if task.chain is not None and task.key in finished:
+                shard_dir = getattr(task.pair, 'shard_dir', None)
+                if shard_dir and shard_dir not in sharded:
+                    sharded[shard_dir] = ShardResults.load(shard_dir)
+                self._count(task, sharded.get(shard_dir))
+        for chain in list(self.misses):
+            if len(self.misses[chain]) >= self.cutoff:
+                self._predict(chain)
+
+    def run(self) -> int:
+        code = super().run()
+        if self.predicted:
+            print(f'[{self.name}] {self.predicted} pair(s) recorded as {SKIPPED_PREDICTED} '
+                  f'after {self.cutoff} TIMEOUT/MEMOUT in a row; they were not run')
+        return code
+
+    def _admit(self) -> None:
+        while len(self.running) < self.jobs:
+            task = next((task for task in self.pending
+                         if task.chain is None or task.chain not in self.busy), None)
+            if task is None:
+                return
+            need = self._reservation(task)
+            if self.running and not self._fits(need):
+                return
+            self.pending.remove(task)
+            if task.chain is not None:
+                self.busy.add(task.chain)
+            self._start(task, need)
+
+    def _released(self, task: CommandTask, code: int, seconds: float, finished: bool) -> None:
+        if task.chain is None:
+            return
+        self.busy.discard(task.chain)
+        if finished and self._count(task) >= self.cutoff:
+            self._predict(task.chain)
+
+    def _count(self, task: CommandTask, sharded: Optional[ShardResults] = None) -> int:
+        """Update the run of misses of `task`'s chain with its result; the run's length."""
+        misses = self.misses.setdefault(task.chain, [])
+        status = _status(task.pair, sharded)
+        if status in (TIMEOUT, MEMOUT):
+            misses.append(task.pair.task_id)
+        elif status not in (None, SKIPPED_PREDICTED):
+            # Only an answer starts the count again: a crash without a result
+            # says nothing, and a pair predicted by an earlier run is still cut off.
+            misses.clear()
+        return len(misses)
+
+    def _predict(self, chain: Chain) -> None:
+        evidence = self.misses[chain][-self.cutoff:]
+        for task in [task for task in self.pending if task.chain == chain]:
+            if not write_predicted(task.pair, evidence, self.cutoff):
+                continue                       # left to run, and to report what is wrong
+            self.pending.remove(task)
+            self.done += 1
+            self.predicted += 1
+            self._journal({'event': 'done', 'key': task.key, 'line': task.line,
+                           'predicted': True})
+
+
+def _arguments(command: str) -> List[str]:
+    from .generator import solve_arguments
+    arguments = solve_arguments(command)
+    if arguments is None:
+        raise ValueError(f'not a solve command: {command}')
+    return arguments
+
+
+def _size(task: CommandTask):
+    return natural_key(task.pair.instance or task.pair.task_id)
+
+
+def _status(pair, sharded: Optional[ShardResults] = None) -> Optional[str]:
+    """The status of the pair's last result, in its file or its shards (``--result-sink
+    shards``); ``None`` when it died without one, which says nothing about the size."""
+    previous = previous_result(pair, sharded=sharded)
+    return previous.get('status') if previous else None
@@ -0,0 +1,218 @@
+"""What a result was computed from, and a store to reuse it by: ``--result-store``.
+
+``generate --skip-existing`` knows whether a result file exists, not whether it
+still answers the question: a planner parameter, an engine upgrade, an edited
+PDDL file or a new time limit all leave the old file in place. A fingerprint
+says what a result depends on --
+
+* the engine name and its ``planner-params``, as written in the configuration;
+* the installed versions of the distributions that provide the engine (and of
+  ``unified-planning`` itself);
+* the contents of the domain and problem files;
+* the time and memory limits, and whether plans are validated;
+* how ``solve`` ran the pair: under the watchdog (``--supervise``), with the
+  parse cache (``--cache-dir``), precompiled, profiled or tracing allocations;
+* the toolkit's own version --
+
+and ``solve`` records it, with those parts, as the result's ``fingerprint``.
+The hash leaves out everything that only says *where* a pair ran (paths, the
+task id, the sandbox). Two sandboxes that run the same pair therefore compute
+the same hash.
+
+``solve --result-store DIR`` publishes every finished result to
+``DIR/<fp[:2]>/<fp>.json``; ``generate --result-store DIR`` imports the ones
+that match into a new sandbox instead of running them again, and, with
+``--skip-existing``, re-runs the sandbox's own results whose fingerprint no
+longer matches, naming what changed. ``ERROR`` and ``KILLED`` results are
+never published: they say more about the node than about the planner, and
+neither is a profiled run or one that traced its allocations, whose timings
+carry the cost of the instrument.
+
+Only the standard library is used: ``generate`` fingerprints every pair
+without importing ``unified_planning`` or any engine.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from importlib import metadata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from . import __version__
+from .engines import KNOWN_ENGINE_MODULES, EngineNotFound, _split_class_spec
+
+# Statuses worth reusing: they are a property of the pair, not of the node.
+REUSABLE = ('SOLVED', 'UNSOLVABLE', 'EXHAUSTED', 'TIMEOUT', 'MEMOUT', 'UNSUPPORTED')
+# Run modes that slow the solve down to measure it: never published.
+INSTRUMENTED = ('profile', 'trace-allocations')
+
+
+def compute(engine: str, params: Dict[str, Any], modules: Sequence[str],
+            engine_class, domain_file: str, problem_file: str,
+            time_limit: Optional[int], memory_limit: Optional[int],
+            validate: bool = True, mode: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """``{'hash': ..., 'parts': {...}}`` of one (planner, task) pair.
+
+    `mode` is :func:`run_mode` of the run. Raises ``OSError`` when a PDDL
+    file cannot be read.
+    """
+    parts = {
+        'engine': engine,
+        'planner-params': params,
+        'engine-versions': engine_versions(engine, tuple(modules or ()), _class_module(engine_class)),
+        'domain-sha256': _file_digest(os.path.abspath(domain_file)),
+        'problem-sha256': _file_digest(os.path.abspath(problem_file)),
+        'limits': {'time-seconds': time_limit, 'memory-mb': memory_limit},
+        'validate': bool(validate),
+        'mode': mode or run_mode(),
+        'toolkit': __version__,
+    }
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return {'hash': hashlib.sha256(canonical.encode()).hexdigest(), 'parts': parts}
+
+
+def run_mode(supervise: bool = False, cache_dir: Optional[str] = None, precompile: bool = False,
+             profile: bool = False, trace_allocations: bool = False) -> Dict[str, bool]:
+    """The ``mode`` part: how ``solve`` runs the pair, which its timings depend on."""
+    return {'supervise': bool(supervise), 'parse-cache': bool(cache_dir),
+            'precompile': bool(precompile), 'profile': bool(profile),
+            'trace-allocations': bool(trace_allocations)}
+
+
+def changes(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> List[str]:
+    """The parts that differ between two fingerprints, for the stale report."""
+    if not old or not isinstance(old.get('parts'), dict):
+        return ['no fingerprint']
+    before, after = old['parts'], new['parts']
+    return sorted(key for key in set(before) | set(after) if before.get(key) != after.get(key))
+
+
+@functools.lru_cache(maxsize=None)
+def engine_versions(engine: str, modules: tuple = (), class_module: Optional[str] = None
+                    ) -> Dict[str, Optional[str]]:
+    """``{distribution: version}`` of what provides `engine`, plus unified-planning.
+
+    Judged from the module names the configuration and
+    :data:`~pypmt_eval_toolkit.engines.KNOWN_ENGINE_MODULES` give, without
+    importing any of them. A module no installed distribution provides (an
+    engine class on ``PYTHONPATH``) is recorded under its own name, unversioned.
+    """
+    names = list(modules) + list(KNOWN_ENGINE_MODULES.get(engine.lower(), ()))
+    if class_module:
+        names.append(class_module)
+    providers = _providers()
+    versions: Dict[str, Optional[str]] = {'unified-planning': _version('unified-planning')}
+    for name in names:
+        top = name.split('.')[0]
+        for distribution in providers.get(top) or [None]:
+            if distribution is None:
+                versions.setdefault(top, None)
+            else:
+                versions[distribution] = _version(distribution)
+    return dict(sorted(versions.items()))
+
+
+@functools.lru_cache(maxsize=1)
+def _providers() -> Dict[str, List[str]]:
+    try:
+        return metadata.packages_distributions()
+    except Exception:                                        # noqa: BLE001 -- broken metadata
+        return {}
+
+
+def _version(distribution: str) -> Optional[str]:
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _class_module(engine_class) -> Optional[str]:
+    if not engine_class:
+        return None
+    try:
+        return _split_class_spec(engine_class)[0]
+    except EngineNotFound:
+        return None                                          # solve reports the bad spec
+
+
+@functools.lru_cache(maxsize=4096)
+def _file_digest(path: str) -> str:
+    # Hashed once per process: `generate` asks for every problem once per planner.
+    from .cache import file_digest
+    return file_digest(path)
+
+
+# ----------------------------------------------------------------------
+# The result store
+# ----------------------------------------------------------------------
+
+class ResultStore:
+    """Finished results by fingerprint: ``<root>/<fp[:2]>/<fp>.json``."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def path(self, fingerprint: str) -> str:
+        return os.path.join(self.root, fingerprint[:2], f'{fingerprint}.json')
+
+    def publish(self, result: Dict[str, Any]) -> bool:
+        """Copy a result in, if it has a fingerprint and a reusable status, and was not
+        instrumented."""
+        fingerprint = (result.get('fingerprint') or {}).get('hash')
+        if not fingerprint or result.get('status') not in REUSABLE:
+            return False
+        mode = ((result.get('fingerprint') or {}).get('parts') or {}).get('mode') or {}
+        if any(mode.get(name) for name in INSTRUMENTED):
+            return False
+        path = self.path(fingerprint)
+        tmp = f'{path}.tmp.{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'w') as handle:
+                json.dump(result, handle, indent=2, default=str)
+            os.replace(tmp, path)
+        except OSError:
+            return False
+        return True
+
+    def fetch(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(fingerprint), 'r') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if (payload.get('fingerprint') or {}).get('hash') != fingerprint:
+            return None
+        return payload
+
+    def import_into(self, payload: Dict[str, Any], destination: str,
+                    task: Dict[str, Any], planner: Dict[str, Any]) -> None:
+        """Write a stored result as this sandbox's, under its task and planner.
+
+        The measurements are kept as they are; what names the pair (task id,
+        paths, planner tag) is this sandbox's, and ``run.imported-from`` says
+        where the result came from.
+        """
+        payload = dict(payload)
+        payload['task'] = dict(payload.get('task') or {}, **task)
+        payload['planner'] = dict(payload.get('planner') or {}, **planner)
+        payload['run'] = dict(payload.get('run') or {},
+                              **{'imported-from': self.path(payload['fingerprint']['hash'])})
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp = f'{destination}.tmp.{os.getpid()}'
+        with open(tmp, 'w') as handle:
+            json.dump(payload, handle, indent=2, default=str)
+        os.replace(tmp, destination)
+
+
+def stale_lines(stale: Iterable[tuple], limit: int = 10) -> List[str]:
+    """``(tag, task id, changed parts)`` rows as the lines ``generate`` prints."""
+    stale = list(stale)
+    lines = [f'  {tag:<24} {task_id}: {", ".join(changed)}' for tag, task_id, changed in stale[:limit]]
+    if len(stale) > limit:
+        lines.append(f'  ... and {len(stale) - limit} more')
+    return lines
@@ -9,19 +9,25 @@ thousands of pairs, and submitting that many jobs individually is slow enough
 to matter and hostile to schedulers with a submission-rate limit. One array per
 planner keeps ``squeue`` readable and lets you cancel a planner's whole sweep
 with a single ``scancel``. ``--per-task-scripts`` still emits the one-file-per-
-task form when a site needs it.
+task form when a site needs it, and ``--packed-nodes`` a few whole-node jobs
+for sites that charge by the node.
 """
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
 import os
+import re
 import shlex
 import stat
 import sys
 from typing import Dict, List, Optional, Sequence, Tuple
 
-from .config import Experiment, PlannerConfig
+from . import fingerprint
+from .config import Experiment, PlannerConfig, parse_memory
+from .shards import ShardResults, latest
 from .tasks import Task, discover, filter_tasks, limit_per_domain, summarize
 
 CLI = 'pypmtevalcli'
@@ -39,6 +45,7 @@ class Sandbox:
         self.results_dir = os.path.join(self.root, 'results')
         self.errors_dir = os.path.join(self.root, 'errors')
         self.runs_dir = os.path.join(self.root, 'runs')
+        self.shards_dir = os.path.join(self.root, 'shards')
 
     def create(self) -> None:
         for path in (self.root, self.cmds_dir, self.slurm_dir, self.slurm_logs_dir,
@@ -70,42 +77,165 @@ def generate(args) -> int:
     # partial sweep does not shrink the denominator.
     expected = {planner.tag: [task.task_id for task in tasks if planner.runs_track(task.track)]
                 for planner in experiment.planners}
+    # A shard expects only its own pairs; `merge` adds the shards' up again.
+    shard = None
+    if getattr(args, 'shard', None):
+        try:
+            index, count = parse_shard(args.shard)
+        except ValueError as error:
+            print(f'--shard {args.shard}: {error}', file=sys.stderr)
+            return 1
+        by = getattr(args, 'shard_by', None) or 'hash'
+        mine = shard_pairs(expected, tasks, count, by, experiment,
+                           getattr(args, 'prior', None) or [])[index]
+        expected = {tag: [task_id for task_id in task_ids if (tag, task_id) in mine]
+                    for tag, task_ids in expected.items()}
+        shard = {'index': index, 'count': count, 'by': by}
+    payload = {'summary': summarize(tasks), 'expected': expected,
+               'tasks': [t.to_dict() for t in tasks]}
+    if shard:
+        payload['shard'] = shard
     with open(sandbox.tasks_file, 'w') as handle:
-        json.dump({'summary': summarize(tasks), 'expected': expected,
-                   'tasks': [t.to_dict() for t in tasks]}, handle, indent=2)
+        json.dump(payload, handle, indent=2)
+    wanted = {(tag, task_id) for tag, task_ids in expected.items() for task_id in task_ids}
 
     prefix = _launcher_prefix(args)
     time_limit = experiment.time_limit_seconds
     memory_limit = experiment.memory_limit_mb
     validate = _validate_plans(experiment, args)
+    cache_dir = getattr(args, 'cache_dir', None)
+    if cache_dir:
+        cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+    store = fingerprint.ResultStore(args.result_store) if getattr(args, 'result_store', None) \
+        else None
+    shard_dir = sandbox.shards_dir if getattr(args, 'result_sink', None) == 'shards' else None
 
+    # With a limit ladder, each pair runs at the rung its last result calls
+    # for, and the pairs of each (planner, rung) become a group of their own:
+    # its own command file and arrays, sized for that rung's limits.
+    ladder = experiment.limit_ladder
+    laddered = len(ladder) > 1
+    groups: Dict[str, Tuple[str, int, int]] = {}
+    rungs_due: Dict[int, int] = {}
     per_planner: Dict[str, List[str]] = {}
+    planned: Dict[str, List[Tuple[Task, str]]] = {}
     skipped_done = 0
+    imported = 0
+    stale: List[Tuple[str, str, List[str]]] = []
+    # What a pair already has, in its result file or in a shard (--result-sink shards).
+    sharded = ShardResults.load(sandbox.shards_dir) if laddered or args.skip_existing else None
     for planner in experiment.planners:
-        commands: List[str] = []
+        per_planner[planner.tag] = []
+        groups[planner.tag] = (planner.tag, ladder[0][0], ladder[0][1])
         os.makedirs(sandbox.planner_results_dir(planner.tag), exist_ok=True)
         for task in tasks:
-            if not planner.runs_track(task.track):
-                continue
-            if args.skip_existing and os.path.exists(sandbox.result_file(planner.tag, task.slug)):
-                skipped_done += 1
-                continue
-            commands.append(prefix + solve_command(planner, task, sandbox, time_limit,
-                                                   memory_limit, validate))
-        per_planner[planner.tag] = commands
+            if (planner.tag, task.task_id) not in wanted:
+                continue                           # another track, or another shard's pair
+            result_file = sandbox.result_file(planner.tag, task.slug)
+            prior = None
+            if sharded is not None:
+                prior = latest(_read_result(result_file), sharded.result(planner.tag, task.task_id))
+            rung = 0
+            if laddered:
+                rung = next_rung(prior, len(ladder))
+                if rung is None:
+                    skipped_done += 1              # settled: an answer, or the last rung's limit
+                    continue
+            pair_time, pair_memory = ladder[rung]
+            current = None
+            if store is not None or args.skip_existing:
+                current = _fingerprint(planner, task, pair_time, pair_memory, validate,
+                                       getattr(args, 'supervise', False), cache_dir)
+            # A result from a lower rung is what sent the pair up, not a stale one.
+            if args.skip_existing and not rung and prior is not None:
+                # A result from before fingerprints cannot be judged; it is kept,
+                # as it always was.
+                recorded = prior.get('fingerprint') if isinstance(prior.get('fingerprint'),
+                                                                  dict) else None
+                changed = fingerprint.changes(recorded, current) if recorded and current else []
+                if not changed:
+                    skipped_done += 1
+                    continue
+                stale.append((planner.tag, task.task_id, changed))
+            if store is not None and current is not None:
+                payload = store.fetch(current['hash'])
+                if payload is not None:
+                    store.import_into(payload, result_file, _task_fields(task),
+                                      {'tag': planner.tag, 'config-file': planner.path})
+                    imported += 1
+                    continue
+            group = f'{planner.tag}-rung{rung}' if rung else planner.tag
+            groups[group] = (planner.tag, pair_time, pair_memory)
+            command = prefix + solve_command(planner, task, sandbox, pair_time, pair_memory,
+                                             validate, supervise=getattr(args, 'supervise', False),
+                                             cache_dir=cache_dir,
+                                             result_store=store and store.root,
+                                             rung=f'{rung}/{len(ladder)}' if laddered else None,
+                                             shard_dir=shard_dir)
+            per_planner.setdefault(group, []).append(command)
+            planned.setdefault(group, []).append((task, command))
+            rungs_due[rung] = rungs_due.get(rung, 0) + 1
 
     total = sum(len(c) for c in per_planner.values())
+    if total == 0 and shard and not wanted:
+        print(f'Shard {shard["index"]}/{shard["count"]} by {shard["by"]} holds no pairs; '
+              f'nothing to generate.')
+        return 0
     if total == 0:
+        if imported:
+            print(f'Imported {imported} results from {store.root}.')
         print('Every (planner, task) pair already has a result; nothing to generate.')
         return 0
 
-    written = _write_command_files(sandbox, per_planner)
-    _write_slurm_arrays(sandbox, experiment, per_planner)
-    _write_local_runner(sandbox, per_planner, args.local_jobs)
+    # Slurm requests tighter than a group's limits, for the classes --right-size makes.
+    requests: Dict[str, Tuple[int, int]] = {}
+    right_sized = None
+    if getattr(args, 'right_size', None):
+        planned, per_planner, requests, right_sized = _right_size(planned, per_planner, groups,
+                                                                  args.right_size)
+    bundle = _bundle_size(args, experiment)
+    combined = None
+    order = getattr(args, 'order', None) or ('longest-first' if getattr(args, 'prior', None)
+                                             else 'natural')
+    if order == 'longest-first':
+        per_planner, combined, sources = _longest_first(sandbox, experiment, tasks, planned,
+                                                        getattr(args, 'prior', None) or [],
+                                                        bundle, groups)
+    indexed = None
+    if getattr(args, 'indexed', False):
+        settings = index_settings(sandbox, time_limit, memory_limit, validate,
+                                  supervise=getattr(args, 'supervise', False),
+                                  cache_dir=cache_dir, result_store=store and store.root,
+                                  shard_dir=shard_dir)
+        per_planner, combined, indexed = _write_indexes(sandbox, experiment, planned, per_planner,
+                                                        combined, settings, prefix, groups,
+                                                        len(ladder) if laddered else 0)
+    written = _write_command_files(sandbox, per_planner, combined)
+    packed = None
+    if getattr(args, 'packed_nodes', None):
+        # Each ladder rung has limits of its own, and the experiment's are only the
+        # last rung's: a node is sized for the largest limits among its pairs.
+        limits = [groups[group][1:] for group, pairs in planned.items() if pairs]
+        packed = _packed_shape(args, experiment, total, max(t for t, _m in limits),
+                               max(m for _t, m in limits))
+        if packed is None:
+            print('--packed-nodes needs the cores of a node: --node-cores, or '
+                  '"cores-per-node" under cfgs.slurm in exp-details.json', file=sys.stderr)
+            return 1
+        _write_packed_nodes(sandbox, experiment, written['__all__'], packed, prefix)
+    else:
+        _write_slurm_arrays(sandbox, experiment, per_planner, bundle, prefix, indexed,
+                            dict(_group_limits(groups), **requests))
+    _write_local_runner(sandbox, per_planner, args.local_jobs, getattr(args, 'venv_dir', None))
     if args.per_task_scripts:
-        _write_per_task_scripts(sandbox, experiment, per_planner)
+        _write_per_task_scripts(sandbox, experiment, per_planner,
+                                dict(_group_limits(groups), **requests))
 
-    _report(sandbox, experiment, tasks, per_planner, total, skipped_done, written)
+    _report(sandbox, experiment, tasks, per_planner, total, skipped_done, written,
+            imported=imported, stale=stale, store=store,
+            order=sources if order == 'longest-first' else None, packed=packed, shard=shard,
+            groups=groups, ladder=ladder if laddered else None, rungs_due=rungs_due,
+            right_sized=right_sized)
     return 0
 
 
@@ -162,12 +292,244 @@ def collect_tasks(tasks_dirs: Sequence[str], experiment: Optional[Experiment], a
     return limit_per_domain(tasks, limit, strategy)
 
 
+# ----------------------------------------------------------------------
+# Fingerprints
+# ----------------------------------------------------------------------
+
+def _fingerprint(planner: PlannerConfig, task: Task, time_limit: int, memory_limit: int,
+                 validate: bool, supervise: bool = False,
+                 cache_dir: Optional[str] = None) -> Optional[Dict[str, object]]:
+    """What ``solve`` will record as the pair's fingerprint; ``None`` if a file is unreadable."""
+    mode = fingerprint.run_mode(supervise, cache_dir, planner.precompile, planner.profile)
+    try:
+        return fingerprint.compute(planner.engine, planner.params, planner.modules,
+                                   planner.engine_class, task.domain_file, task.problem_file,
+                                   time_limit, memory_limit, validate, mode)
+    except OSError:
+        return None
+
+
+def _task_fields(task: Task) -> Dict[str, object]:
+    """The ``task`` section ``solve`` would write for `task`."""
+    return {
+        'task-id': task.task_id,
+        'suite': task.suite,
+        'domain': task.domain,
+        'instance': task.instance,
+        'track': task.track,
+        'ipc': str(task.ipc) if task.ipc else None,
+        'domain-file': task.domain_file,
+        'problem-file': task.problem_file,
+    }
+
+
+# ----------------------------------------------------------------------
+# Limit ladder
+# ----------------------------------------------------------------------
+
+def next_rung(payload: Optional[Dict[str, object]], rungs: int) -> Optional[int]:
+    """The rung a pair runs at next, judged from its result; ``None`` when it is settled.
+
+    No result yet: the first rung. A crash or a kill says nothing about the
+    pair, so it runs again at the same rung -- the first, for a result from a
+    flat sweep. A ``TIMEOUT`` or ``MEMOUT``: the rung above the one it ran at,
+    unless that was the last. Anything else is an answer, which a higher limit
+    would not change.
+    """
+    from .runner import ERROR, KILLED, MEMOUT, TIMEOUT
+
+    if payload is None:
+        return 0
+    rung = (payload.get('limits') or {}).get('rung')
+    status = payload.get('status')
+    if status in (ERROR, KILLED):
+        return rung or 0
+    if rung is None:
+        return None                                # from a flat sweep at the full limits
+    if status in (TIMEOUT, MEMOUT) and rung + 1 < rungs:
+        return rung + 1
+    return None
+
+
+def _read_result(path: str) -> Optional[Dict[str, object]]:
+    try:
+        with open(path, 'r') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _group_limits(groups: Dict[str, Tuple[str, int, int]]) -> Dict[str, Tuple[int, int]]:
+    return {group: (time_limit, memory_limit)
+            for group, (_tag, time_limit, memory_limit) in groups.items()}
+
+
+def _rung_index(group: str) -> int:
+    match = re.search(r'.-rung(\d+)(?:-|$)', group)
+    return int(match.group(1)) if match else 0
+
+
+# ----------------------------------------------------------------------
+# Right-sizing
+# ----------------------------------------------------------------------
+
+def _right_size(planned: Dict[str, List[Tuple[Task, str]]], per_planner: Dict[str, List[str]],
+                groups: Dict[str, Tuple[str, int, int]], priors: Sequence[str]):
+    """Split every group into resource classes by what its pairs used in `priors`.
+
+    A pair's slurm request is the class :func:`history.resource_class` puts it
+    in; its own limits, those in its command, stay as they are. The pairs whose
+    class is the full limits stay in the group; the others go to
+    ``<group>-<seconds>s-<MB>M``, a group of the same limits of their own.
+    Returns the new `planned` and `per_planner`, the slurm request of each new
+    group, and what to report.
+    """
+    from .history import History, resource_class
+
+    history = History.load(priors)
+    sized_planned: Dict[str, List[Tuple[Task, str]]] = {}
+    sized: Dict[str, List[str]] = {group: [] for group in per_planner}
+    requests: Dict[str, Tuple[int, int]] = {}
+    smaller = 0
+    for group, pairs in planned.items():
+        tag, time_limit, memory_limit = groups[group]
+        for task, command in pairs:
+            request = resource_class(history.pairs.get((tag, task.task_id)),
+                                     time_limit, memory_limit)
+            name = group
+            if request != (time_limit, memory_limit):
+                name = f'{group}-{request[0]}s-{request[1]}M'
+                groups[name] = groups[group]
+                requests[name] = request
+                smaller += 1
+            sized_planned.setdefault(name, []).append((task, command))
+            sized.setdefault(name, []).append(command)
+    report = {'priors': list(priors), 'known': len(history), 'smaller': smaller,
+              'classes': sorted(requests.values())}
+    return sized_planned, sized, requests, report
+
+
+# ----------------------------------------------------------------------
+# Sharding
+# ----------------------------------------------------------------------
+
+SHARD_BY = ('hash', 'domain', 'runtime')
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """``'I/N'`` -> ``(I, N)``, with ``0 <= I < N``."""
+    first, _, count = str(spec).partition('/')
+    index, count = int(first), int(count or 0)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError('expected I/N with 0 <= I < N, e.g. 0/3')
+    return index, count
+
+
+def shard_pairs(expected: Dict[str, List[str]], tasks: Sequence[Task], count: int, by: str,
+                experiment: Experiment, priors: Sequence[str] = ()) -> List[set]:
+    """Split the expected ``(planner tag, task id)`` pairs into `count` disjoint shards.
+
+    Every site computes the same split from the same experiment and benchmark,
+    so each can generate its own shard without talking to the others:
+
+    * ``hash``: by a hash of the pair -- even in number, oblivious to runtime;
+    * ``domain``: whole domains (every planner's pairs on them), largest first
+      onto the shard with the fewest pairs, so per-domain files and caches stay
+      on one site;
+    * ``runtime``: each pair, longest expected first, onto the shard with the
+      least expected work; estimated as ``--order longest-first`` does, so
+      every site has to pass the same ``--prior`` sandboxes.
+    """
+    pairs = [(tag, task_id) for tag, task_ids in expected.items() for task_id in task_ids]
+    shards: List[set] = [set() for _ in range(count)]
+    if by == 'hash':
+        for pair in pairs:
+            digest = hashlib.sha1('\0'.join(pair).encode()).digest()
+            shards[int.from_bytes(digest[:8], 'big') % count].add(pair)
+        return shards
+
+    by_id = {task.task_id: task for task in tasks}
+    if by == 'domain':
+        groups: Dict[Tuple[str, str, str], List[Tuple[str, str]]] = {}
+        for pair in pairs:
+            task = by_id[pair[1]]
+            groups.setdefault((task.suite, task.track, task.domain), []).append(pair)
+        weighted = [(float(len(members)), key, members) for key, members in groups.items()]
+    elif by == 'runtime':
+        from .history import History, positions
+
+        history = History.load([os.path.abspath(os.path.expanduser(p)) for p in priors])
+        by_domain: Dict[Tuple[str, str, str], List[str]] = {}
+        for task in tasks:
+            by_domain.setdefault((task.suite, task.track, task.domain), []).append(task.task_id)
+        placed = positions(by_domain)
+        weighted = [(history.estimate(tag, task_id, placed.get(task_id, 1.0),
+                                      experiment.time_limit_seconds,
+                                      experiment.memory_limit_mb).seconds,
+                     (tag, task_id), [(tag, task_id)]) for tag, task_id in pairs]
+    else:
+        raise ValueError(f'unknown shard kind {by!r}; expected one of {", ".join(SHARD_BY)}')
+
+    loads = [(0.0, number) for number in range(count)]
+    for weight, _key, members in sorted(weighted, key=lambda item: (-item[0], item[1])):
+        load, number = heapq.heappop(loads)
+        shards[number].update(members)
+        heapq.heappush(loads, (load + weight, number))
+    return shards
+
+
+# ----------------------------------------------------------------------
+# Ordering
+# ----------------------------------------------------------------------
+
+def _longest_first(sandbox: Sandbox, experiment: Experiment, tasks: Sequence[Task],
+                   planned: Dict[str, List[Tuple[Task, str]]], priors: Sequence[str],
+                   bundle: int, groups: Dict[str, Tuple[str, int, int]]
+                   ) -> Tuple[Dict[str, List[str]], List[str], Dict[str, int]]:
+    """Commands per planner, longest expected first; see :mod:`pypmt_eval_toolkit.history`.
+
+    Also the order of the combined command file (every planner's pairs, longest
+    first, for ``run-local``) and how many estimates came from where. The
+    estimates are written to ``cmds/estimates.json``.
+    """
+    from .history import History, arrange, positions
+
+    history = History.load([os.path.abspath(os.path.expanduser(p)) for p in priors])
+    by_domain: Dict[Tuple[str, str, str], List[str]] = {}
+    for task in tasks:
+        by_domain.setdefault((task.suite, task.track, task.domain), []).append(task.task_id)
+    placed = positions(by_domain)
+
+    chunk_size = int(experiment.slurm.get('max-array-size') or 1000)
+    ordered: Dict[str, List[str]] = {}
+    everything = []
+    estimates: Dict[str, Dict[str, object]] = {}
+    sources: Dict[str, int] = {}
+    for group, pairs in planned.items():
+        tag, time_limit, memory_limit = groups[group]
+        items = []
+        for task, command in pairs:
+            estimate = history.estimate(tag, task.task_id, placed.get(task.task_id, 1.0),
+                                        time_limit, memory_limit)
+            items.append((estimate, command))
+            estimates.setdefault(group, {})[task.task_id] = estimate.to_dict()
+            sources[estimate.source] = sources.get(estimate.source, 0) + 1
+        ordered[group] = arrange(items, bundle, chunk_size)
+        everything.extend(items)
+    with open(os.path.join(sandbox.cmds_dir, 'estimates.json'), 'w') as handle:
+        json.dump(estimates, handle, indent=2)
+    return ordered, arrange(everything), sources
+
+
 # ----------------------------------------------------------------------
 # Commands
 # ----------------------------------------------------------------------
 
 def solve_command(planner: PlannerConfig, task: Task, sandbox: Sandbox,
-                  time_limit: int, memory_limit: int, validate: bool = True) -> str:
+                  time_limit: int, memory_limit: int, validate: bool = True,
+                  supervise: bool = False, cache_dir: Optional[str] = None,
+                  result_store: Optional[str] = None, rung: Optional[str] = None,
+                  shard_dir: Optional[str] = None) -> str:
     """The ``pypmtevalcli solve`` invocation for one (planner, task) pair.
 
     Paths are absolute and quoted: the command has to be runnable from any
@@ -193,9 +555,67 @@ def solve_command(planner: PlannerConfig, task: Task, sandbox: Sandbox,
         parts += ['--ipc', str(task.ipc)]
     if not validate:
         parts.append('--no-validate')
+    if supervise:
+        parts.append('--supervise')
+    if cache_dir:
+        parts += ['--cache-dir', cache_dir]
+    if result_store:
+        parts += ['--result-store', result_store]
+    if rung:
+        parts += ['--rung', rung]
+    if shard_dir:
+        parts += ['--shard-dir', shard_dir]
     return ' '.join(shlex.quote(p) for p in parts)
 
 
+def index_settings(sandbox: Sandbox, time_limit: int, memory_limit: int, validate: bool = True,
+                   supervise: bool = False, cache_dir: Optional[str] = None,
+                   result_store: Optional[str] = None,
+                   shard_dir: Optional[str] = None) -> Dict[str, object]:
+    """What :func:`solve_command` puts on every line of a planner but its task, for an index."""
+    return {
+        'results-dir': sandbox.results_dir,        # the planner's own is added per index
+        'errors-dir': sandbox.errors_dir,
+        'run-dir': sandbox.runs_dir,
+        'time-limit': time_limit,
+        'memory-limit': memory_limit,
+        'validate': validate,
+        'supervise': supervise,
+        'cache-dir': cache_dir,
+        'result-store': result_store,
+        'shard-dir': shard_dir,
+    }
+
+
+def indexed_command(pairs_path: str, index: int, task_id: str) -> str:
+    """The ``pypmtevalcli solve`` invocation of pair `index` of an index."""
+    return ' '.join(shlex.quote(p) for p in (CLI, 'solve', '--from-index', pairs_path,
+                                             '--index', str(index), '--task-id', task_id))
+
+
+def solve_arguments(command: str) -> Optional[List[str]]:
+    """The inverse of :func:`solve_command`: ``['solve', '--planner-cfg', ...]``.
+
+    Whatever the launcher prefix put in front (``source .../activate &&``, an
+    ``apptainer run``) is dropped. ``None`` for a line that is not a solve
+    command at all -- a comment, a blank line, the shebang.
+    """
+    try:
+        tokens = shlex.split(command, comments=True)
+    except ValueError:
+        return None
+    for index in range(len(tokens) - 1):
+        if os.path.basename(tokens[index]) == CLI and tokens[index + 1] == 'solve':
+            return tokens[index + 1:]
+    return None
+
+
+def read_commands(path: str) -> List[str]:
+    """The solve commands of a command file, in order, one per pair."""
+    with open(path, 'r') as handle:
+        return [line.rstrip('\n') for line in handle if solve_arguments(line) is not None]
+
+
 def _validate_plans(experiment: Experiment, args) -> bool:
     if getattr(args, 'no_validate', False):
         return False
@@ -213,7 +633,46 @@ def _launcher_prefix(args) -> str:
     return ''
 
 
-def _write_command_files(sandbox: Sandbox, per_planner: Dict[str, List[str]]) -> Dict[str, str]:
+def _write_indexes(sandbox: Sandbox, experiment: Experiment,
+                   planned: Dict[str, List[Tuple[Task, str]]], per_planner: Dict[str, List[str]],
+                   combined: Optional[List[str]], settings: Dict[str, object], prefix: str,
+                   groups: Dict[str, Tuple[str, int, int]], rungs: int = 0):
+    """Write each planner's index, in command order; the commands that look pairs up in it.
+
+    Returns the new per-planner commands, the combined order (if any) in the
+    new commands, and each planner's index path.
+    """
+    from .pairindex import write_index
+
+    configs = {planner.tag: planner.path or '' for planner in experiment.planners}
+    short: Dict[str, str] = {}
+    indexes: Dict[str, str] = {}
+    commands: Dict[str, List[str]] = {}
+    for group, full in per_planner.items():
+        if not full:
+            commands[group] = []
+            continue
+        tag, time_limit, memory_limit = groups[group]
+        tasks = {command: task for task, command in planned.get(group, [])}
+        path = os.path.join(sandbox.cmds_dir, f'{group}.pairs')
+        own = {'planner-cfg': configs.get(tag, ''), 'results-dir': sandbox.planner_results_dir(tag),
+               'time-limit': time_limit, 'memory-limit': memory_limit}
+        if rungs:
+            own['rung'] = f'{_rung_index(group)}/{rungs}'
+        write_index(path, dict(settings, **own),
+                    [_task_fields(tasks[command]) for command in full])
+        indexes[group] = path
+        commands[group] = []
+        for number, command in enumerate(full):
+            short[command] = prefix + indexed_command(path, number, tasks[command].task_id)
+            commands[group].append(short[command])
+    if combined is not None:
+        combined = [short[command] for command in combined]
+    return commands, combined, indexes
+
+
+def _write_command_files(sandbox: Sandbox, per_planner: Dict[str, List[str]],
+                         combined_order: Optional[List[str]] = None) -> Dict[str, str]:
     written = {}
     all_lines: List[str] = []
     for tag, commands in per_planner.items():
@@ -224,6 +683,8 @@ def _write_command_files(sandbox: Sandbox, per_planner: Dict[str, List[str]]) ->
             handle.write('\n'.join(commands) + '\n')
         written[tag] = path
         all_lines.extend(commands)
+    if combined_order is not None:
+        all_lines = combined_order
 
     combined = os.path.join(sandbox.cmds_dir, 'generated_cmds.sh')
     with open(combined, 'w') as handle:
@@ -238,15 +699,17 @@ def _write_command_files(sandbox: Sandbox, per_planner: Dict[str, List[str]]) ->
 # Slurm
 # ----------------------------------------------------------------------
 
-def _slurm_directives(experiment: Experiment, job_name: str, sandbox: Sandbox) -> List[str]:
+def _slurm_directives(experiment: Experiment, job_name: str, sandbox: Sandbox,
+                      time: Optional[str] = None, memory: Optional[str] = None,
+                      cpus: Optional[int] = None) -> List[str]:
     slurm = experiment.slurm
     lines = [
         f'#SBATCH --job-name={job_name}',
         f'#SBATCH --output={sandbox.slurm_logs_dir}/%x_%A_%a.out',
         f'#SBATCH --error={sandbox.slurm_logs_dir}/%x_%A_%a.err',
-        f'#SBATCH --cpus-per-task={slurm.get("cpus-per-task", 1)}',
-        f'#SBATCH --mem={experiment.slurm_memory}',
-        f'#SBATCH --time={experiment.slurm_time}',
+        f'#SBATCH --cpus-per-task={cpus or slurm.get("cpus-per-task", 1)}',
+        f'#SBATCH --mem={memory or experiment.slurm_memory}',
+        f'#SBATCH --time={time or experiment.slurm_time}',
     ]
     for key, flag in (('partition', '--partition'), ('account', '--account'), ('qos', '--qos')):
         value = slurm.get(key)
@@ -258,47 +721,74 @@ def _slurm_directives(experiment: Experiment, job_name: str, sandbox: Sandbox) -
     return lines
 
 
+def _bundle_size(args, experiment: Experiment) -> int:
+    """Pairs per array element: ``--tasks-per-job``, or as many as ``--seconds-per-job`` holds.
+
+    A job has to last through its pairs at their time limit, not at their usual
+    runtime, or slurm kills it mid-bundle. So ``--seconds-per-job`` counts
+    rounds of ``timelimit`` seconds, each running ``cpus-per-task`` pairs.
+    """
+    per_job = getattr(args, 'tasks_per_job', None)
+    if per_job:
+        return max(1, per_job)
+    seconds = getattr(args, 'seconds_per_job', None)
+    if seconds:
+        rounds = max(1, int(seconds) // max(1, experiment.time_limit_seconds))
+        return rounds * _job_parallelism(experiment)
+    return 1
+
+
+def _job_parallelism(experiment: Experiment) -> int:
+    return max(1, int(experiment.slurm.get('cpus-per-task') or 1))
+
+
 def _write_slurm_arrays(sandbox: Sandbox, experiment: Experiment,
-                        per_planner: Dict[str, List[str]]) -> List[str]:
-    """One job array per planner, split so no array exceeds ``MaxArraySize``."""
+                        per_planner: Dict[str, List[str]], bundle: int = 1,
+                        prefix: str = '', indexes: Optional[Dict[str, str]] = None,
+                        limits: Optional[Dict[str, Tuple[int, int]]] = None) -> List[str]:
+    """One job array per planner, split so no array exceeds ``MaxArraySize``.
+
+    With a `bundle` of more than one pair, each element runs its slice of the
+    command file through ``solve-batch``, ``cpus-per-task`` pairs at a time; its
+    ``--time`` and ``--mem`` are scaled to cover that. With `indexes` (see
+    :mod:`pypmt_eval_toolkit.pairindex`), a single-pair element looks its pair
+    up by number instead of reading the command file. `limits` gives the
+    ``(seconds, MB)`` of a command file whose pairs run under other limits than
+    the experiment's (a rung of the limit ladder).
+    """
     slurm = experiment.slurm
     chunk_size = int(slurm.get('max-array-size') or 1000)
     throttle = int(slurm.get('max-parallel-jobs') or 0)
+    parallel = min(_job_parallelism(experiment), bundle)
     scripts: List[str] = []
 
     for tag, commands in per_planner.items():
         if not commands:
             continue
+        time_limit, memory_limit = (limits or {}).get(tag, (None, None))
+        time = experiment.slurm_time_for(-(-bundle // parallel), time_limit)
+        memory = experiment.slurm_memory_for(parallel, memory_limit)
         cmd_file = os.path.join(sandbox.cmds_dir, f'{tag}.txt')
-        chunks = [(i, min(i + chunk_size, len(commands)))
-                  for i in range(0, len(commands), chunk_size)]
+        elements = -(-len(commands) // bundle)
+        chunks = [(i, min(i + chunk_size, elements)) for i in range(0, elements, chunk_size)]
         for number, (start, end) in enumerate(chunks, start=1):
             suffix = f'.{number}' if len(chunks) > 1 else ''
             job_name = f'pypmteval-{tag}{suffix}'
             array = f'0-{end - start - 1}'
             if throttle > 0:
                 array += f'%{throttle}'
+            if bundle > 1:
+                run = _bundled_lines(cmd_file, start, bundle, parallel, prefix)
+            elif indexes and tag in indexes:
+                run = _indexed_lines(indexes[tag], start, prefix)
+            else:
+                run = _single_lines(cmd_file, start)
             body = '\n'.join([
                 '#!/bin/bash',
-                *_slurm_directives(experiment, job_name, sandbox),
+                *_slurm_directives(experiment, job_name, sandbox, time, memory),
                 f'#SBATCH --array={array}',
                 '',
-                '# Each array index picks its own line out of the command file, so the',
-                '# whole sweep is one submission instead of one per task.',
-                'set -uo pipefail',
-                f'CMD_FILE={shlex.quote(cmd_file)}',
-                f'OFFSET={start}',
-                'LINE=$((OFFSET + SLURM_ARRAY_TASK_ID + 1))',
-                'CMD=$(sed -n "${LINE}p" "$CMD_FILE")',
-                'if [ -z "$CMD" ]; then',
-                '    echo "no command at line $LINE of $CMD_FILE" >&2',
-                '    exit 1',
-                'fi',
-                'echo "[$(date -Is)] host=$(hostname) line=$LINE"',
-                'echo "$CMD"',
-                'eval "$CMD"',
-                'status=$?',
-                'echo "[$(date -Is)] exit=$status"',
+                *run,
                 '# The runner records timeouts and crashes itself, so a non-zero exit here',
                 '# is reported but not propagated: it must not fail the rest of the array.',
                 'exit 0',
@@ -310,17 +800,155 @@ def _write_slurm_arrays(sandbox: Sandbox, experiment: Experiment,
             _make_executable(path)
             scripts.append(path)
 
+    _write_submit_all(sandbox, scripts)
+    return scripts
+
+
+def _write_submit_all(sandbox: Sandbox, scripts: Sequence[str]) -> None:
     submit = os.path.join(sandbox.slurm_dir, 'submit_all.sh')
     with open(submit, 'w') as handle:
         handle.write('#!/bin/bash\n# Submit every generated job array.\nset -euo pipefail\n')
         for path in scripts:
             handle.write(f'sbatch {shlex.quote(path)}\n')
     _make_executable(submit)
-    return scripts
+
+
+def _single_lines(cmd_file: str, offset: int) -> List[str]:
+    return [
+        '# Each array index picks its own line out of the command file, so the',
+        '# whole sweep is one submission instead of one per task.',
+        'set -uo pipefail',
+        f'CMD_FILE={shlex.quote(cmd_file)}',
+        f'OFFSET={offset}',
+        'LINE=$((OFFSET + SLURM_ARRAY_TASK_ID + 1))',
+        'CMD=$(sed -n "${LINE}p" "$CMD_FILE")',
+        'if [ -z "$CMD" ]; then',
+        '    echo "no command at line $LINE of $CMD_FILE" >&2',
+        '    exit 1',
+        'fi',
+        'echo "[$(date -Is)] host=$(hostname) line=$LINE"',
+        'echo "$CMD"',
+        'eval "$CMD"',
+        'status=$?',
+        'echo "[$(date -Is)] exit=$status"',
+    ]
+
+
+def _indexed_lines(pairs_path: str, offset: int, prefix: str) -> List[str]:
+    return [
+        '# Each array index looks its pair up by number: a seek into the index, not a',
+        '# scan of the command file.',
+        'set -uo pipefail',
+        f'PAIRS={shlex.quote(pairs_path)}',
+        f'OFFSET={offset}',
+        'INDEX=$((OFFSET + SLURM_ARRAY_TASK_ID))',
+        'echo "[$(date -Is)] host=$(hostname) index=$INDEX"',
+        f'{prefix}{CLI} solve --from-index "$PAIRS" --index "$INDEX"',
+        'status=$?',
+        'echo "[$(date -Is)] exit=$status"',
+    ]
+
+
+def _bundled_lines(cmd_file: str, offset: int, bundle: int, parallel: int,
+                   prefix: str) -> List[str]:
+    return [
+        '# Each array index runs PER_JOB consecutive lines of the command file through',
+        f'# solve-batch, {parallel} at a time; every pair keeps its own limits and result file.',
+        'set -uo pipefail',
+        f'CMD_FILE={shlex.quote(cmd_file)}',
+        f'OFFSET={offset}',
+        f'PER_JOB={bundle}',
+        'FIRST=$(((OFFSET + SLURM_ARRAY_TASK_ID) * PER_JOB))',
+        'echo "[$(date -Is)] host=$(hostname) lines=$((FIRST + 1))-$((FIRST + PER_JOB))"',
+        f'{prefix}{CLI} solve-batch --cmd-file "$CMD_FILE" '
+        f'--slice "$FIRST:$((FIRST + PER_JOB))" --jobs {parallel}',
+        'status=$?',
+        'echo "[$(date -Is)] exit=$status"',
+    ]
+
+
+def _packed_shape(args, experiment: Experiment, total: int,
+                  time_limit: Optional[int] = None,
+                  memory_limit: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """Nodes, cores per node, tasks at once per node, rounds and the limits they are sized for.
+
+    A node runs as many pairs at once as it has cores, or fewer if their memory
+    limits would not fit in ``--node-memory``. Its ``--time`` assumes every
+    pair runs to its time limit, like a bundled array element's. `time_limit`
+    and `memory_limit` are the largest of the pairs packed (the experiment's
+    own by default).
+    """
+    time_limit = time_limit or experiment.time_limit_seconds
+    memory_limit = memory_limit or experiment.memory_limit_mb
+    slurm = experiment.slurm
+    cores = getattr(args, 'node_cores', None) or slurm.get('cores-per-node')
+    if not cores:
+        return None
+    nodes = max(1, min(int(args.packed_nodes), total))
+    cores = max(1, int(cores))
+    parallel = cores
+    node_memory = getattr(args, 'node_memory', None) or slurm.get('memory-per-node')
+    if node_memory and memory_limit:
+        parallel = max(1, min(cores, parse_memory(node_memory) // memory_limit))
+    per_node = -(-total // nodes)
+    return {'nodes': nodes, 'cores': cores, 'parallel': parallel,
+            'rounds': -(-per_node // parallel), 'time-limit': time_limit,
+            'memory-limit': memory_limit}
+
+
+def _write_packed_nodes(sandbox: Sandbox, experiment: Experiment, cmd_file: str,
+                        shape: Dict[str, int], prefix: str = '') -> str:
+    """One array of whole-node jobs, each running ``run-local`` over its share of `cmd_file`.
+
+    Node I of N takes every N-th line starting at the I-th (``run-local
+    --stride``), so with ``--order longest-first`` the heavy pairs are dealt
+    across the nodes. Each pair is pinned to a core of its own and admitted by
+    its memory limit; its limits and result file are what ``solve`` gives it
+    anywhere else. The node keeps its own journal, so a resubmitted job skips
+    what that node already finished.
+    """
+    job_name = 'pypmteval-packed'
+    local_dir = os.path.join(sandbox.root, 'local')
+    os.makedirs(local_dir, exist_ok=True)
+    body = '\n'.join([
+        '#!/bin/bash',
+        *_slurm_directives(experiment, job_name, sandbox,
+                           time=experiment.slurm_time_for(shape['rounds'], shape['time-limit']),
+                           memory='0',
+                           cpus=shape['cores']),
+        '#SBATCH --nodes=1',
+        '#SBATCH --ntasks=1',
+        '#SBATCH --exclusive',
+        f'#SBATCH --array=0-{shape["nodes"] - 1}',
+        '',
+        '# Each array index is a whole node, running its share of the command file',
+        f'# {shape["parallel"]} pairs at a time, each pinned to a core of its own.',
+        'set -uo pipefail',
+        f'CMD_FILE={shlex.quote(cmd_file)}',
+        f'NODES={shape["nodes"]}',
+        'SLOT=$SLURM_ARRAY_TASK_ID',
+        'echo "[$(date -Is)] host=$(hostname) node=$SLOT/$NODES"',
+        # slurm's own KillWait is 30 seconds; the tasks get most of it to
+        # record KILLED before run-local stops waiting for them.
+        f'{prefix}{CLI} run-local --sandbox-dir {shlex.quote(sandbox.root)} '
+        f'--cmd-file "$CMD_FILE" --stride "$SLOT/$NODES" --pin-cores --jobs {shape["parallel"]} '
+        f'--journal {shlex.quote(local_dir)}/journal-node-$SLOT.jsonl --kill-wait 20',
+        'status=$?',
+        'echo "[$(date -Is)] exit=$status"',
+        'exit 0',
+        '',
+    ])
+    path = os.path.join(sandbox.slurm_dir, f'{job_name}.sbatch')
+    with open(path, 'w') as handle:
+        handle.write(body)
+    _make_executable(path)
+    _write_submit_all(sandbox, [path])
+    return path
 
 
 def _write_per_task_scripts(sandbox: Sandbox, experiment: Experiment,
-                            per_planner: Dict[str, List[str]]) -> None:
+                            per_planner: Dict[str, List[str]],
+                            limits: Optional[Dict[str, Tuple[int, int]]] = None) -> None:
     """One ``.sbatch`` per (planner, task), for sites without job arrays."""
     scripts_dir = os.path.join(sandbox.slurm_dir, 'per_task')
     os.makedirs(scripts_dir, exist_ok=True)
@@ -328,23 +956,31 @@ def _write_per_task_scripts(sandbox: Sandbox, experiment: Experiment,
     with open(submit, 'w') as submit_handle:
         submit_handle.write('#!/bin/bash\nset -euo pipefail\n')
         for tag, commands in per_planner.items():
+            time_limit, memory_limit = (limits or {}).get(tag, (None, None))
+            time = experiment.slurm_time_for(1, time_limit)
+            memory = experiment.slurm_memory_for(1, memory_limit)
             for index, command in enumerate(commands):
                 job_name = f'pypmteval-{tag}-{index}'
                 path = os.path.join(scripts_dir, f'{job_name}.sbatch')
                 with open(path, 'w') as handle:
                     handle.write('\n'.join([
                         '#!/bin/bash',
-                        *_slurm_directives(experiment, job_name, sandbox),
+                        *_slurm_directives(experiment, job_name, sandbox, time, memory),
                         '', command, '',
                     ]))
                 submit_handle.write(f'sbatch {shlex.quote(path)}\n')
     _make_executable(submit)
 
 
-def _write_local_runner(sandbox: Sandbox, per_planner: Dict[str, List[str]], jobs: int) -> None:
-    """A no-slurm fallback: the same commands through GNU parallel or bash jobs."""
+def _write_local_runner(sandbox: Sandbox, per_planner: Dict[str, List[str]], jobs: int,
+                       venv_dir: Optional[str] = None) -> None:
+    """A no-slurm fallback: ``run-local``, or GNU parallel / bash jobs without it."""
     path = os.path.join(sandbox.root, 'run_local.sh')
     combined = os.path.join(sandbox.cmds_dir, 'generated_cmds.sh')
+    activate = []
+    if venv_dir:
+        script = shlex.quote(os.path.join(os.path.abspath(venv_dir), 'bin', 'activate'))
+        activate = [f'[ -f {script} ] && source {script}']
     with open(path, 'w') as handle:
         handle.write('\n'.join([
             '#!/bin/bash',
@@ -352,6 +988,13 @@ def _write_local_runner(sandbox: Sandbox, per_planner: Dict[str, List[str]], job
             'set -uo pipefail',
             f'JOBS=${{1:-{max(1, jobs)}}}',
             f'CMDS={shlex.quote(combined)}',
+            *activate,
+            '',
+            '# The toolkit\'s own scheduler knows each task\'s memory limit and keeps a',
+            '# journal to resume from; the fallbacks below know neither.',
+            'if command -v ' + CLI + ' >/dev/null 2>&1; then',
+            f'    exec {CLI} run-local --sandbox-dir {shlex.quote(sandbox.root)} --jobs "$JOBS"',
+            'fi',
             '',
             'if command -v parallel >/dev/null 2>&1; then',
             '    grep -v "^#" "$CMDS" | grep -v "^[[:space:]]*$" | parallel -j "$JOBS" --halt never',
@@ -378,7 +1021,15 @@ def _write_local_runner(sandbox: Sandbox, per_planner: Dict[str, List[str]], job
 
 def _report(sandbox: Sandbox, experiment: Experiment, tasks: Sequence[Task],
             per_planner: Dict[str, List[str]], total: int, skipped_done: int,
-            written: Dict[str, str]) -> None:
+            written: Dict[str, str], imported: int = 0,
+            stale: Sequence[Tuple[str, str, List[str]]] = (), store=None,
+            order: Optional[Dict[str, int]] = None,
+            packed: Optional[Dict[str, int]] = None,
+            shard: Optional[Dict[str, object]] = None,
+            groups: Optional[Dict[str, Tuple[str, int, int]]] = None,
+            ladder: Optional[List[Tuple[int, int]]] = None,
+            rungs_due: Optional[Dict[int, int]] = None,
+            right_sized: Optional[Dict[str, object]] = None) -> None:
     counts = summarize(tasks)
     print(f'Experiment      : {experiment.name} ({experiment.path})')
     print(f'Sandbox         : {sandbox.root}')
@@ -387,21 +1038,52 @@ def _report(sandbox: Sandbox, experiment: Experiment, tasks: Sequence[Task],
     print(f'Memory limit    : {experiment.memory_limit_mb}MB per task '
           f'(slurm --mem={experiment.slurm_memory})')
     print(f'Tasks           : {len(tasks)}')
+    if shard:
+        print(f'Shard           : {shard["index"]}/{shard["count"]} by {shard["by"]} '
+              f'(combine the shards with `{CLI} merge`)')
     for track, count in sorted(counts['instances_per_track'].items()):
         domains = counts['domains_per_track'].get(track, 0)
         print(f'  {track:<10} {count:>6} instances across {domains} domains')
     print(f'Planners        : {len(experiment.planners)}')
     for planner in experiment.planners:
-        print(f'  {planner.tag:<24} {len(per_planner.get(planner.tag, [])):>6} commands '
-              f'(engine: {planner.engine})')
+        count = sum(len(commands) for group, commands in per_planner.items()
+                    if (groups or {}).get(group, (group,))[0] == planner.tag)
+        print(f'  {planner.tag:<24} {count:>6} commands (engine: {planner.engine})')
+    if ladder:
+        print('Limit ladder    : ' + ' -> '.join(f'{seconds}s/{memory}MB'
+                                                for seconds, memory in ladder))
+        print('  this round    : ' + ', '.join(f'{count} at rung {rung}'
+                                              for rung, count in sorted((rungs_due or {}).items())))
     if skipped_done:
         print(f'Skipped         : {skipped_done} pairs that already have results')
+    if imported:
+        print(f'Imported        : {imported} results from {store.root}')
+    if stale:
+        print(f'Stale           : {len(stale)} results whose fingerprint changed; re-running them')
+        for line in fingerprint.stale_lines(stale):
+            print(line)
     print(f'Total commands  : {total}')
+    if right_sized is not None:
+        classes = sorted(set(right_sized['classes']))
+        print(f'Right-sized     : {right_sized["smaller"]} of {total} pairs ask slurm for less, '
+              f'from {right_sized["known"]} prior results; '
+              + (', '.join(f'{seconds}s/{memory}MB' for seconds, memory in classes)
+                 if classes else 'no class below the limits')
+              + ' (their own limits unchanged)')
+    if order is not None:
+        print('Order           : longest expected first ('
+              + ', '.join(f'{count} by {source}' for source, count in sorted(order.items()))
+              + '; cmds/estimates.json)')
     print()
     print(f'Commands        : {written.get("__all__")}')
+    if packed:
+        print(f'Packed nodes    : {packed["nodes"]} whole-node job(s), {packed["parallel"]} pairs '
+              f'at a time on {packed["cores"]} cores (slurm --time='
+              f'{experiment.slurm_time_for(packed["rounds"], packed["time-limit"])})')
     print(f'Slurm arrays    : {sandbox.slurm_dir}')
     print(f'Submit with     : bash {os.path.join(sandbox.slurm_dir, "submit_all.sh")}')
     print(f'Or run locally  : bash {os.path.join(sandbox.root, "run_local.sh")} 8')
+    print(f'Or on machines  : {CLI} worker --queue {sandbox.root}   (each, sharing the sandbox)')
 
 
 def _make_executable(path: str) -> None:
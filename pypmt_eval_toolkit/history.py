@@ -0,0 +1,188 @@
+"""Expected cost of a pair from earlier runs: ``generate --order longest-first``.
+
+In the natural order every domain's hard instances come last, so each array
+ends on a tail of pairs that run to the time limit one after the other while
+the rest of the allocation sits idle. Started first, the long pairs overlap
+with everything else and the sweep ends sooner.
+
+How long a pair will take is judged, in this order, from
+
+1. the same planner on the same task in a ``--prior`` sandbox (a previous
+   sweep, or a quick pass with short limits run for the purpose);
+2. the other planners on that task there, by their median;
+3. the instance's position within its domain -- the last instance of a domain
+   is assumed to be the hardest -- scaled to the time limit.
+
+A prior ``TIMEOUT`` says the pair takes at least that long, so it counts as
+running to the current limit; anything measured is capped at the current
+limit. Memory is estimated the same way, from ``peak-memory-mb`` (a
+``MEMOUT`` counts as the current memory limit), and breaks ties.
+
+:func:`arrange` then lays the pairs out for the array writer: the longest
+first, and heavy pairs dealt across bundles and across array chunks rather than
+piled into the first one. :func:`resource_class` sizes the slurm request of a
+pair for ``generate --right-size``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from .runner import MEMOUT, TIMEOUT
+
+T = TypeVar('T')
+
+# Statuses whose runtime says nothing about the pair.
+_UNINFORMATIVE = ('KILLED', 'MISSING', 'ERROR')
+
+# The resource classes of `generate --right-size`, as shares of the limits, and
+# how much more than it used before a pair is given.
+TIME_SHARES = (1 / 16, 1 / 4, 1.0)
+MEMORY_SHARES = (1 / 4, 1 / 2, 1.0)
+_TIME_MARGIN = 2.0
+_MEMORY_MARGIN = 1.5
+
+
+@dataclass
+class Estimate:
+    seconds: float
+    memory_mb: Optional[float]
+    source: str                        # 'prior', 'prior-task' or 'position'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'seconds': round(self.seconds, 2),
+                'memory-mb': None if self.memory_mb is None else round(self.memory_mb, 1),
+                'source': self.source}
+
+
+class History:
+    """Runtimes and peaks of earlier runs, by ``(planner tag, task id)``."""
+
+    def __init__(self):
+        self.pairs: Dict[Tuple[str, str], Tuple[float, Optional[float]]] = {}
+        self.tasks: Dict[str, List[Tuple[float, Optional[float]]]] = defaultdict(list)
+
+    @classmethod
+    def load(cls, sandboxes: Sequence[str]) -> 'History':
+        from .analyzer import iter_rows
+
+        history = cls()
+        for sandbox in sandboxes:
+            for row in iter_rows(sandbox):
+                if row.get('status') in _UNINFORMATIVE or row.get('total_seconds') is None:
+                    continue
+                seconds = float(row['total_seconds'])
+                if row['status'] == TIMEOUT:
+                    seconds = float('inf')               # at least the limit it ran under
+                memory = row.get('peak_memory_mb')
+                if row['status'] == MEMOUT:
+                    memory = float('inf')
+                key = (row['planner'], row['task_id'])
+                # Several priors: the most expensive run of a pair counts.
+                known = history.pairs.get(key)
+                if known is not None:
+                    seconds = max(seconds, known[0])
+                    memory = max(memory or 0.0, known[1] or 0.0) or None
+                history.pairs[key] = (seconds, memory)
+        for (_planner, task_id), measured in history.pairs.items():
+            history.tasks[task_id].append(measured)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def estimate(self, planner: str, task_id: str, position: float,
+                 time_limit: float, memory_limit: Optional[float]) -> Estimate:
+        """`position` is the instance's place in its domain, as :func:`positions` gives it."""
+        measured = self.pairs.get((planner, task_id))
+        source = 'prior'
+        if measured is None and self.tasks.get(task_id):
+            others = self.tasks[task_id]
+            memories = [memory for _seconds, memory in others if memory is not None]
+            measured = (statistics.median(seconds for seconds, _memory in others),
+                        statistics.median(memories) if memories else None)
+            source = 'prior-task'
+        if measured is None:
+            return Estimate(time_limit * position, None, 'position')
+        seconds, memory = measured
+        if memory == float('inf'):
+            memory = memory_limit or None
+        elif memory is not None and memory_limit:
+            memory = min(memory, memory_limit)
+        return Estimate(min(seconds, time_limit), memory, source)
+
+
+def resource_class(measured: Optional[Tuple[float, Optional[float]]], time_limit: float,
+                   memory_limit: float) -> Tuple[int, int]:
+    """``(seconds, MB)`` to ask the scheduler for, for a pair measured as `measured`.
+
+    The smallest of :data:`TIME_SHARES` and :data:`MEMORY_SHARES` of the limits
+    that leaves the pair twice its prior runtime and half again its prior peak.
+    A pair with no prior run, or one that hit either limit (``inf``), gets the
+    full limits of both: nothing says it needs less, and a pair that ran out of
+    memory says nothing about the time it would have taken, nor the other way
+    round.
+    """
+    if measured is None or float('inf') in measured:
+        return int(time_limit), int(memory_limit)
+    seconds, memory = measured
+    time_class = next((share for share in TIME_SHARES
+                       if seconds * _TIME_MARGIN <= share * time_limit), 1.0)
+    memory_class = 1.0 if memory is None else next(
+        (share for share in MEMORY_SHARES if memory * _MEMORY_MARGIN <= share * memory_limit), 1.0)
+    return max(1, int(time_class * time_limit)), max(1, int(memory_class * memory_limit))
+
+
+def positions(task_ids_by_domain: Dict[Any, List[str]]) -> Dict[str, float]:
+    """Each task's place within its domain, from ``1/n`` (first) to 1 (last)."""
+    placed: Dict[str, float] = {}
+    for task_ids in task_ids_by_domain.values():
+        for index, task_id in enumerate(task_ids):
+            placed[task_id] = (index + 1) / len(task_ids)
+    return placed
+
+
+def arrange(items: Sequence[Tuple[Estimate, T]], bundle: int = 1,
+            chunk_size: Optional[int] = None) -> List[T]:
+    """The items in the order the command file should list them.
+
+    The array writer cuts the file into elements of `bundle` consecutive lines
+    (the last one shorter) and those into arrays of `chunk_size` elements. Items
+    go, heaviest first, to the element with the least expected work that still
+    has room, so the elements end up balanced and each starts on its heaviest
+    pair. Elements are dealt over the arrays in turn, so no array gets all the
+    heavy ones.
+    """
+    ranked = sorted(items, key=lambda item: (-item[0].seconds, -(item[0].memory_mb or 0.0)))
+    if not ranked:
+        return []
+    bundle = max(1, bundle)
+    count = -(-len(ranked) // bundle)
+    room = [bundle] * (count - 1) + [len(ranked) - (count - 1) * bundle]
+    elements: List[List[T]] = [[] for _ in range(count)]
+    loads = [(0.0, number) for number in range(count)]
+    heapq.heapify(loads)
+    for estimate, item in ranked:
+        load, number = heapq.heappop(loads)
+        while not room[number]:
+            load, number = heapq.heappop(loads)
+        elements[number].append(item)
+        room[number] -= 1
+        if room[number]:
+            heapq.heappush(loads, (load + estimate.seconds, number))
+
+    chunk_size = chunk_size or count
+    chunks = -(-count // chunk_size)
+    capacity = [min(chunk_size, count - number * chunk_size) for number in range(chunks)]
+    placed: List[List[List[T]]] = [[] for _ in range(chunks)]
+    target = 0
+    for element in elements:
+        while len(placed[target]) >= capacity[target]:
+            target = (target + 1) % chunks
+        placed[target].append(element)
+        target = (target + 1) % chunks
+    return [item for chunk in placed for element in chunk for item in element]
@@ -0,0 +1,268 @@
+"""Combine the sandboxes of one sweep: ``pypmtevalcli merge``.
+
+A sweep split with ``generate --shard I/N`` (or simply run in pieces, on
+different sites) ends up in several sandboxes. ``merge`` makes one sandbox of
+them that ``analyze`` and ``report`` treat like any other:
+
+* ``results/`` holds every pair's result. A pair found in more than one
+  sandbox keeps its best result: one that ran to an answer (or a limit) over
+  one that crashed or was killed, then the latest. A ``.running`` marker is
+  kept only for pairs with no result anywhere, so they still count as
+  ``KILLED``.
+* ``tasks.json`` lists the union of the tasks, and its ``expected`` the union
+  of every sandbox's expected pairs. A pair no sandbox has a result for is
+  ``MISSING`` against that union, exactly as if the sweep had run in one
+  place.
+* ``errors/`` collects every sandbox's tracebacks.
+* Results appended to a sandbox's ``shards/`` (``--result-sink shards``)
+  take part like result files, and are written out as result files; a start
+  record no result followed becomes a ``.running`` marker.
+
+Nothing is written when the sandboxes do not measure the same thing. Per
+planner, every result's fingerprint has to agree on everything but the PDDL
+digests (engine, parameters, installed versions, limits, validation, toolkit
+version), and a task has to have the same PDDL everywhere. ``--force`` merges
+anyway and records the disagreements in ``tasks.json``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .generator import Sandbox
+from .runner import ERROR, KILLED, _slug
+from .shards import ShardResults
+from .tasks import Task, summarize
+
+# Fingerprint parts that name the task rather than the setup it was run with.
+_TASK_PARTS = ('domain-sha256', 'problem-sha256')
+
+
+def merge(args) -> int:
+    target = Sandbox(args.sandbox_dir)
+    sources = [Sandbox(path) for path in args.sources]
+    if target.root in {source.root for source in sources}:
+        print('merge: --sandbox-dir has to be a new sandbox, not one of those merged',
+              file=sys.stderr)
+        return 1
+    for source in sources:
+        if not os.path.isdir(source.results_dir) and not os.path.isfile(source.tasks_file):
+            print(f'merge: {source.root} is not a sandbox (no results/, no tasks.json)',
+                  file=sys.stderr)
+            return 1
+
+    # A result or marker is a file to copy, or a shard record to write out.
+    best: Dict[Tuple[str, str], Tuple[tuple, Any]] = {}
+    markers: Dict[Tuple[str, str], Any] = {}
+    setups: Dict[str, Dict[str, List[str]]] = {}
+    digests: Dict[str, Dict[str, List[str]]] = {}
+    duplicates = 0
+    for source in sources:
+        for tag, name, path in _result_files(source):
+            key = (tag, name[:-len('.json')])
+            if name.endswith('.running'):
+                markers.setdefault((tag, name[:-len('.running')]), path)
+                continue
+            payload = _read(path)
+            if payload is None:
+                continue
+            _note_setup(payload, tag, source.root, setups, digests)
+            rank = _rank(payload)
+            if key in best:
+                duplicates += 1
+                if rank <= best[key][0]:
+                    continue
+            best[key] = (rank, path)
+        shards = ShardResults.load(source.shards_dir)
+        for payload in shards.results.values():
+            tag, key = _shard_key(payload)
+            _note_setup(payload, tag, source.root, setups, digests)
+            rank = _rank(payload)
+            if key in best:
+                duplicates += 1
+                if rank <= best[key][0]:
+                    continue
+            best[key] = (rank, payload)
+        for payload in shards.unfinished():
+            markers.setdefault(_shard_key(payload)[1], payload)
+
+    problems = _disagreements(setups, digests)
+    if problems and not args.force:
+        print('merge: the sandboxes do not measure the same thing; nothing written '
+              '(--force merges anyway):', file=sys.stderr)
+        for line in problems:
+            print(f'  {line}', file=sys.stderr)
+        return 1
+
+    target.create()
+    for (tag, slug), (_rank_, source) in best.items():
+        _copy(source, os.path.join(target.planner_results_dir(tag), f'{slug}.json'))
+    stray = 0
+    for (tag, slug), source in markers.items():
+        if (tag, slug) not in best:
+            _copy(source, os.path.join(target.planner_results_dir(tag), f'{slug}.running'))
+            stray += 1
+    for source in sources:
+        if os.path.isdir(source.errors_dir):
+            for name in os.listdir(source.errors_dir):
+                _copy(os.path.join(source.errors_dir, name), os.path.join(target.errors_dir, name))
+
+    tasks, expected, shards = _union_tasks(sources)
+    payload: Dict[str, Any] = {
+        'summary': summarize(tasks),
+        'expected': expected,
+        'tasks': [task.to_dict() for task in tasks],
+        'merged-from': shards,
+    }
+    if problems:
+        payload['merge-disagreements'] = problems
+    with open(target.tasks_file, 'w') as handle:
+        json.dump(payload, handle, indent=2)
+
+    slugs = {task.task_id: task.slug for task in tasks}
+    pairs = [(tag, slugs.get(task_id, task_id)) for tag, task_ids in expected.items()
+             for task_id in task_ids]
+    missing = sum(1 for pair in pairs if pair not in best and pair not in markers)
+    print(f'Merged          : {len(sources)} sandboxes into {target.root}')
+    print(f'Results         : {len(best)} pairs'
+          + (f' ({duplicates} found more than once; the best kept)' if duplicates else '')
+          + (f', {stray} killed without a result' if stray else ''))
+    print(f'Expected        : {len(pairs)} pairs over {len(tasks)} tasks; '
+          f'{missing} with nothing from any sandbox (MISSING)')
+    if problems:
+        print(f'Disagreements   : {len(problems)} (merged with --force; see tasks.json)')
+    print(f'Analyze with    : pypmtevalcli analyze --sandbox-dir {target.root}')
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Results
+# ----------------------------------------------------------------------
+
+def _result_files(sandbox: Sandbox):
+    if not os.path.isdir(sandbox.results_dir):
+        return
+    for tag in sorted(os.listdir(sandbox.results_dir)):
+        directory = sandbox.planner_results_dir(tag)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.json') or name.endswith('.running'):
+                yield tag, name, os.path.join(directory, name)
+
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _rank(payload: Dict[str, Any]) -> tuple:
+    """Which of two results of one pair to keep: the larger."""
+    ran = payload.get('status') not in (ERROR, KILLED)
+    return ran, float((payload.get('run') or {}).get('started') or 0.0)
+
+
+def _note_setup(payload: Dict[str, Any], tag: str, root: str,
+                setups: Dict[str, Dict[str, List[str]]],
+                digests: Dict[str, Dict[str, List[str]]]) -> None:
+    fingerprint = payload.get('fingerprint') or {}
+    parts = fingerprint.get('parts') if isinstance(fingerprint, dict) else None
+    if isinstance(parts, dict):
+        setup = {key: value for key, value in parts.items() if key not in _TASK_PARTS}
+        task_id = (payload.get('task') or {}).get('task-id')
+        if task_id:
+            digest = f'{parts.get("domain-sha256")}/{parts.get("problem-sha256")}'
+            roots = digests.setdefault(task_id, {}).setdefault(digest, [])
+            if root not in roots:
+                roots.append(root)
+    else:
+        # From before fingerprints: the limits are all there is to compare.
+        setup = {'limits': payload.get('limits')}
+    text = json.dumps(setup, sort_keys=True, default=str)
+    roots = setups.setdefault(tag, {}).setdefault(text, [])
+    if root not in roots:
+        roots.append(root)
+
+
+def _disagreements(setups: Dict[str, Dict[str, List[str]]],
+                   digests: Dict[str, Dict[str, List[str]]]) -> List[str]:
+    lines = []
+    for tag, variants in sorted(setups.items()):
+        if len(variants) < 2:
+            continue
+        decoded = [(json.loads(text), roots) for text, roots in variants.items()]
+        keys = set().union(*(setup.keys() for setup, _roots in decoded))
+        differing = sorted(key for key in keys
+                           if len({json.dumps(setup.get(key), sort_keys=True, default=str)
+                                   for setup, _roots in decoded}) > 1)
+        where = '; '.join(', '.join(roots) for _setup, roots in decoded)
+        lines.append(f'{tag}: {len(decoded)} different setups ({", ".join(differing)}) '
+                     f'across {where}')
+    for task_id, variants in sorted(digests.items()):
+        if len(variants) > 1:
+            where = '; '.join(', '.join(roots) for roots in variants.values())
+            lines.append(f'{task_id}: different PDDL files across {where}')
+    return lines
+
+
+def _shard_key(payload: Dict[str, Any]) -> Tuple[str, Tuple[str, str]]:
+    """A shard record's planner tag, and its key as a result file's would be."""
+    tag = (payload.get('planner') or {}).get('tag') or ''
+    return tag, (tag, _slug((payload.get('task') or {}).get('task-id') or ''))
+
+
+def _copy(source: Any, destination: str) -> None:
+    """Copy the file `source`, or write the shard record `source` out as one."""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp = f'{destination}.tmp.{os.getpid()}'
+    if isinstance(source, dict):
+        with open(tmp, 'w') as handle:
+            json.dump(source, handle, indent=2, default=str)
+    else:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, destination)
+
+
+# ----------------------------------------------------------------------
+# tasks.json
+# ----------------------------------------------------------------------
+
+def _union_tasks(sources: List[Sandbox]):
+    """Tasks and expected pairs of every sandbox, in first-seen order, and where each came from."""
+    tasks: Dict[str, Task] = {}
+    expected: Dict[str, List[str]] = {}
+    seen: Dict[str, set] = {}
+    merged_from = []
+    for source in sources:
+        payload = _read(source.tasks_file) or {}
+        for entry in payload.get('tasks') or []:
+            task = Task(suite=entry.get('suite', ''), domain=entry.get('domain', ''),
+                        instance=entry.get('instance', ''),
+                        domain_file=entry.get('domain_file', ''),
+                        problem_file=entry.get('problem_file', ''),
+                        track=entry.get('track', ''), ipc=entry.get('ipc'))
+            tasks.setdefault(task.task_id, task)
+        section = payload.get('expected')
+        if not isinstance(section, dict):
+            # An older sandbox: every task, for every planner that has results.
+            tags = [tag for tag in sorted(os.listdir(source.results_dir))
+                    if os.path.isdir(source.planner_results_dir(tag))] \
+                if os.path.isdir(source.results_dir) else []
+            section = {tag: [entry.get('task_id') for entry in payload.get('tasks') or []]
+                       for tag in tags}
+        for tag, task_ids in section.items():
+            bucket = expected.setdefault(tag, [])
+            known = seen.setdefault(tag, set())
+            for task_id in task_ids:
+                if task_id not in known:
+                    known.add(task_id)
+                    bucket.append(task_id)
+        merged_from.append({'sandbox': source.root, 'shard': payload.get('shard')})
+    return list(tasks.values()), expected, merged_from
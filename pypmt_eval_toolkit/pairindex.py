@@ -0,0 +1,145 @@
+"""Pairs looked up by number: ``generate --indexed`` and ``solve --from-index``.
+
+A plain command file spells every pair out in full -- a dozen absolute paths
+and flags, the same on every line but two -- and each array element finds its
+line with ``sed -n "${LINE}p"``, which reads the file from the top. Over a
+50,000-pair sweep that is quadratic in the sweep's size, on a shared
+filesystem.
+
+With ``--indexed``, ``generate`` writes per planner
+
+* ``cmds/<tag>.pairs``: a JSON line of what every pair shares (planner
+  configuration, limits, sandbox directories), then one short JSON line per
+  pair, its ``task`` section and its own number;
+* ``cmds/<tag>.pairs.offsets``: where each of those lines starts, as
+  little-endian 64-bit integers.
+
+``solve --from-index cmds/<tag>.pairs --index N`` reads 8 bytes at ``8 * N``
+of the offsets, seeks to the pair's line and reads it, and the header line --
+a constant amount of I/O however large the sweep. The command files then hold
+``solve --from-index ... --index N --task-id ...`` instead of the full command,
+so ``run-local``, ``worker`` and ``solve-batch`` run them unchanged. The task
+id is checked against the pair found, so a command file left over from an
+earlier ``generate`` fails loudly rather than running the wrong pair.
+
+A slurm array element has no task id to check, only its number: every pair
+line carries its own, and a line found at an offset that is not pair `N`'s --
+offsets of an earlier index read over the pairs of a later one -- is refused
+the same way.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from typing import Any, Dict, Sequence
+
+FORMAT = 2
+_OFFSET = struct.Struct('<Q')
+
+# The header's keys and the ``solve`` arguments they set.
+_SETTINGS = {
+    'planner-cfg': 'planner_cfg',
+    'results-dir': 'results_dir',
+    'errors-dir': 'errors_dir',
+    'run-dir': 'run_dir',
+    'time-limit': 'time_limit',
+    'memory-limit': 'memory_limit',
+    'validate': 'validate',
+    'supervise': 'supervise',
+    'cache-dir': 'cache_dir',
+    'result-store': 'result_store',
+    'rung': 'rung',
+    'shard-dir': 'shard_dir',
+}
+
+
+class PairNotFound(LookupError):
+    """The pair asked for is not in the index, or is not the one expected."""
+
+
+def offsets_path(path: str) -> str:
+    return f'{path}.offsets'
+
+
+def write_index(path: str, settings: Dict[str, Any], tasks: Sequence[Dict[str, Any]]) -> None:
+    """Write `path` and its offsets; `tasks` are ``task`` sections, in index order.
+
+    Each line holds its pair's number beside the ``task`` section, which
+    :func:`read_task` checks and drops.
+    """
+    offsets = []
+    tmp = f'{path}.tmp.{os.getpid()}'
+    with open(tmp, 'wb') as handle:
+        handle.write(json.dumps(dict(settings, format=FORMAT)).encode() + b'\n')
+        for number, task in enumerate(tasks):
+            offsets.append(handle.tell())
+            handle.write(json.dumps({'pair': number, **task}, separators=(',', ':')).encode()
+                         + b'\n')
+    with open(f'{offsets_path(path)}.tmp.{os.getpid()}', 'wb') as handle:
+        handle.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+    # The pairs first, then their offsets: offsets are never in place before
+    # the pairs they index, and the offsets of an earlier index read over new
+    # pairs in between land on lines with other numbers, which `read_task`
+    # refuses.
+    os.replace(tmp, path)
+    os.replace(f'{offsets_path(path)}.tmp.{os.getpid()}', offsets_path(path))
+
+
+def read_settings(path: str) -> Dict[str, Any]:
+    """The header line: what every pair of the index shares."""
+    with open(path, 'rb') as handle:
+        return json.loads(handle.readline())
+
+
+def read_task(path: str, index: int) -> Dict[str, Any]:
+    """The ``task`` section of pair `index` (0-based).
+
+    Raises :class:`PairNotFound` when the offsets do not lead to that pair's line.
+    """
+    if index < 0:
+        raise PairNotFound(f'{path}: no pair {index}')
+    with open(offsets_path(path), 'rb') as handle:
+        handle.seek(index * _OFFSET.size)
+        raw = handle.read(_OFFSET.size)
+    if len(raw) < _OFFSET.size:
+        raise PairNotFound(f'{path}: no pair {index}')
+    with open(path, 'rb') as handle:
+        handle.seek(_OFFSET.unpack(raw)[0])
+        line = handle.readline()
+    try:
+        task = json.loads(line)
+    except ValueError:
+        task = None
+    # Indexes written before pairs were numbered (format 1) have no number to check.
+    if not isinstance(task, dict) or task.pop('pair', index) != index:
+        raise PairNotFound(f'{path}: the offsets do not lead to pair {index}; '
+                           f'was the sandbox generated again?')
+    return task
+
+
+def apply(args) -> None:
+    """Fill a ``solve`` namespace from ``--from-index``/``--index``; a no-op without them."""
+    path = getattr(args, 'from_index', None)
+    if not path:
+        return
+    if getattr(args, 'index', None) is None:
+        raise PairNotFound('--from-index needs --index')
+    settings = read_settings(path)
+    task = read_task(path, args.index)
+    if args.task_id and args.task_id != task.get('task-id'):
+        raise PairNotFound(f'{path}: pair {args.index} is {task.get("task-id")}, '
+                           f'not {args.task_id}; was the sandbox generated again?')
+    for key, dest in _SETTINGS.items():
+        if key in settings:
+            setattr(args, dest, settings[key])
+    args.task_id = task.get('task-id')
+    args.suite = task.get('suite') or ''
+    args.domain_name = task.get('domain') or ''
+    args.instance = task.get('instance') or ''
+    args.track = task.get('track') or ''
+    args.ipc = task.get('ipc')
+    args.domain = task.get('domain-file')
+    args.problem = task.get('problem-file')
+    args.from_index = None                     # applied; the batch child must not read it again
@@ -0,0 +1,242 @@
+"""What a process and everything it started is using, read from ``/proc``.
+
+``getrusage`` only sees the calling process and the children it has already
+waited for; an engine that shells out to a translator, a search binary or a
+JVM does its real work in processes the harness never reaps itself. These
+helpers walk the live process tree instead. They are Linux-only and degrade to
+empty answers elsewhere, so callers treat them as "best available", never as a
+hard requirement.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROC = '/proc'
+
+try:
+    _PAGE_MB = os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+    _CLOCK_TICKS = float(os.sysconf('SC_CLK_TCK'))
+except (AttributeError, ValueError, OSError):                # pragma: no cover -- not POSIX
+    _PAGE_MB = 4096 / (1024.0 * 1024.0)
+    _CLOCK_TICKS = 100.0
+
+
+def available() -> bool:
+    """Whether ``/proc`` looks like Linux's, i.e. whether anything here works."""
+    return os.path.isfile(os.path.join(PROC, 'self', 'stat'))
+
+
+def descendants(pid: int) -> List[int]:
+    """Every live descendant of `pid`, children before grandchildren.
+
+    One pass over ``/proc/*/stat`` for the parent links: the per-task
+    ``children`` file would be cheaper, but it needs a kernel option not every
+    cluster kernel is built with.
+    """
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir(PROC)
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        stat = _stat_fields(int(entry))
+        if stat is not None:
+            children.setdefault(int(stat[1]), []).append(int(entry))
+    found: List[int] = []
+    frontier = [pid]
+    while frontier:
+        parent = frontier.pop(0)
+        for child in children.get(parent, ()):
+            if child not in found:
+                found.append(child)
+                frontier.append(child)
+    return found
+
+
+def tree(pid: int) -> List[int]:
+    """`pid` itself followed by its descendants."""
+    return [pid] + descendants(pid)
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of one process, from ``/proc/<pid>/statm``."""
+    try:
+        with open(os.path.join(PROC, str(pid), 'statm'), 'r') as handle:
+            return int(handle.read().split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def pss_mb(pid: int) -> Optional[float]:
+    """Proportional set size of one process, from ``/proc/<pid>/smaps_rollup``.
+
+    Unlike RSS, shared pages are split between the processes that map them, so
+    PSS sums over a tree without counting a shared library once per process.
+    Needs Linux 4.14; ``None`` before that, or for a process we may not read.
+    """
+    try:
+        with open(os.path.join(PROC, str(pid), 'smaps_rollup'), 'r') as handle:
+            for line in handle:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU of one process *and* of the children it has reaped.
+
+    ``cutime``/``cstime`` are what makes a tree sum complete: a translator that
+    already exited is no longer in the tree, but its CPU time was folded into
+    its parent's when the parent waited for it.
+    """
+    stat = _stat_fields(pid)
+    if stat is None:
+        return None
+    try:
+        # utime, stime, cutime, cstime: fields 14-17 of proc(5).
+        return sum(int(value) for value in stat[11:15]) / _CLOCK_TICKS
+    except (ValueError, IndexError):
+        return None
+
+
+def tree_usage(pid: int) -> Dict[str, float]:
+    """Summed RSS and CPU time over `pid` and its live descendants."""
+    pids = tree(pid)
+    rss = [value for value in (rss_mb(p) for p in pids) if value is not None]
+    cpu = [value for value in (cpu_seconds(p) for p in pids) if value is not None]
+    return {'processes': len(rss), 'rss-mb': sum(rss), 'cpu-seconds': sum(cpu)}
+
+
+def io_bytes(pid: int) -> Dict[str, int]:
+    """``/proc/<pid>/io``: bytes read and written, by syscall and at the disk.
+
+    Children the process has reaped are folded in, as they are for CPU time.
+    Empty when the kernel does not expose it (``CONFIG_TASK_IO_ACCOUNTING``).
+    """
+    counters: Dict[str, int] = {}
+    try:
+        with open(os.path.join(PROC, str(pid), 'io'), 'r') as handle:
+            for line in handle:
+                key, _, value = line.partition(':')
+                if value.strip().isdigit():
+                    counters[key.strip()] = int(value)
+    except OSError:
+        return {}
+    return counters
+
+
+def directory_mb(path: str) -> float:
+    """Total size of the files under `path`; whatever vanished meanwhile counts as 0."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+    return total / (1024.0 * 1024.0)
+
+
+class Sampler(threading.Thread):
+    """Samples the memory of `pid` and its descendants in the background.
+
+    Keeps the peaks and a memory-over-time series. The series stays bounded
+    however long the run: whenever it reaches twice `max_points`, every other
+    point is dropped and the sampling stride doubles, so a 30-minute run and a
+    3-second one both end up with at most `max_points` evenly spaced points.
+    Peaks are taken from every sample, dropped or not.
+
+    Given a `directory` -- the run's scratch directory -- it also tracks the
+    peak size of what the run writes there.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.5, max_points: int = 200,
+                 directory: Optional[str] = None):
+        super().__init__(name='pypmteval-memory-sampler', daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.max_points = max(2, max_points)
+        self.directory = directory
+        self.peak_directory_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_pss_mb = 0.0
+        self.peak_processes = 0
+        self.samples = 0
+        self.points: List[List[float]] = []
+        self._stride = 1
+        self._origin = time.monotonic()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            self.sample()
+            if self._stopped.wait(self.interval):
+                return
+
+    def sample(self) -> None:
+        if self.directory:
+            self.peak_directory_mb = max(self.peak_directory_mb, directory_mb(self.directory))
+        pids = tree(self.pid)
+        rss = [value for value in (rss_mb(p) for p in pids) if value is not None]
+        pss = [value for value in (pss_mb(p) for p in pids) if value is not None]
+        if not rss:
+            return
+        total_rss, total_pss = sum(rss), sum(pss)
+        self.peak_rss_mb = max(self.peak_rss_mb, total_rss)
+        self.peak_pss_mb = max(self.peak_pss_mb, total_pss)
+        self.peak_processes = max(self.peak_processes, len(rss))
+        if self.samples % self._stride == 0:
+            self.points.append([round(time.monotonic() - self._origin, 2),
+                                round(total_rss, 1), round(total_pss, 1) if pss else None])
+            if len(self.points) >= 2 * self.max_points:
+                self.points = self.points[::2]
+                self._stride *= 2
+        self.samples += 1
+
+    def stop(self) -> None:
+        """Take a last sample and stop; safe to call more than once."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout=2 * self.interval + 1)
+        self.sample()
+
+    def series(self) -> Dict[str, object]:
+        """The downsampled series, as stored in a result file."""
+        points = self.points
+        if len(points) > self.max_points:
+            points = points[::2]
+        return {'interval-seconds': self.interval * self._stride,
+                'columns': ['seconds', 'rss-mb', 'pss-mb'],
+                'points': points}
+
+
+def _stat_fields(pid: int) -> Optional[List[str]]:
+    """``/proc/<pid>/stat`` from the state field on: ``[state, ppid, ...]``.
+
+    The command name sits in parentheses and may itself contain spaces or
+    parentheses, so the split happens after the *last* closing one.
+    """
+    try:
+        with open(os.path.join(PROC, str(pid), 'stat'), 'r') as handle:
+            text = handle.read()
+    except OSError:
+        return None
+    return text.rsplit(')', 1)[-1].split()
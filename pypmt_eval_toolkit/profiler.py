@@ -0,0 +1,204 @@
+"""Where a solve spends its CPU: ``solve --profile`` and ``profile-report``.
+
+pyPMT's encoders, and a good part of any UP engine, are pure Python. When a
+sweep gets slower there is no telling from the result files which function
+did; a profile of every run can.
+
+``solve --profile`` (or ``"profile": true`` in a planner configuration) runs a
+statistical sampler around the engine: a ``SIGPROF`` interval timer, so the
+samples follow CPU time rather than wall time, and a handler that records the
+interpreter's stack. It costs a stack walk every 10 ms of CPU -- about one per
+cent -- where ``cProfile`` would trace every call and slow a Python encoder
+down several-fold, distorting exactly what it measures. What it does not see
+is a subprocess: an engine that shells out shows up as time spent waiting.
+
+Each run leaves ``<task>.folded`` next to its result JSON, in the collapsed
+stack format flame-graph tools read (``frame;frame;frame count`` per line).
+``profile-report`` merges those across every task of a planner (or of each of
+its domains) into one ``.folded`` file and a ranked table of hot functions.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds of CPU between two samples.
+DEFAULT_INTERVAL = 0.01
+
+
+class StackSampler:
+    """Counts the Python stacks the main thread is in, every `interval` of CPU.
+
+    Stacks are recorded from the frame that started the sampler inwards, so the
+    harness's own entry point does not prefix every line.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.running = False
+        self._root = None
+        self._previous = None
+        self._labels: Dict[object, str] = {}
+
+    def start(self) -> None:
+        self._root = sys._getframe(1)
+        self._previous = signal.signal(signal.SIGPROF, self._handle)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+        self.running = False
+        self._root = None
+
+    def write(self, path: str) -> None:
+        """The collapsed stacks, heaviest first."""
+        tmp = f'{path}.tmp.{os.getpid()}'
+        with open(tmp, 'w') as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f'{";".join(stack)} {count}\n')
+        os.replace(tmp, path)
+
+    def _handle(self, signum, frame) -> None:                # noqa: ARG002
+        stack = []
+        while frame is not None and frame is not self._root:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            stack.append(label)
+            frame = frame.f_back
+        if stack:
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+
+def _label(code) -> str:
+    """``package.module:Class.function``; stable across runs and machines."""
+    name = getattr(code, 'co_qualname', code.co_name)        # co_qualname: Python 3.11
+    return f'{module_name(code.co_filename)}:{name}'.replace(';', ',').replace(' ', '_')
+
+
+_MODULES: Dict[str, str] = {}
+
+
+def module_name(filename: str) -> str:
+    """The dotted module a file is imported as, judged from ``sys.path``."""
+    cached = _MODULES.get(filename)
+    if cached is not None:
+        return cached
+    best = ''
+    for entry in sys.path:
+        entry = os.path.abspath(entry or '.')
+        if filename.startswith(entry + os.sep) and len(entry) > len(best):
+            best = entry
+    relative = filename[len(best) + 1:] if best else os.path.basename(filename)
+    module = os.path.splitext(relative)[0].replace(os.sep, '.')
+    if module.endswith('.__init__'):
+        module = module[:-len('.__init__')]
+    _MODULES[filename] = module
+    return module
+
+
+# ----------------------------------------------------------------------
+# profile-report
+# ----------------------------------------------------------------------
+
+def profile_report(args) -> int:
+    sandbox = os.path.abspath(os.path.expanduser(args.sandbox_dir))
+    results_dir = args.results_dir or os.path.join(sandbox, 'results')
+    out_dir = args.output_dir or os.path.join(sandbox, 'profiles')
+
+    groups: Dict[str, Counter] = {}
+    runs: Counter = Counter()
+    for planner, domain, path in _profiles(results_dir):
+        if args.planners and planner not in args.planners:
+            continue
+        key = planner if args.by == 'planner' else os.path.join(planner, domain or 'unknown')
+        stacks = groups.setdefault(key, Counter())
+        for stack, count in read_folded(path):
+            stacks[stack] += count
+        runs[key] += 1
+    if not groups:
+        print(f'No profiles under {results_dir} (run solve with --profile, '
+              f'or set "profile": true in the planner configuration)')
+        return 1
+
+    for key in sorted(groups):
+        stacks = groups[key]
+        base = os.path.join(out_dir, key)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        with open(f'{base}.folded', 'w') as handle:
+            for stack, count in stacks.most_common():
+                handle.write(f'{";".join(stack)} {count}\n')
+        table = _hot_table(key, stacks, runs[key], args.top)
+        with open(f'{base}.txt', 'w') as handle:
+            handle.write(table + '\n')
+        print(table)
+        print()
+    print(f'Profiles: {out_dir} ({len(groups)} group(s); .folded for flame graphs, .txt tables)')
+    return 0
+
+
+def read_folded(path: str) -> Iterable[Tuple[Tuple[str, ...], int]]:
+    """``(stack, count)`` pairs of a collapsed-stack file; bad lines are skipped."""
+    try:
+        with open(path, 'r') as handle:
+            for line in handle:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    yield tuple(stack.split(';')), int(count)
+    except OSError:
+        return
+
+
+def _profiles(results_dir: str) -> Iterable[Tuple[str, Optional[str], str]]:
+    """``(planner, domain, path)`` of every ``.folded`` file under `results_dir`.
+
+    Planner and domain come from the result JSON beside the profile; the
+    directory name stands in for the planner when there is none.
+    """
+    for dirpath, _dirnames, filenames in os.walk(results_dir):
+        for name in sorted(filenames):
+            if not name.endswith('.folded'):
+                continue
+            path = os.path.join(dirpath, name)
+            planner, domain = os.path.basename(dirpath), None
+            try:
+                with open(path[:-len('.folded')] + '.json', 'r') as handle:
+                    payload = json.load(handle)
+                planner = (payload.get('planner') or {}).get('tag') or planner
+                domain = (payload.get('task') or {}).get('domain')
+            except (OSError, json.JSONDecodeError):
+                pass
+            yield planner, domain, path
+
+
+def _hot_table(title: str, stacks: Counter, runs: int, top: int) -> str:
+    """Functions ranked by self time, with their inclusive time beside it."""
+    total = sum(stacks.values())
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for frame in set(stack):
+            inclusive[frame] += count
+    lines = [f'{title}: {total} samples over {runs} run(s)', '',
+             f'{"self %":>8}{"total %":>9}{"samples":>9}  function',
+             '-' * 78]
+    ranked: List[Tuple[str, int]] = own.most_common(top)
+    for frame, count in ranked:
+        lines.append(f'{100.0 * count / total:>8.1f}{100.0 * inclusive[frame] / total:>9.1f}'
+                     f'{count:>9}  {frame}')
+    return '\n'.join(lines)
@@ -26,12 +26,15 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from collections import Counter, defaultdict
-from math import log10
+from itertools import chain
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from .analyzer import MISSING, is_solved, load_rows
-from .runner import ERROR, EXHAUSTED, KILLED, MEMOUT, SOLVED, TIMEOUT, UNSOLVABLE, UNSUPPORTED
+from .analyzer import DEFAULT_JOBS, MISSING, is_solved, iter_rows
+from .columns import Columns
+from .runner import (ERROR, EXHAUSTED, KILLED, MEMOUT, SKIPPED_PREDICTED, SOLVED, TIMEOUT,
+                     UNSOLVABLE, UNSUPPORTED)
 
 # -- palette (validated: worst adjacent CVD dE 9.1, worst all-pairs 9.2) ------
 SERIES = ['#2a78d6', '#eb6834', '#1baf7a', '#eda100', '#e87ba4', '#008300']
@@ -49,9 +52,11 @@ STATUS_COLORS = {
     EXHAUSTED: '#898781',
     UNSOLVABLE: '#52514e',
     UNSUPPORTED: '#c3c2b7',
+    SKIPPED_PREDICTED: '#d9d7cc',
     MISSING: '#e1e0d9',
 }
-STATUS_ORDER = [SOLVED, TIMEOUT, MEMOUT, EXHAUSTED, UNSOLVABLE, UNSUPPORTED, ERROR, KILLED, MISSING]
+STATUS_ORDER = [SOLVED, TIMEOUT, MEMOUT, EXHAUSTED, UNSOLVABLE, UNSUPPORTED, ERROR, KILLED,
+                SKIPPED_PREDICTED, MISSING]
 
 INK = '#0b0b0b'
 INK_MUTED = '#898781'
@@ -63,41 +68,76 @@ MIN_TIME = 0.1                  # floor for log axes and for the IPC time score
 
 
 def report(args) -> int:
+    from .cube import Cube, cube_path, refresh
+
     sandbox = os.path.abspath(os.path.expanduser(args.sandbox_dir))
-    rows = load_rows(sandbox, args.results_dir)
-    if not rows:
-        print(f'No results found under {args.results_dir or os.path.join(sandbox, "results")}')
-        return 1
+    basis = getattr(args, 'runtime', None) or 'total'
+    rows: List[Dict[str, Any]] = []
+    if args.from_cube:
+        cube = Cube.load(cube_path(sandbox))
+        if not cube.pairs:
+            print(f'No cube at {cube_path(sandbox)}; run analyze (or report without --from-cube)')
+            return 1
+    else:
+        jobs = args.jobs or DEFAULT_JOBS
+        started = time.monotonic()
+        loading = iter_rows(sandbox, args.results_dir, memory_series=not args.no_plots,
+                            database=not args.no_database, jobs=jobs)
+        first = next(loading, None)
+        if first is None:
+            print(f'Loaded  : 0 pairs in {time.monotonic() - started:.1f}s ({jobs} reader(s))')
+            print(f'No results found under '
+                  f'{args.results_dir or os.path.join(sandbox, "results")}')
+            return 1
+        # Only the figures need the rows themselves; the tables need the cube.
+        loading = chain([first], loading)
+        if not args.no_plots:
+            rows = list(loading)
+            _use_runtime(rows, basis)
+        cube = refresh(sandbox, args.results_dir, rows or loading)
+        print(f'Loaded  : {len(rows) or len(cube.pairs)} pairs in '
+              f'{time.monotonic() - started:.1f}s ({jobs} reader(s))')
 
     out_dir = args.output_dir or os.path.join(sandbox, 'report')
     os.makedirs(out_dir, exist_ok=True)
 
-    planners = sorted({r['planner'] for r in rows if r['planner']})
-    tracks = [t for t in ('classical', 'numeric', 'temporal')
-              if t in {r['track'] for r in rows}]
+    # The tables are rendered from the cube's pairs and scores; the figures from the rows.
+    columns = Columns(cube.rows(basis), is_solved)
+    planners = columns.present('planner')
+    tracks = [t for t in ('classical', 'numeric', 'temporal') if t in columns.levels['track']]
+    fallbacks = cube.fallbacks(basis)
+    scores = cube.scores(planners, basis)
 
     text_sections: List[str] = []
-    text_sections.append(_coverage_table(rows, planners, tracks))
-    text_sections.append(_outcome_table(rows, planners))
-    text_sections.append(_score_table(rows, planners, tracks))
-    text_sections.append(_per_domain_table(rows, planners))
+    text_sections.append(_coverage_table(columns, planners, tracks))
+    text_sections.append(_outcome_table(columns, planners))
+    text_sections.append(_score_table(scores, columns, planners))
+    text_sections.append(_per_domain_table(columns, planners))
     text = '\n'.join(text_sections)
 
     _write(os.path.join(out_dir, 'results.txt'), text)
     _write(os.path.join(out_dir, 'coverage.tex'),
-           _coverage_latex(rows, planners, tracks))
+           _coverage_latex(columns, planners, tracks))
     _write(os.path.join(out_dir, 'per-domain-coverage.tex'),
-           _per_domain_latex(rows, planners))
-    _write(os.path.join(out_dir, 'outcomes.tex'), _outcome_latex(rows, planners))
+           _per_domain_latex(columns, planners))
+    _write(os.path.join(out_dir, 'outcomes.tex'), _outcome_latex(columns, planners))
+    summary = _machine_summary(scores, columns, planners, tracks)
+    summary['runtime'] = basis
     with open(os.path.join(out_dir, 'report.json'), 'w') as handle:
-        json.dump(_machine_summary(rows, planners, tracks), handle, indent=2)
+        json.dump(summary, handle, indent=2)
 
     print(text)
+    print(f'Runtime : {basis} time' + (
+        f' ({fallbacks} result(s) predate timings.phases and use '
+        f'{RUNTIMES[basis][1].replace("_seconds", "")} time)' if fallbacks else ''))
     print(f'Tables  : {out_dir}')
 
     if args.no_plots:
         print('Plots   : skipped (--no-plots)')
         return 0
+    if args.from_cube:
+        print('Plots   : skipped -- the figures need the results, not only the cube')
+        return 0
     figures = _plots(rows, planners, tracks, os.path.join(out_dir, 'plots'),
                      formats=[f.strip() for f in args.formats.split(',') if f.strip()])
     if figures is None:
@@ -123,8 +163,30 @@ def _cost(row: Dict[str, Any]) -> Optional[float]:
     return None
 
 
+# `report --runtime`: which time the cactus plots, scatters and IPC time score
+# rank by, and what stands in for it in results written before `timings.phases`.
+RUNTIMES = {
+    'total': ('total_seconds', 'total_seconds'),
+    'end-to-end': ('end_to_end_seconds', 'total_seconds'),
+    'search': ('search_seconds', 'solve_seconds'),
+}
+
+
+def _use_runtime(rows: Sequence[Dict[str, Any]], basis: str) -> int:
+    """Set each row's ``runtime_seconds`` to the `basis` time; count fallbacks."""
+    column, fallback = RUNTIMES[basis]
+    missing = 0
+    for row in rows:
+        value = row.get(column)
+        if value is None and row.get(fallback) is not None:
+            value = row[fallback]
+            missing += 1
+        row['runtime_seconds'] = value
+    return missing
+
+
 def _runtime(row: Dict[str, Any]) -> Optional[float]:
-    value = row.get('total_seconds')
+    value = row.get('runtime_seconds', row.get('total_seconds'))
     return max(float(value), MIN_TIME) if value is not None else None
 
 
@@ -133,118 +195,103 @@ def _time_limit(rows: Sequence[Dict[str, Any]]) -> float:
     return float(max(limits)) if limits else 1800.0
 
 
-def _solved_index(rows: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
-    """``task_id -> planner -> row`` over solved rows only."""
-    index: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
-    for row in rows:
-        if is_solved(row) and row['task_id']:
-            index[row['task_id']][row['planner']] = row
-    return index
-
-
-def _ipc_scores(rows: Sequence[Dict[str, Any]],
-                planners: Sequence[str]) -> Dict[str, Dict[str, float]]:
-    """IPC time and quality scores.
-
-    Quality follows the satisficing-track rule (``best_cost / cost``, 0 when
-    unsolved); time follows the agile-track rule
-    (``1 / (1 + log10(t / t_best))``, 0 when unsolved). Both are summed over
-    instances, so the maximum a planner can reach is the instance count.
-    """
-    index = _solved_index(rows)
-    scores = {p: {'time': 0.0, 'quality': 0.0} for p in planners}
-    for _task_id, by_planner in index.items():
-        times = {p: _runtime(r) for p, r in by_planner.items() if _runtime(r) is not None}
-        costs = {p: _cost(r) for p, r in by_planner.items() if _cost(r) not in (None, 0)}
-        if times:
-            best = min(times.values())
-            for planner, value in times.items():
-                scores[planner]['time'] += 1.0 / (1.0 + log10(value / best))
-        if costs:
-            best = min(costs.values())
-            for planner, value in costs.items():
-                scores[planner]['quality'] += best / value
-    return scores
-
-
 # ----------------------------------------------------------------------
 # Text tables
 # ----------------------------------------------------------------------
 
-def _coverage_table(rows, planners, tracks) -> str:
+def _coverage_table(columns, planners, tracks) -> str:
     lines = ['=' * 78, 'Coverage (solved and validated / instances)', '=' * 78, '']
     header = f'{"planner":<26}' + ''.join(f'{t:>16}' for t in tracks) + f'{"total":>16}'
     lines += [header, '-' * len(header)]
+    attempted, solved = _track_counts(columns)
     for planner in planners:
-        subset = [r for r in rows if r['planner'] == planner]
-        cells = [_cell(subset, track) for track in tracks] + [_cell(subset, None)]
+        cells = [_cell(solved.get((planner, track), 0), attempted.get((planner, track), 0))
+                 for track in list(tracks) + [None]]
         lines.append(f'{planner:<26}' + ''.join(f'{c:>16}' for c in cells))
     return '\n'.join(lines) + '\n'
 
 
-def _cell(rows, track: Optional[str]) -> str:
-    subset = [r for r in rows if track is None or r['track'] == track]
-    if not subset:
+def _track_counts(columns) -> Tuple[Dict[Tuple[str, Optional[str]], int], ...]:
+    """Attempted and solved pairs per (planner, track), and per (planner, None) over all tracks."""
+    counts = []
+    for where in (None, columns.solved):
+        by_track = {key: count for key, count in columns.count(('planner', 'track'),
+                                                               where=where).items()
+                    if key[1] is not None}
+        for (planner,), count in columns.count(('planner',), where=where).items():
+            by_track[(planner, None)] = count
+        counts.append(by_track)
+    return tuple(counts)
+
+
+def _cell(solved: int, attempted: int) -> str:
+    if not attempted:
         return '-'
-    solved = sum(1 for r in subset if is_solved(r))
-    return f'{solved}/{len(subset)} ({100.0 * solved / len(subset):.0f}%)'
+    return f'{solved}/{attempted} ({100.0 * solved / attempted:.0f}%)'
 
 
-def _outcome_table(rows, planners) -> str:
-    statuses = [s for s in STATUS_ORDER if s in {r['status'] for r in rows}]
+def _outcome_table(columns, planners) -> str:
+    statuses = [s for s in STATUS_ORDER if s in columns.levels['status']]
     lines = ['', 'Outcomes', '']
     header = f'{"planner":<26}' + ''.join(f'{s[:11]:>13}' for s in statuses)
     lines += [header, '-' * len(header)]
+    counts = columns.count(('planner', 'status'))
     for planner in planners:
-        counts = Counter(r['status'] for r in rows if r['planner'] == planner)
-        lines.append(f'{planner:<26}' + ''.join(f'{counts.get(s, 0):>13}' for s in statuses))
+        lines.append(f'{planner:<26}' +
+                     ''.join(f'{counts.get((planner, s), 0):>13}' for s in statuses))
+    predicted = columns.count(('status',)).get((SKIPPED_PREDICTED,), 0)
+    if predicted:
+        lines += ['', f'{predicted} of these outcomes were predicted, not measured: '
+                      f'{SKIPPED_PREDICTED} pairs were not run (run-local --cutoff).']
     return '\n'.join(lines) + '\n'
 
 
-def _score_table(rows, planners, tracks) -> str:
-    scores = _ipc_scores(rows, planners)
-    instances = len({r['task_id'] for r in rows if r['task_id']})
+def _score_table(scores, columns, planners) -> str:
+    instances = len(columns.present('task_id'))
     lines = ['', f'IPC scores (out of {instances} instances) and runtime on solved tasks', '']
     header = (f'{"planner":<26}{"quality":>10}{"time":>10}{"solved":>9}'
               f'{"mean s":>10}{"median s":>10}{"max s":>10}{"mean MB":>10}')
     lines += [header, '-' * len(header)]
+    solved = columns.count(('planner',), where=columns.solved)
+    times = columns.values('runtime_seconds', ('planner',), where=columns.solved)
+    memory = columns.values('peak_memory_mb', ('planner',), where=columns.solved)
     for planner in planners:
-        solved = [r for r in rows if r['planner'] == planner and is_solved(r)]
-        times = [_runtime(r) for r in solved if _runtime(r) is not None]
-        memory = [r['peak_memory_mb'] for r in solved if r['peak_memory_mb'] is not None]
+        planner_times = [max(value, MIN_TIME) for value in times.get((planner,), [])]
         lines.append(
             f'{planner:<26}{scores[planner]["quality"]:>10.2f}{scores[planner]["time"]:>10.2f}'
-            f'{len(solved):>9}{_fmt(_mean(times)):>10}{_fmt(_median(times)):>10}'
-            f'{_fmt(max(times) if times else None):>10}{_fmt(_mean(memory)):>10}')
+            f'{solved.get((planner,), 0):>9}{_fmt(_mean(planner_times)):>10}'
+            f'{_fmt(_median(planner_times)):>10}'
+            f'{_fmt(max(planner_times) if planner_times else None):>10}'
+            f'{_fmt(_mean(memory.get((planner,), []))):>10}')
     return '\n'.join(lines) + '\n'
 
 
-def _per_domain_table(rows, planners) -> str:
+def _per_domain_table(columns, planners) -> str:
     lines = ['', 'Per-domain coverage', '']
     header = f'{"track":<10}{"domain":<34}' + ''.join(f'{p[:14]:>16}' for p in planners)
     lines += [header, '-' * len(header)]
-    for track, domain, per_planner, total in _domain_rows(rows, planners):
+    for track, domain, per_planner, total in _domain_rows(columns, planners):
         cells = ''.join(f'{f"{n}/{total}":>16}' for n in per_planner)
         lines.append(f'{track:<10}{domain[:33]:<34}{cells}')
-    totals = [sum(1 for r in rows if r['planner'] == p and is_solved(r)) for p in planners]
-    attempted = [sum(1 for r in rows if r['planner'] == p) for p in planners]
+    attempted, solved = _track_counts(columns)
     lines.append('-' * len(header))
     lines.append(f'{"":<10}{"total":<34}' +
-                 ''.join(f'{f"{s}/{a}":>16}' for s, a in zip(totals, attempted)))
+                 ''.join(f'{f"{solved.get((p, None), 0)}/{attempted.get((p, None), 0)}":>16}'
+                         for p in planners))
     return '\n'.join(lines) + '\n'
 
 
-def _domain_rows(rows, planners) -> List[Tuple[str, str, List[int], int]]:
-    grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
-    for row in rows:
-        grouped[(row['track'] or '', row['domain'] or '')].append(row)
+def _domain_rows(columns, planners) -> List[Tuple[str, str, List[int], int]]:
+    attempted: Dict[Tuple[str, str, Any], int] = Counter()
+    solved: Dict[Tuple[str, str, Any], int] = Counter()
+    for where, into in ((None, attempted), (columns.solved, solved)):
+        for (track, domain, planner), count in columns.count(('track', 'domain', 'planner'),
+                                                             where=where).items():
+            into[(track or '', domain or '', planner)] += count
     out = []
-    for (track, domain), domain_rows in sorted(grouped.items()):
-        per_planner, total = [], 0
-        for planner in planners:
-            subset = [r for r in domain_rows if r['planner'] == planner]
-            per_planner.append(sum(1 for r in subset if is_solved(r)))
-            total = max(total, len(subset))
+    for track, domain in sorted({(track, domain) for track, domain, _planner in attempted}):
+        per_planner = [solved[(track, domain, planner)] for planner in planners]
+        total = max((attempted[(track, domain, planner)] for planner in planners), default=0)
         out.append((track, domain, per_planner, total))
     return out
 
@@ -277,59 +324,64 @@ def _latex_table(caption: str, label: str, column_spec: str,
     return '\n'.join(lines)
 
 
-def _coverage_latex(rows, planners, tracks) -> str:
+def _coverage_latex(columns, planners, tracks) -> str:
     header = ['Planner'] + [t.capitalize() for t in tracks] + ['Total']
+    attempted, solved = _track_counts(columns)
     body = []
     for planner in planners:
-        subset = [r for r in rows if r['planner'] == planner]
-        cells = []
-        for track in list(tracks) + [None]:
-            scoped = [r for r in subset if track is None or r['track'] == track]
-            solved = sum(1 for r in scoped if is_solved(r))
-            cells.append(f'{solved} / {len(scoped)}' if scoped else '--')
+        cells = [f'{solved.get((planner, track), 0)} / {attempted[(planner, track)]}'
+                 if attempted.get((planner, track)) else '--'
+                 for track in list(tracks) + [None]]
         body.append([_tex(planner)] + cells)
     return _latex_table('Coverage per track (solved and validated / instances).',
                         'tab:coverage', 'l' + 'r' * (len(tracks) + 1), header, body)
 
 
-def _outcome_latex(rows, planners) -> str:
-    statuses = [s for s in STATUS_ORDER if s in {r['status'] for r in rows}]
+def _outcome_latex(columns, planners) -> str:
+    statuses = [s for s in STATUS_ORDER if s in columns.levels['status']]
     header = ['Planner'] + [s.capitalize() for s in statuses]
-    body = []
-    for planner in planners:
-        counts = Counter(r['status'] for r in rows if r['planner'] == planner)
-        body.append([_tex(planner)] + [str(counts.get(s, 0)) for s in statuses])
-    return _latex_table('Outcome breakdown per planner.', 'tab:outcomes',
+    counts = columns.count(('planner', 'status'))
+    body = [[_tex(planner)] + [str(counts.get((planner, s), 0)) for s in statuses]
+            for planner in planners]
+    caption = 'Outcome breakdown per planner.'
+    if SKIPPED_PREDICTED in statuses:
+        caption += (' Skipped-predicted instances were not run: the planner had run out of time or'
+                    ' memory on the smaller instances of their domain.')
+    return _latex_table(caption, 'tab:outcomes',
                         'l' + 'r' * len(statuses), header, body)
 
 
-def _per_domain_latex(rows, planners) -> str:
+def _per_domain_latex(columns, planners) -> str:
     header = ['Track', 'Domain', '\\#'] + [_tex(p) for p in planners]
     body = [[track, _tex(domain), str(total)] + [str(n) for n in per_planner]
-            for track, domain, per_planner, total in _domain_rows(rows, planners)]
-    totals = [str(sum(1 for r in rows if r['planner'] == p and is_solved(r))) for p in planners]
-    attempted = max((sum(1 for r in rows if r['planner'] == p) for p in planners), default=0)
-    footer = ['', '\\textbf{Total}', str(attempted)] + [f'\\textbf{{{t}}}' for t in totals]
+            for track, domain, per_planner, total in _domain_rows(columns, planners)]
+    attempted, solved = _track_counts(columns)
+    totals = [str(solved.get((p, None), 0)) for p in planners]
+    most = max((attempted.get((p, None), 0) for p in planners), default=0)
+    footer = ['', '\\textbf{Total}', str(most)] + [f'\\textbf{{{t}}}' for t in totals]
     return _latex_table('Coverage per domain; \\# is the number of instances.',
                         'tab:per-domain', 'll r' + ' r' * len(planners), header, body, footer)
 
 
-def _machine_summary(rows, planners, tracks) -> Dict[str, Any]:
-    scores = _ipc_scores(rows, planners)
-    summary: Dict[str, Any] = {'instances': len({r['task_id'] for r in rows if r['task_id']}),
+def _machine_summary(scores, columns, planners, tracks) -> Dict[str, Any]:
+    attempted, solved = _track_counts(columns)
+    outcomes = columns.count(('planner', 'status'))
+    summary: Dict[str, Any] = {'instances': len(columns.present('task_id')),
                                'tracks': list(tracks), 'planners': {}}
     for planner in planners:
-        subset = [r for r in rows if r['planner'] == planner]
+        planner_outcomes = {status: count for (p, status), count
+                            in sorted(outcomes.items(), key=str) if p == planner}
         summary['planners'][planner] = {
-            'attempted': len(subset),
-            'solved': sum(1 for r in subset if is_solved(r)),
-            'outcomes': dict(Counter(r['status'] for r in subset)),
+            'attempted': attempted.get((planner, None), 0),
+            'solved': solved.get((planner, None), 0),
+            'outcomes': planner_outcomes,
+            'predicted': planner_outcomes.get(SKIPPED_PREDICTED, 0),
             'ipc-quality-score': round(scores[planner]['quality'], 3),
             'ipc-time-score': round(scores[planner]['time'], 3),
             'per-track': {
                 track: {
-                    'attempted': len([r for r in subset if r['track'] == track]),
-                    'solved': sum(1 for r in subset if r['track'] == track and is_solved(r)),
+                    'attempted': attempted.get((planner, track), 0),
+                    'solved': solved.get((planner, track), 0),
                 } for track in tracks
             },
         }
@@ -361,6 +413,7 @@ def _plots(rows, planners, tracks, plots_dir: str, formats: Sequence[str]) -> Op
     if len(tracks) > 1:
         written.append(_survival_facets(plt, rows, line_planners, tracks, plots_dir, formats))
     written.append(_memory_survival_plot(plt, rows, line_planners, plots_dir, formats))
+    written.append(_memory_growth_plot(plt, rows, line_planners, plots_dir, formats))
     written.append(_coverage_bars(plt, rows, line_planners, tracks, plots_dir, formats))
     written.append(_outcome_bars(plt, rows, planners, plots_dir, formats))
 
@@ -504,6 +557,44 @@ def _memory_survival_plot(plt, rows, planners, plots_dir, formats) -> str:
     return _save(fig, plots_dir, 'memory-survival', formats)
 
 
+def _memory_growth_plot(plt, rows, planners, plots_dir, formats) -> str:
+    """Memory of the process tree over time, one facet per planner.
+
+    One thin line per run, in its outcome's color, against the memory limit:
+    what ``memorylimit`` and the slurm headroom should be sized from.
+    """
+    drawn = [p for p in planners
+             if any(r.get('memory_series') for r in rows if r['planner'] == p)]
+    if not drawn:
+        return ''
+    fig, axes = plt.subplots(1, len(drawn), figsize=(3.1 * len(drawn), 3.0),
+                             sharey=True, squeeze=False)
+    axes = axes[0]
+    limits = [r['memory_limit'] for r in rows if r.get('memory_limit')]
+    seen = set()
+    for ax, planner in zip(axes, drawn):
+        for row in rows:
+            series = row.get('memory_series')
+            if row['planner'] != planner or not series:
+                continue
+            status = row['status'] if row['status'] in (SOLVED, TIMEOUT, MEMOUT) else ERROR
+            ax.plot([t for t, _mb in series], [mb for _t, mb in series],
+                    color=STATUS_COLORS[status], linewidth=0.8, alpha=0.5)
+            seen.add(status)
+        if limits:
+            ax.axhline(max(limits), color=INK_MUTED, linewidth=0.8, dashes=(4, 2))
+        ax.set_title(planner)
+        ax.set_xlabel('time (s)')
+    axes[0].set_ylabel('resident memory of the tree (MB)')
+    from matplotlib.lines import Line2D
+    axes[-1].legend(handles=[Line2D([], [], color=STATUS_COLORS[status], label=status.lower())
+                             for status in (SOLVED, TIMEOUT, MEMOUT, ERROR) if status in seen],
+                    loc='upper left')
+    fig.suptitle('Memory growth per run (dashed: memory limit)', y=1.02)
+    fig.tight_layout()
+    return _save(fig, plots_dir, 'memory-growth', formats)
+
+
 def _coverage_bars(plt, rows, planners, tracks, plots_dir, formats) -> str:
     fig, ax = plt.subplots(figsize=(5.4, 3.2))
     width = 0.8 / max(1, len(planners))
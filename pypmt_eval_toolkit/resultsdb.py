@@ -0,0 +1,218 @@
+"""The sandbox's results as a SQLite database: ``pypmtevalcli ingest``.
+
+``analyze`` and ``report`` used to walk ``results/`` and parse every result
+file on every run. On a sweep of a million pairs that is minutes before the
+first line of output, spent mostly re-reading files nothing has touched since
+the last time.
+
+``<sandbox>/results.sqlite`` keeps what they need, and ``ingest`` (which
+``analyze`` and ``report`` run first) brings it up to date:
+
+* ``files`` has the modification time and size of every result file, marker
+  and shard last read. Only files that are new or whose time or size changed
+  are parsed again; the rows of files that are gone are dropped.
+* ``entries`` has one row per result or marker found: which file it came
+  from, the pair, when the run started, and the analyzer's flat row for it as
+  JSON (the memory series separately, since ``report`` is the only reader).
+* ``pairs`` has one row per (planner, task): the entry that counts -- the
+  latest result, or the latest marker as ``KILLED`` when there is no result --
+  with its planner, track, domain and status as indexed columns.
+
+Loading a sweep is then one query over ``pairs``. The database is rebuilt
+from scratch when it was written by another version of the toolkit, since the
+flat row may have changed. A sandbox where it cannot be written (read-only,
+or a filesystem without working locks) is read straight from the files, as
+before.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from . import __version__
+from .analyzer import DEFAULT_JOBS, _memory_series, _row, bounded_map, read_result, skip_keys
+from .runner import KILLED
+from .shards import RESULT, START, read as read_shard
+
+DATABASE = 'results.sqlite'
+SCHEMA = 1
+
+_TABLES = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+CREATE TABLE IF NOT EXISTS entries (
+    source TEXT, planner TEXT, task_id TEXT, result INTEGER, started REAL,
+    row TEXT, series TEXT);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source);
+CREATE INDEX IF NOT EXISTS entries_pair ON entries (planner, task_id);
+CREATE TABLE IF NOT EXISTS pairs (
+    planner TEXT, task_id TEXT, track TEXT, domain TEXT, status TEXT, row TEXT, series TEXT,
+    PRIMARY KEY (planner, task_id));
+CREATE INDEX IF NOT EXISTS pairs_planner ON pairs (planner);
+CREATE INDEX IF NOT EXISTS pairs_track ON pairs (track);
+CREATE INDEX IF NOT EXISTS pairs_domain ON pairs (domain);
+CREATE INDEX IF NOT EXISTS pairs_status ON pairs (status);
+"""
+
+Pair = Tuple[Optional[str], Optional[str]]
+
+
+class ResultsDatabase:
+    """``results.sqlite`` of one sandbox."""
+
+    def __init__(self, sandbox: str):
+        self.sandbox = os.path.abspath(os.path.expanduser(sandbox))
+        self.path = os.path.join(self.sandbox, DATABASE)
+        self.results_dir = os.path.join(self.sandbox, 'results')
+        self.shards_dir = os.path.join(self.sandbox, 'shards')
+        self.connection = sqlite3.connect(self.path)
+        self._prepare()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'ResultsDatabase':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- ingesting -------------------------------------------------------
+
+    def sync(self, jobs: int = DEFAULT_JOBS) -> Dict[str, int]:
+        """Parse what changed since the last sync, `jobs` files at a time; counts of files
+        parsed, dropped and unchanged."""
+        on_disk = dict(self._scan())
+        known = {path: (mtime, size) for path, mtime, size in
+                 self.connection.execute('SELECT path, mtime_ns, size FROM files')}
+        changed = [path for path, stamp in on_disk.items() if known.get(path) != stamp]
+        removed = [path for path in known if path not in on_disk]
+        affected: Set[Pair] = set()
+        with self.connection:
+            for path in changed + removed:
+                affected.update(self.connection.execute(
+                    'SELECT planner, task_id FROM entries WHERE source = ?', (path,)))
+                self.connection.execute('DELETE FROM entries WHERE source = ?', (path,))
+            self.connection.executemany('DELETE FROM files WHERE path = ?',
+                                        [(path,) for path in removed])
+            for path, entries in bounded_map(_parse, changed, jobs):
+                self.connection.executemany(
+                    'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(path, planner, task_id, result, started, row, series)
+                     for planner, task_id, result, started, row, series in entries])
+                affected.update((planner, task_id) for planner, task_id, *_rest in entries)
+                self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)',
+                                        (path, *on_disk[path]))
+            self._resolve(affected)
+        return {'parsed': len(changed), 'dropped': len(removed),
+                'unchanged': len(on_disk) - len(changed), 'pairs': self.count()}
+
+    def _resolve(self, affected: Set[Pair]) -> None:
+        """Bring the ``pairs`` rows of the `affected` pairs up to date with ``entries``."""
+        for planner, task_id in affected:
+            best = self.connection.execute(
+                'SELECT row, series FROM entries WHERE planner IS ? AND task_id IS ? '
+                'ORDER BY result DESC, started DESC, rowid DESC LIMIT 1',
+                (planner, task_id)).fetchone()
+            if best is None:
+                self.connection.execute('DELETE FROM pairs WHERE planner IS ? AND task_id IS ?',
+                                        (planner, task_id))
+                continue
+            row = json.loads(best[0])
+            self.connection.execute(
+                'INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (planner, task_id, row.get('track'), row.get('domain'), row.get('status'),
+                 best[0], best[1]))
+
+    # -- reading ---------------------------------------------------------
+
+    def count(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM pairs').fetchone()[0]
+
+    def rows(self, memory_series: bool = False, where: str = '',
+             parameters: Sequence[Any] = ()) -> Iterator[Dict[str, Any]]:
+        """The flat row of every pair, optionally narrowed by a SQL `where` over ``pairs``, as
+        the query returns them."""
+        query = f'SELECT row{", series" if memory_series else ""} FROM pairs'
+        if where:
+            query += f' WHERE {where}'
+        for record in self.connection.execute(query, tuple(parameters)):
+            row = json.loads(record[0])
+            if memory_series:
+                row['memory_series'] = [tuple(point) for point in json.loads(record[1] or '[]')]
+            yield row
+
+    # -- internals -------------------------------------------------------
+
+    def _prepare(self) -> None:
+        self.connection.executescript(_TABLES)
+        stamp = f'{SCHEMA}/{__version__}'
+        found = self.connection.execute("SELECT value FROM meta WHERE key = 'written-by'").fetchone()
+        if found and found[0] == stamp:
+            return
+        with self.connection:
+            for table in ('files', 'entries', 'pairs'):
+                self.connection.execute(f'DELETE FROM {table}')
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('written-by', ?)", (stamp,))
+
+    def _scan(self) -> Iterator[Tuple[str, Tuple[int, int]]]:
+        """``(path, (mtime_ns, size))`` of every result file, marker and shard."""
+        for dirpath, _dirnames, filenames in os.walk(self.results_dir):
+            for name in filenames:
+                if '.tmp.' in name or not (name.endswith('.json') or name.endswith('.running')):
+                    continue
+                yield _stat(os.path.join(dirpath, name))
+        if os.path.isdir(self.shards_dir):
+            for name in os.listdir(self.shards_dir):
+                if name.endswith('.log'):
+                    yield _stat(os.path.join(self.shards_dir, name))
+
+
+def ingest(args) -> int:
+    sandbox = os.path.abspath(os.path.expanduser(args.sandbox_dir))
+    if args.rebuild and os.path.exists(os.path.join(sandbox, DATABASE)):
+        os.remove(os.path.join(sandbox, DATABASE))
+    try:
+        with ResultsDatabase(sandbox) as database:
+            counts = database.sync(args.jobs or DEFAULT_JOBS)
+    except (sqlite3.Error, OSError) as error:
+        print(f'ingest: {os.path.join(sandbox, DATABASE)}: {error}')
+        return 1
+    print(f'Database        : {os.path.join(sandbox, DATABASE)}')
+    print(f'Files           : {counts["parsed"]} parsed, {counts["unchanged"]} unchanged, '
+          f'{counts["dropped"]} gone')
+    print(f'Pairs           : {counts["pairs"]}')
+    return 0
+
+
+def _stat(path: str) -> Tuple[str, Tuple[int, int]]:
+    info = os.stat(path)
+    return path, (info.st_mtime_ns, info.st_size)
+
+
+def _parse(path: str) -> Tuple[str, List[tuple]]:
+    """`path`, and ``(planner, task id, is a result, started, row JSON, series JSON)`` of each
+    entry in the file."""
+    if path.endswith('.log'):
+        return path, [_entry(payload, kind == RESULT) for kind, payload in read_shard(path)
+                      if kind in (RESULT, START)]
+    try:
+        payload = read_result(path, skip_keys(memory_series=True))
+    except (OSError, ValueError):
+        return path, []
+    if path.endswith('.running'):
+        return path, [_entry(payload, False)]
+    if 'status' in payload:
+        return path, [_entry(payload, True)]
+    return path, []
+
+
+def _entry(payload: Dict[str, Any], result: bool):
+    row = _row(payload if result else dict(payload, status=KILLED))
+    series = _memory_series(payload) if result else []
+    started = float((payload.get('run') or {}).get('started') or 0.0)
+    return (row['planner'], row['task_id'], int(result), started,
+            json.dumps(row, default=str), json.dumps(series) if series else None)
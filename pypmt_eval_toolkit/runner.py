@@ -11,11 +11,13 @@ config: a task that runs out of time or memory should come back as a
 ``TIMEOUT``/``MEMOUT`` row, not as a missing file and a line in the slurm
 accounting log. The scheduler's limits stay in place as the backstop for the
 cases the process cannot catch itself -- notably a solve that dies inside a
-native solver, where no Python handler gets to run.
+native solver, where no Python handler gets to run. ``--supervise`` narrows
+that gap: see :mod:`pypmt_eval_toolkit.supervisor`.
 """
 
 from __future__ import annotations
 
+import contextlib
 import json
 import os
 import platform
@@ -26,7 +28,7 @@ import socket
 import sys
 import time
 import traceback
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 # Statuses this harness reports, independent of the UP vocabulary.
 SOLVED = 'SOLVED'
@@ -37,6 +39,7 @@ MEMOUT = 'MEMOUT'
 UNSUPPORTED = 'UNSUPPORTED'    # the engine does not support this ProblemKind
 ERROR = 'ERROR'
 KILLED = 'KILLED'              # marker left behind by a job the scheduler killed
+SKIPPED_PREDICTED = 'SKIPPED-PREDICTED'  # not run: the smaller instances of its domain ran out
 
 _UP_STATUS_MAP = {
     'SOLVED_SATISFICING': SOLVED,
@@ -50,6 +53,22 @@ _UP_STATUS_MAP = {
 }
 
 
+# The sections of a result that outweigh the rest and that `analyze` rarely
+# needs. A result file ends with them, in this order, after a 'last-keys'
+# entry naming them, so a reader stops after the last one it needs
+# (analyzer.read_result): `report`'s memory series first, then the rest.
+BULKY = ('memory-series', 'plan', 'stats', 'logs')
+LAST_KEYS = 'last-keys'
+
+# Set by `run-local --pin-cores` in the environment of each task it pins to a
+# core: a run records the cores it ran on only then.
+PINNED_ENV = 'PYPMTEVAL_PINNED_CORE'
+
+# Default for `solve --memory-sample-interval`: often enough to catch a search
+# that grows for a few seconds, rarely enough to cost nothing measurable.
+DEFAULT_SAMPLE_SECONDS = 0.5
+
+
 class _LimitReached(Exception):
     """Raised from a signal handler when the task's own limit fires."""
 
@@ -61,31 +80,143 @@ class _LimitReached(Exception):
 
 def solve(args) -> int:
     """Entry point for ``pypmtevalcli solve``. Always writes a result file."""
-    started_wall = time.time()
     started = time.monotonic()
-
-    # Resolved before anything else: the run happens inside a scratch directory,
-    # after which a relative path would point somewhere else entirely.
-    for attribute in ('planner_cfg', 'domain', 'problem', 'results_dir', 'errors_dir', 'run_dir'):
-        value = getattr(args, attribute, None)
-        if value:
-            setattr(args, attribute, os.path.abspath(os.path.expanduser(value)))
+    _absolute_paths(args)
 
     with open(args.planner_cfg, 'r') as handle:
         planner_cfg = json.load(handle)
-    tag = planner_cfg.get('planner-tag') or os.path.splitext(os.path.basename(args.planner_cfg))[0]
     engine = planner_cfg.get('up-planner-name') or planner_cfg.get('engine')
     params = dict(planner_cfg.get('planner-params') or {})
     modules = planner_cfg.get('up-planner-module') or planner_cfg.get('modules')
     modules = [modules] if isinstance(modules, str) else list(modules or [])
     engine_class = planner_cfg.get('up-planner-class') or planner_cfg.get('engine-class')
+    args.profile = getattr(args, 'profile', False) or bool(planner_cfg.get('profile'))
+    args.precompile = getattr(args, 'precompile', False) or bool(planner_cfg.get('precompile'))
 
+    result = _new_result(args, planner_cfg)
+    tag = result['planner']['tag']
     slug = _slug(args.task_id)
     os.makedirs(args.results_dir, exist_ok=True)
     result_file = os.path.join(args.results_dir, f'{slug}.json')
     marker_file = os.path.join(args.results_dir, f'{slug}.running')
 
-    result: Dict[str, Any] = {
+    if getattr(args, 'result_store', None):
+        result['run']['result-store'] = args.result_store
+    _use_shard(args, result)
+    if result['limits'].get('rung'):
+        result['rungs'] = _lower_rungs(previous_result(args, tag), result['limits']['rung'])
+
+    # Set by `solve-batch`: this run shares one interpreter start-up, UP import
+    # and engine resolution with the rest of its batch.
+    batch = getattr(args, 'batch', None)
+    if batch:
+        result['run']['batch'] = batch
+        result['timings']['amortized-startup-seconds'] = \
+            batch['startup-seconds'] / max(1, batch['size'])
+
+    if not engine:
+        result['logs'].append(f'{args.planner_cfg}: "up-planner-name" is required')
+        return _finish(result, result_file, marker_file, started)
+
+    try:
+        from . import fingerprint
+        result['fingerprint'] = fingerprint.compute(
+            engine, params, modules, engine_class, args.domain, args.problem,
+            args.time_limit, args.memory_limit, getattr(args, 'validate', True),
+            fingerprint.run_mode(getattr(args, 'supervise', False), getattr(args, 'cache_dir', None),
+                                 args.precompile, args.profile,
+                                 getattr(args, 'trace_allocations', False)))
+    except OSError:
+        result['fingerprint'] = None                         # the parse reports the missing file
+
+    _write_marker(marker_file, result)
+    settings = (engine, params, modules, engine_class)
+    if getattr(args, 'supervise', False) and hasattr(os, 'fork'):
+        return _supervised(args, result, settings, tag, slug, result_file, marker_file, started)
+    return _solve_pair(args, result, settings, tag, slug, result_file, marker_file, started)
+
+
+def _limits(args) -> Dict[str, Any]:
+    limits = {'time-seconds': args.time_limit, 'memory-mb': args.memory_limit}
+    rung = getattr(args, 'rung', None)
+    if rung:
+        index, _, count = str(rung).partition('/')
+        limits['rung'], limits['rungs'] = int(index), int(count or 0)
+    return limits
+
+
+def _tag(args, planner_cfg: Dict[str, Any]) -> str:
+    return planner_cfg.get('planner-tag') or os.path.splitext(os.path.basename(args.planner_cfg))[0]
+
+
+def previous_result(args, tag: Optional[str] = None, sharded=None) -> Optional[Dict[str, Any]]:
+    """The pair's last result: its result file, or with ``--shard-dir`` the later of
+    that and its latest result record in the shards. ``None`` without one.
+
+    `tag` is the planner's, read from ``--planner-cfg`` when not given.
+    `sharded`, the :class:`~pypmt_eval_toolkit.shards.ShardResults` of the
+    shard directory, saves reading the shards again for every pair of a batch.
+    """
+    try:
+        with open(os.path.join(args.results_dir, f'{_slug(args.task_id)}.json'), 'r') as handle:
+            on_file = json.load(handle)
+    except (OSError, ValueError):
+        on_file = None
+    shard_dir = getattr(args, 'shard_dir', None)
+    if not shard_dir:
+        return on_file
+    if tag is None:
+        try:
+            with open(args.planner_cfg, 'r') as handle:
+                planner_cfg = json.load(handle)
+        except (OSError, ValueError):
+            return on_file
+        tag = _tag(args, planner_cfg)
+    from .shards import find, latest
+    if sharded is not None:
+        return latest(on_file, sharded.result(tag, args.task_id))
+    return latest(on_file, find(shard_dir, tag, args.task_id))
+
+
+def _lower_rungs(previous: Optional[Dict[str, Any]], rung: int) -> List[Dict[str, Any]]:
+    """What the pair did on the lower rungs of the limit ladder, from the result this run replaces.
+
+    The result of a rung that ran out of time or memory is overwritten by the
+    next rung's (or followed by it in the shards); its outcome is kept in the
+    new result's ``rungs`` list, so the analyzer still sees every rung's
+    runtime.
+    """
+    if not isinstance(previous, dict):
+        return []
+    limits = previous.get('limits') or {}
+    if limits.get('rung') is None:
+        return []
+    if limits['rung'] >= rung:                 # the same rung again, after a crash or a kill
+        return list(previous.get('rungs') or [])
+    return list(previous.get('rungs') or []) + [{
+        'rung': limits.get('rung'),
+        'time-seconds': limits.get('time-seconds'),
+        'memory-mb': limits.get('memory-mb'),
+        'status': previous.get('status'),
+        'total-seconds': (previous.get('timings') or {}).get('total-seconds'),
+        'peak-memory-mb': (previous.get('metrics') or {}).get('peak-memory-mb'),
+        'started': (previous.get('run') or {}).get('started'),
+    }]
+
+
+def _absolute_paths(args) -> None:
+    """Resolve every path argument; the run happens inside a scratch directory,
+    after which a relative path would point somewhere else entirely."""
+    for attribute in ('planner_cfg', 'domain', 'problem', 'results_dir', 'errors_dir', 'run_dir',
+                      'cache_dir', 'result_store', 'shard_dir'):
+        value = getattr(args, attribute, None)
+        if value:
+            setattr(args, attribute, os.path.abspath(os.path.expanduser(value)))
+
+
+def _new_result(args, planner_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """A result as it stands before the solve: who, what, under which limits."""
+    return {
         'task': {
             'task-id': args.task_id,
             'suite': args.suite,
@@ -97,18 +228,19 @@ def solve(args) -> int:
             'problem-file': os.path.abspath(args.problem),
         },
         'planner': {
-            'tag': tag,
-            'engine': engine,
-            'params': _jsonable(params),
+            'tag': _tag(args, planner_cfg),
+            'engine': planner_cfg.get('up-planner-name') or planner_cfg.get('engine'),
+            'params': _jsonable(dict(planner_cfg.get('planner-params') or {})),
             'config-file': os.path.abspath(args.planner_cfg),
         },
-        'limits': {'time-seconds': args.time_limit, 'memory-mb': args.memory_limit},
+        'limits': _limits(args),
         'run': {
             'host': socket.gethostname(),
             'pid': os.getpid(),
-            'started': started_wall,
+            'started': time.time(),
             'slurm-job-id': os.environ.get('SLURM_JOB_ID'),
             'slurm-array-task-id': os.environ.get('SLURM_ARRAY_TASK_ID'),
+            'cpus': _pinned_cpus(),
             'python': platform.python_version(),
         },
         'status': ERROR,
@@ -119,38 +251,145 @@ def solve(args) -> int:
         'logs': [],
     }
 
-    if not engine:
-        result['logs'].append(f'{args.planner_cfg}: "up-planner-name" is required')
-        return _finish(result, result_file, marker_file, started)
 
+def write_pending_marker(args) -> None:
+    """Leave the ``.running`` marker of a pair that has not started yet.
+
+    ``solve-batch`` writes one for every pair of its slice up front, so a job
+    killed before it reaches some of them still accounts for them as KILLED.
+    The pair's own run replaces it. A pair that already has a marker or a
+    result is left alone.
+    """
+    if not args.task_id:
+        return
+    try:
+        _absolute_paths(args)
+        with open(args.planner_cfg, 'r') as handle:
+            planner_cfg = json.load(handle)
+    except (OSError, ValueError):
+        return                                               # the run itself reports it
+    slug = _slug(args.task_id)
+    marker_file = os.path.join(args.results_dir, f'{slug}.running')
+    if os.path.exists(marker_file) or os.path.exists(os.path.join(args.results_dir, f'{slug}.json')):
+        return
+    result = _new_result(args, planner_cfg)
+    result['run']['pending'] = True
+    _use_shard(args, result)
     _write_marker(marker_file, result)
+
+
+def write_predicted(args, evidence: Sequence[str], cutoff: int) -> bool:
+    """Record a pair as ``SKIPPED-PREDICTED`` instead of running it.
+
+    ``run-local --cutoff`` does this for the larger instances of a domain once
+    the planner ran out of time or memory on `cutoff` smaller ones in a row;
+    `evidence` are their task ids. The result has no timings and no metrics:
+    nothing was measured. ``False`` when the planner configuration cannot be
+    read, in which case the pair is better run and left to report that.
+    """
+    try:
+        _absolute_paths(args)
+        with open(args.planner_cfg, 'r') as handle:
+            planner_cfg = json.load(handle)
+    except (OSError, ValueError):
+        return False
+    slug = _slug(args.task_id)
+    result = _new_result(args, planner_cfg)
+    result['status'] = SKIPPED_PREDICTED
+    result['predicted'] = {'cutoff': cutoff, 'after': list(evidence)}
+    result['logs'].append(f'not run: {len(evidence)} smaller instance(s) of the domain in a row '
+                          f'ran out of time or memory ({", ".join(evidence)})')
+    _use_shard(args, result)
+    _write_result(os.path.join(args.results_dir, f'{slug}.json'), result)
+    marker_file = os.path.join(args.results_dir, f'{slug}.running')
+    if os.path.exists(marker_file):
+        try:
+            os.remove(marker_file)
+        except OSError:
+            pass
+    return True
+
+
+def write_failed(args, error: Exception) -> bool:
+    """Record a pair as ``ERROR`` because its engine failed to resolve, instead of running it.
+
+    ``solve-batch`` does this for the tasks of a planner whose engine it could
+    not resolve up front: a child forked from the parent would only fail the
+    same way. The traceback goes to ``--errors-dir`` like a crashed run's.
+    ``False`` when the planner configuration cannot be read, in which case the
+    pair is better run and left to report that.
+    """
+    try:
+        _absolute_paths(args)
+        with open(args.planner_cfg, 'r') as handle:
+            planner_cfg = json.load(handle)
+    except (OSError, ValueError):
+        return False
+    slug = _slug(args.task_id)
+    result = _new_result(args, planner_cfg)
+    result['error'] = {'type': type(error).__name__, 'message': str(error)}
+    result['logs'].append(f'not run: the engine failed to resolve in the solve-batch parent: '
+                          f'{type(error).__name__}: {error}')
+    _dump_traceback(args, result['planner']['tag'], slug, error)
+    _use_shard(args, result)
+    _write_result(os.path.join(args.results_dir, f'{slug}.json'), result)
+    marker_file = os.path.join(args.results_dir, f'{slug}.running')
+    if os.path.exists(marker_file):
+        try:
+            os.remove(marker_file)
+        except OSError:
+            pass
+    return True
+
+
+def _solve_pair(args, result: Dict[str, Any], settings: tuple, tag: str, slug: str,
+                result_file: str, marker_file: str, started: float) -> int:
+    """Parse, solve, validate and write the result, under the task's own limits."""
+    engine, params, modules, engine_class = settings
     _install_limits(args.time_limit, args.memory_limit)
     workdir = _enter_workdir(args.run_dir, tag, slug)
     result['run']['work-dir'] = workdir
+    sampler = _start_sampler(getattr(args, 'memory_sample_interval', None), workdir)
+    profiler = None
+    phases = _Phases()
+    result['timings']['phases'] = phases.seconds
 
     try:
-        import unified_planning.shortcuts as up_shortcuts
-        from unified_planning.io import PDDLReader
+        with phases('import'):
+            import unified_planning.shortcuts as up_shortcuts
+            from unified_planning.io import PDDLReader
+
+            from .engines import resolve_engine
+
+            environment = _up_environment()
 
-        from .engines import resolve_engine
+        if getattr(args, 'trace_allocations', False):
+            from . import allocations
+            allocations.start(getattr(args, 'trace_frames', None) or allocations.DEFAULT_FRAMES)
 
-        environment = up_shortcuts.get_environment()
-        # Every engine UP touches prints a credits block; across a sweep that is
-        # tens of thousands of lines of slurm log saying the same thing.
-        environment.credits_stream = None
-        # Some IPC instances reuse one name across categories (an object named
-        # like a domain predicate, say); UP rejects those by default.
-        environment.error_used_name = False
+        # A cached problem comes with its own environment, which has to be in
+        # place before the engine is registered in it.
+        pipeline = _pipeline_spec(params) if args.precompile else None
+        cache, cache_key, problem, compiled = _cached_problem(args, result, phases, pipeline)
+        if problem is not None:
+            environment = _adopt_environment(problem.environment)
 
         # Resolve the engine before parsing: an unavailable engine is a
         # configuration error, and there is no point parsing a problem for it.
-        engine_class_obj = resolve_engine(engine, modules=modules,
-                                          engine_class=engine_class,
-                                          environment=environment)
-
-        parse_start = time.monotonic()
-        problem = PDDLReader().parse_problem(args.domain, args.problem)
-        result['timings']['parse-seconds'] = time.monotonic() - parse_start
+        with phases('resolve'):
+            engine_class_obj = resolve_engine(engine, modules=modules,
+                                              engine_class=engine_class,
+                                              environment=environment)
+
+        if problem is None:
+            with phases('parse'):
+                problem = PDDLReader().parse_problem(args.domain, args.problem)
+            if cache is not None:
+                with phases('cache-store'):
+                    if not cache.put(cache_key, problem):
+                        result['logs'].append(f'could not store the parsed problem in '
+                                              f'{cache.directory}')
+        result['timings']['parse-seconds'] = phases.seconds['parse']
         result['metrics']['problem-kind'] = sorted(problem.kind.features)
 
         params = _resolve_params(params, workdir)
@@ -161,13 +400,38 @@ def solve(args) -> int:
             result['logs'].append(
                 f'{engine} does not support this ProblemKind: '
                 f'{sorted(problem.kind.features)}')
-            return _finish(result, result_file, marker_file, started)
+            _record_allocations(result)
+            return _finish(result, result_file, marker_file, started, sampler)
+
+        # With --precompile the runner runs the pipeline itself, and the engine
+        # is handed the compiled problem and an empty one.
+        target, lift = problem, []
+        engine_params = params
+        if pipeline and params.get('compilationlist'):
+            result['planner']['precompiled'] = True
+            engine_params = dict(params, compilationlist=[])
 
         remaining = _remaining_seconds(args.time_limit, started)
+        if args.profile:
+            from .profiler import StackSampler
+            profiler = StackSampler()
+            profiler.start()
         solve_start = time.monotonic()
-        with up_shortcuts.OneshotPlanner(name=engine, params=params) as planner:
-            outcome = _run(planner, problem, remaining, result)
-        result['timings']['solve-seconds'] = time.monotonic() - solve_start
+        stored_before = phases.seconds.get('cache-store', 0.0)
+        with phases.compilations():
+            if engine_params is not params:
+                target, lift = compiled or _precompile(args, problem, params['compilationlist'],
+                                                       cache, result, phases)
+            with phases('construct'):
+                planner = up_shortcuts.OneshotPlanner(name=engine, params=engine_params)
+            with planner:
+                with phases('search'):
+                    outcome = _run(planner, target, remaining, result)
+        # Storing a compiled problem is the cache's cost, not the engine's.
+        result['timings']['solve-seconds'] = time.monotonic() - solve_start \
+            - (phases.seconds.get('cache-store', 0.0) - stored_before)
+        _save_profile(profiler, result, result_file)
+        _record_allocations(result)
 
         result['status'] = _UP_STATUS_MAP.get(outcome.status.name, ERROR)
         result['metrics']['up-status'] = outcome.status.name
@@ -175,28 +439,319 @@ def solve(args) -> int:
         result['stats'] = _engine_stats(params)
 
         if outcome.plan is not None and result['status'] == SOLVED:
-            result['plan'] = _plan_lines(problem, outcome.plan)
-            result['metrics'].update(_plan_metrics(outcome.plan))
+            plan = _lift_plan(outcome.plan, lift, result)
+            result['plan'] = _plan_lines(problem, plan)
+            result['metrics'].update(_plan_metrics(plan))
             if getattr(args, 'validate', True):
-                result['metrics']['validated'] = _validate(problem, outcome.plan, result)
+                result['metrics']['validated'] = _validate(problem, plan, result, phases)
 
     except _LimitReached as limit:
         result['status'] = limit.status
         result['logs'].append(limit.detail)
+        _record_allocations(result)
     except MemoryError:
         result['status'] = MEMOUT
         result['logs'].append(f'MemoryError under a {args.memory_limit}MB limit.')
+        _record_allocations(result)
     except Exception as error:                              # noqa: BLE001 -- reported, not swallowed
         result['status'] = ERROR
         result['error'] = {'type': type(error).__name__, 'message': str(error)}
+        _record_allocations(result)
         _dump_traceback(args, tag, slug, error)
         result['logs'].append(f'{type(error).__name__}: {error}')
     finally:
+        _save_profile(profiler, result, result_file)
+        _stop_allocations()
         _leave_workdir(workdir, keep=getattr(args, 'keep_run_dir', False))
 
+    return _finish(result, result_file, marker_file, started, sampler)
+
+
+def _supervised(args, result: Dict[str, Any], settings: tuple, tag: str, slug: str,
+                result_file: str, marker_file: str, started: float) -> int:
+    """Run :func:`_solve_pair` in a child the watchdog can kill from outside.
+
+    When the child finishes by itself it has written its own result, exactly
+    as an unsupervised run would. When it does not -- the watchdog killed it at
+    a limit, or it died where no handler could run -- the result is written
+    here, from what the watchdog saw.
+    """
+    from .supervisor import run_supervised
+
+    result['run']['supervised'] = True
+    verdict = run_supervised(
+        lambda: _solve_pair(args, result, settings, tag, slug, result_file, marker_file, started),
+        args.time_limit, args.memory_limit, started)
+    if verdict.clean:
+        return 0
+
+    if verdict.status:
+        result['status'] = verdict.status
+        result['logs'].append(verdict.detail)
+    else:
+        how = (f'signal {verdict.signal}' if verdict.signal is not None
+               else f'exit code {verdict.exit_code}')
+        result['status'] = ERROR
+        result['logs'].append(f'The solving process died without reporting ({how}).')
+    result['run']['cgroup'] = verdict.cgroup
+    result['metrics']['peak-memory-mb'] = round(verdict.peak_rss_mb, 2)
+    result['metrics']['tree-cpu-seconds'] = round(verdict.cpu_seconds, 2)
+    _leave_workdir(_workdir_path(args.run_dir, tag, slug, verdict.pid),
+                   keep=getattr(args, 'keep_run_dir', False))
     return _finish(result, result_file, marker_file, started)
 
 
+def preload(planner_cfgs: Sequence[str]) -> Dict[str, Exception]:
+    """Import UP and resolve the engine of every planner configuration given.
+
+    What ``solve-batch`` does once in its parent, so that each forked child
+    finds ``unified_planning`` imported and its engine already registered with
+    the factory, and pays for neither. Returns ``{config file: error}`` for the
+    configurations that could not be resolved, whatever went wrong -- a plugin
+    that raises on import is that planner's failure, not the batch's; see
+    :func:`write_failed` for their tasks.
+    """
+    from .engines import resolve_engine
+
+    environment = _up_environment()
+    failures: Dict[str, Exception] = {}
+    for path in planner_cfgs:
+        try:
+            with open(path, 'r') as handle:
+                planner_cfg = json.load(handle)
+            engine = planner_cfg.get('up-planner-name') or planner_cfg.get('engine')
+            modules = planner_cfg.get('up-planner-module') or planner_cfg.get('modules')
+            modules = [modules] if isinstance(modules, str) else list(modules or [])
+            if engine:
+                resolve_engine(engine, modules=modules,
+                               engine_class=planner_cfg.get('up-planner-class')
+                               or planner_cfg.get('engine-class'),
+                               environment=environment)
+        except Exception as error:                          # noqa: BLE001 -- reported per task
+            failures[path] = error
+    return failures
+
+
+def _up_environment():
+    """The UP environment, configured the way every run of the harness wants it."""
+    import unified_planning.shortcuts as up_shortcuts
+
+    environment = up_shortcuts.get_environment()
+    # Every engine UP touches prints a credits block; across a sweep that is
+    # tens of thousands of lines of slurm log saying the same thing.
+    environment.credits_stream = None
+    # Some IPC instances reuse one name across categories (an object named
+    # like a domain predicate, say); UP rejects those by default.
+    environment.error_used_name = False
+    return environment
+
+
+def _cached_problem(args, result: Dict[str, Any], phases: '_Phases',
+                    pipeline: Optional[List[List[str]]] = None):
+    """``(cache, key, problem, compiled)``; ``None`` for whatever the cache lacks.
+
+    A hit is timed as the ``parse`` phase and recorded as
+    ``timings.parse-cache``, so a 0.2 s ``parse-seconds`` is never mistaken for
+    a fast parser. With a `pipeline` (``--precompile``) the compiled entry is
+    looked up first; a hit there brings the parsed problem along, and
+    `compiled` is the ``(problem, map-backs)`` the engine gets.
+    """
+    directory = getattr(args, 'cache_dir', None)
+    if not directory:
+        return None, None, None, None
+    from .cache import ProblemCache
+
+    cache = ProblemCache(directory, getattr(args, 'cache_max_mb', None))
+    compiled = None
+    with phases('parse'):
+        try:
+            key = cache.key(args.domain, args.problem)
+            compiled_key = _compiled_key(cache, args, pipeline) if pipeline else None
+        except OSError:
+            return None, None, None, None                    # the parse reports the unreadable file
+        entry = cache.get(compiled_key) if compiled_key else None
+        if isinstance(entry, dict) and 'compiled' in entry:
+            problem = entry['problem']
+            compiled = (entry['compiled'], entry['map-back'])
+        else:
+            problem = cache.get(key)
+    if problem is None:
+        del phases.seconds['parse']                          # the real parse follows
+    result['timings']['parse-cache'] = 'miss' if problem is None else 'hit'
+    if compiled_key:
+        result['timings']['compile-cache'] = 'miss' if compiled is None else 'hit'
+    return cache, key, problem, compiled
+
+
+def _compiled_key(cache, args, pipeline: List[List[str]]) -> str:
+    return cache.key(args.domain, args.problem, 'pipeline=' + json.dumps(pipeline))
+
+
+def _pipeline_spec(params: Dict[str, Any]) -> Optional[List[List[str]]]:
+    """A configuration's compilation pipeline as ``[[compiler, KIND], ...]``.
+
+    Read from the parameters as written, before any of UP is imported; it is
+    what the compiled entries of the parse cache are keyed by, so two planners
+    with the same pipeline share them whatever else they set.
+    """
+    for key in _COMPILATION_KEYS:
+        if params.get(key):
+            return [[str(entry[0]), str(getattr(entry[1], 'name', entry[1])).upper()]
+                    for entry in params[key]]
+    return None
+
+
+def _precompile(args, problem, pipeline, cache, result: Dict[str, Any], phases: '_Phases'):
+    """Run the compilation pipeline on `problem`: ``(compiled, map-backs)``.
+
+    Each step is timed as its own ``compile:<compiler>`` phase, as it would be
+    inside the engine. The result is stored under `key` with the problem it
+    came from, for the next planner with the same pipeline.
+    """
+    from unified_planning.shortcuts import Compiler
+
+    compiled, lift = problem, []
+    for name, kind in pipeline:
+        with Compiler(name=name, problem_kind=compiled.kind, compilation_kind=kind) as compiler:
+            outcome = compiler.compile(compiled, kind)
+        compiled = outcome.problem
+        lift.append(outcome.map_back_action_instance)
+    if cache is not None:
+        with phases('cache-store'):
+            key = _compiled_key(cache, args, _pipeline_spec({'compilationlist': pipeline}))
+            if not cache.put(key, {'problem': problem, 'compiled': compiled, 'map-back': lift}):
+                result['logs'].append(f'could not store the compiled problem in {cache.directory}')
+    return compiled, lift
+
+
+def _lift_plan(plan, lift: Sequence, result: Dict[str, Any]):
+    """Map a plan over a precompiled problem back to the problem as parsed.
+
+    The last compilation is undone first. A plan that cannot be lifted is kept
+    as it is; :func:`_rebind_plan` then says why it cannot be validated.
+    """
+    try:
+        for map_back in reversed(lift):
+            plan = plan.replace_action_instances(map_back)
+    except Exception as error:                               # noqa: BLE001
+        result['logs'].append(f'Could not map the plan back: {type(error).__name__}: {error}')
+    return plan
+
+
+def _adopt_environment(environment):
+    """Make a cached problem's environment UP's global one, configured as usual.
+
+    UP expressions are shared nodes compared by identity, so everything the run
+    builds -- the engine's encoding, the validator's checks -- has to come from
+    the environment the problem was parsed in.
+    """
+    import unified_planning.environment as up_environment
+
+    up_environment.GLOBAL_ENVIRONMENT = environment
+    return _up_environment()
+
+
+class _Phases:
+    """Wall-clock seconds per phase of one solve: ``timings.phases``.
+
+    ``import`` (UP itself; next to nothing under ``solve-batch``), ``resolve``,
+    ``parse`` (a parse-cache load on a hit), ``cache-store``, ``construct`` (the
+    ``OneshotPlanner``), one ``compile:<compiler>`` entry per step of the
+    compilation pipeline (none on a ``--precompile`` cache hit),
+    ``search``, ``rebind`` and ``validate``. The compilation steps usually run
+    inside ``planner.solve``; their time is taken out of ``search``, so the
+    phases add up to the solve instead of counting a grounder twice.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._compiling = 0
+        self._current: Optional[str] = None
+        self._compiled_in_search = 0.0
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        outer, self._current = self._current, name
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._current = outer
+            self._add(name, time.monotonic() - start)
+
+    @contextlib.contextmanager
+    def compilations(self):
+        """Time every ``CompilerMixin.compile`` call made inside the block."""
+        from unified_planning.engines.mixins.compiler import CompilerMixin
+
+        original = CompilerMixin.compile
+        phases = self
+
+        def timed_compile(compiler, *args, **kwargs):
+            if phases._compiling:                           # a compiler calling another
+                return original(compiler, *args, **kwargs)
+            phases._compiling += 1
+            start = time.monotonic()
+            try:
+                return original(compiler, *args, **kwargs)
+            finally:
+                phases._compiling -= 1
+                elapsed = time.monotonic() - start
+                phases._add(f'compile:{getattr(compiler, "name", type(compiler).__name__)}',
+                            elapsed)
+                if phases._current == 'search':
+                    phases._compiled_in_search += elapsed
+
+        CompilerMixin.compile = timed_compile
+        try:
+            yield
+        finally:
+            CompilerMixin.compile = original
+            if 'search' in self.seconds:
+                self.seconds['search'] = round(
+                    max(0.0, self.seconds['search'] - self._compiled_in_search), 4)
+
+    def _add(self, name: str, seconds: float) -> None:
+        self.seconds[name] = round(self.seconds.get(name, 0.0) + seconds, 4)
+
+
+def _save_profile(profiler, result: Dict[str, Any], result_file: str) -> None:
+    """Stop the stack sampler and write ``<task>.folded`` beside the result.
+
+    Also reached from the limit handlers, so a run that timed out still says
+    where its time went.
+    """
+    if profiler is None or not profiler.running:
+        return
+    profiler.stop()
+    path = os.path.splitext(result_file)[0] + '.folded'
+    try:
+        profiler.write(path)
+    except OSError as error:
+        result['logs'].append(f'could not write the profile: {error}')
+        return
+    result['profile'] = {'file': path, 'samples': profiler.samples,
+                         'interval-seconds': profiler.interval}
+
+
+def _record_allocations(result: Dict[str, Any]) -> None:
+    """The ``--trace-allocations`` snapshot, if tracing was on.
+
+    Called inside the limit handlers rather than afterwards: see
+    :mod:`pypmt_eval_toolkit.allocations` for why.
+    """
+    if 'tracemalloc' in sys.modules:
+        from . import allocations
+        allocations.record(result)
+
+
+def _stop_allocations() -> None:
+    """Stop ``--trace-allocations`` tracing of a run that ended without a snapshot."""
+    if 'tracemalloc' in sys.modules:
+        from . import allocations
+        allocations.stop()
+
+
 def _run(planner, problem, remaining: Optional[float], result: Dict[str, Any]):
     """``planner.solve``, tolerating engines that do not take a timeout.
 
@@ -230,7 +785,7 @@ def _enter_workdir(run_dir: Optional[str], tag: str, slug: str) -> Optional[str]
     if not run_dir:
         return None
     try:
-        workdir = os.path.join(run_dir, f'{_slug(tag)}__{slug}.{os.getpid()}')
+        workdir = _workdir_path(run_dir, tag, slug, os.getpid())
         os.makedirs(workdir, exist_ok=True)
         os.chdir(workdir)
         return workdir
@@ -238,6 +793,10 @@ def _enter_workdir(run_dir: Optional[str], tag: str, slug: str) -> Optional[str]
         return None
 
 
+def _workdir_path(run_dir: Optional[str], tag: str, slug: str, pid: int) -> Optional[str]:
+    return os.path.join(run_dir, f'{_slug(tag)}__{slug}.{pid}') if run_dir else None
+
+
 def _leave_workdir(workdir: Optional[str], keep: bool = False) -> None:
     """Leave the scratch directory and, unless asked to keep it, delete it."""
     if not workdir:
@@ -266,6 +825,7 @@ def _install_limits(time_limit: Optional[int], memory_limit: Optional[int]) -> N
     for signame, status, detail in (
         ('SIGALRM', TIMEOUT, 'Hit the task time limit.'),
         ('SIGTERM', KILLED, 'Received SIGTERM (scheduler cancellation).'),
+        ('SIGINT', KILLED, 'Received SIGINT (interrupted, or forwarded by the watchdog).'),
         ('SIGXCPU', TIMEOUT, 'Received SIGXCPU (CPU limit).'),
         ('SIGUSR1', KILLED, 'Received SIGUSR1 (slurm --signal warning).'),
     ):
@@ -309,12 +869,102 @@ def _remaining_seconds(time_limit: Optional[int], started: float) -> Optional[fl
 
 
 def _peak_memory_mb() -> float:
-    """Peak RSS of this process. ``ru_maxrss`` is KiB on Linux, bytes on macOS."""
-    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    """Peak RSS of this process or of the largest child it has waited for.
+
+    ``ru_maxrss`` is KiB on Linux, bytes on macOS. For ``RUSAGE_CHILDREN`` it
+    is the largest single descendant, not a sum: it catches a search binary
+    that peaked between two samples, but not a tree's total.
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
     divisor = 1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0
     return round(peak / divisor, 2)
 
 
+def _start_sampler(interval: Optional[float], workdir: Optional[str] = None):
+    """Start sampling this process's tree every `interval` seconds, if possible.
+
+    ``None`` when sampling is off (an interval of 0) or ``/proc`` is not there
+    to sample; the peak then comes from ``ru_maxrss`` alone. The sampler also
+    watches how large the scratch directory `workdir` grows.
+    """
+    from . import proctree
+
+    if interval is None:
+        interval = DEFAULT_SAMPLE_SECONDS
+    if interval <= 0 or not proctree.available():
+        return None
+    sampler = proctree.Sampler(os.getpid(), interval=interval, directory=workdir)
+    try:
+        sampler.start()
+    except RuntimeError:                                     # no thread to be had under the limit
+        return None
+    return sampler
+
+
+def _record_resources(result: Dict[str, Any], sampler) -> None:
+    """CPU, faults, context switches and I/O of the run, and of what it reaped.
+
+    Wall time alone cannot tell a slow planner from a starved one; CPU time
+    over wall time can. ``children`` is every process the run started and
+    waited for -- the translator, the search binary, the JVM -- which is where
+    an engine that shells out spends its time.
+    """
+    from . import proctree
+
+    usage = {'self': _rusage(resource.RUSAGE_SELF),
+             'children': _rusage(resource.RUSAGE_CHILDREN)}
+    cpu = sum(part['user-seconds'] + part['system-seconds'] for part in usage.values())
+    usage['cpu-seconds'] = round(cpu, 3)
+    wall = result['timings'].get('total-seconds')
+    usage['cpu-utilization'] = round(cpu / wall, 3) if wall else None
+    io = proctree.io_bytes(os.getpid())
+    if io:
+        usage['io'] = {'read-bytes': io.get('read_bytes'), 'write-bytes': io.get('write_bytes'),
+                       'read-chars': io.get('rchar'), 'write-chars': io.get('wchar')}
+    if sampler is not None and sampler.directory:
+        usage['scratch-peak-mb'] = round(sampler.peak_directory_mb, 2)
+    result['resources'] = usage
+
+
+def _pinned_cpus() -> Optional[List[int]]:
+    """The cores this run was pinned to (``run-local --pin-cores``); None when it was not.
+
+    An affinity narrower than the machine does not say so by itself: a slurm
+    cpuset or a ``taskset`` narrows it too, without a core per run.
+    """
+    if not os.environ.get(PINNED_ENV):
+        return None
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return None
+
+
+def _rusage(who: int) -> Dict[str, Any]:
+    usage = resource.getrusage(who)
+    return {
+        'user-seconds': round(usage.ru_utime, 3),
+        'system-seconds': round(usage.ru_stime, 3),
+        'major-faults': usage.ru_majflt,
+        'minor-faults': usage.ru_minflt,
+        'voluntary-switches': usage.ru_nvcsw,
+        'involuntary-switches': usage.ru_nivcsw,
+    }
+
+
+def _record_memory(result: Dict[str, Any], sampler) -> None:
+    """Peak of the whole tree into ``metrics``, and the series beside it."""
+    peak = _peak_memory_mb()
+    if sampler is not None:
+        sampler.stop()
+        peak = max(peak, round(sampler.peak_rss_mb, 2))
+        result['metrics']['peak-pss-mb'] = round(sampler.peak_pss_mb, 2)
+        result['metrics']['peak-processes'] = sampler.peak_processes
+        result['memory-series'] = sampler.series()
+    result['metrics']['peak-memory-mb'] = peak
+
+
 # ----------------------------------------------------------------------
 # Planner parameters
 # ----------------------------------------------------------------------
@@ -471,20 +1121,24 @@ def _rebind_plan(problem, plan, result: Dict[str, Any]):
     return rebound
 
 
-def _validate(problem, plan, result: Dict[str, Any]) -> Optional[bool]:
+def _validate(problem, plan, result: Dict[str, Any],
+              phases: Optional['_Phases'] = None) -> Optional[bool]:
     """Re-check the plan against the *original* problem with a UP validator.
 
     Engine-agnostic on purpose: whichever validator UP can supply for this
     problem and plan kind is used. ``None`` means no validator was available,
     not that the plan is bad -- and coverage treats it as such.
     """
+    phases = phases or _Phases()
     try:
         import unified_planning.shortcuts as up_shortcuts
-        plan = _rebind_plan(problem, plan, result)
+        with phases('rebind'):
+            plan = _rebind_plan(problem, plan, result)
         if plan is None:
             return None
-        with up_shortcuts.PlanValidator(problem_kind=problem.kind,
-                                        plan_kind=plan.kind) as validator:
+        with phases('validate'), \
+                up_shortcuts.PlanValidator(problem_kind=problem.kind,
+                                           plan_kind=plan.kind) as validator:
             outcome = validator.validate(problem, plan)
         status = getattr(getattr(outcome, 'status', None), 'name', str(outcome))
         if status != 'VALID':
@@ -505,11 +1159,17 @@ def _log_messages(outcome) -> List[str]:
 # Result files
 # ----------------------------------------------------------------------
 
-def _finish(result: Dict[str, Any], result_file: str, marker_file: str, started: float) -> int:
+def _finish(result: Dict[str, Any], result_file: str, marker_file: str, started: float,
+            sampler=None) -> int:
     signal.alarm(0)
     result['timings']['total-seconds'] = time.monotonic() - started
-    result['metrics']['peak-memory-mb'] = _peak_memory_mb()
-    _write_json(result_file, result)
+    if sampler is not None or 'peak-memory-mb' not in result['metrics']:
+        _record_memory(result, sampler)
+    _record_resources(result, sampler)
+    _write_result(result_file, result)
+    if result['run'].get('result-store'):
+        from .fingerprint import ResultStore
+        ResultStore(result['run']['result-store']).publish(result)
     if os.path.exists(marker_file):
         try:
             os.remove(marker_file)
@@ -517,11 +1177,38 @@ def _finish(result: Dict[str, Any], result_file: str, marker_file: str, started:
             pass
     print(f"{result['status']:<12} {result['task']['task-id']} "
           f"[{result['timings']['total-seconds']:.1f}s, "
-          f"{result['metrics']['peak-memory-mb']:.0f}MB] -> {result_file}")
+          f"{result['metrics']['peak-memory-mb']:.0f}MB] -> "
+          f"{result['run'].get('shard') or result_file}")
     # Exit 0 whatever happened: a recorded TIMEOUT is a successful measurement.
     return 0
 
 
+def _use_shard(args, result: Dict[str, Any]) -> None:
+    """With ``--shard-dir``, have the result and its marker go to this job's shard."""
+    shard_dir = getattr(args, 'shard_dir', None)
+    if shard_dir:
+        from .shards import shard_path
+        result['run']['shard'] = shard_path(shard_dir)
+
+
+def _write_result(path: str, result: Dict[str, Any]) -> None:
+    """The result file, or a result record in the job's shard."""
+    if result['run'].get('shard'):
+        from .shards import RESULT, append
+        append(result['run']['shard'], RESULT, result)
+    else:
+        _write_json(path, _bulky_last(result))
+
+
+def _bulky_last(result: Dict[str, Any]) -> Dict[str, Any]:
+    """`result` reordered: the ``BULKY`` sections at the end, after ``last-keys`` naming them."""
+    tail = [key for key in BULKY if key in result]
+    ordered = {key: value for key, value in result.items() if key not in BULKY and key != LAST_KEYS}
+    ordered[LAST_KEYS] = tail
+    ordered.update((key, result[key]) for key in tail)
+    return ordered
+
+
 def _write_json(path: str, payload: Dict[str, Any]) -> None:
     """Write atomically, so a kill mid-write cannot leave truncated JSON."""
     os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
@@ -538,9 +1225,14 @@ def _write_marker(path: str, result: Dict[str, Any]) -> None:
     marker survives without a result file next to it, and ``analyze`` counts
     that pair as KILLED instead of silently dropping it.
     """
+    marker = {'task': result['task'], 'planner': result['planner'],
+              'run': result['run'], 'limits': result['limits']}
     try:
-        _write_json(path, {'task': result['task'], 'planner': result['planner'],
-                           'run': result['run'], 'limits': result['limits']})
+        if result['run'].get('shard'):
+            from .shards import START, append
+            append(result['run']['shard'], START, marker)
+        else:
+            _write_json(path, marker)
     except OSError:
         pass
 
@@ -553,7 +1245,8 @@ def _dump_traceback(args, tag: str, slug: str, error: Exception) -> None:
         os.makedirs(errors_dir, exist_ok=True)
         with open(os.path.join(errors_dir, f'{_slug(tag)}__{slug}.log'), 'w') as handle:
             handle.write(f'{args.task_id}\n{type(error).__name__}: {error}\n\n')
-            handle.write(traceback.format_exc())
+            handle.write(''.join(traceback.format_exception(type(error), error,
+                                                            error.__traceback__)))
     except OSError:
         pass
 
@@ -0,0 +1,417 @@
+"""Run a sweep on one machine: ``pypmtevalcli run-local``.
+
+``run_local.sh`` used to hand the command file to GNU parallel, or to a bash
+loop that counts its jobs every half second. Neither knows that every task may
+grow to its ``--memory-limit``: eight numeric instances on an eight-job
+workstation can push it into swap, and every time measured meanwhile is off.
+
+``run-local`` admits a task only when what it may use fits:
+
+* a core of the ones this process may run on (``--jobs``, by default all of
+  them);
+* its ``--memory-limit`` on top of the limits of the tasks already running,
+  within ``--memory-mb`` (by default 90% of the memory available when the run
+  started); a task with no limit reserves an even share;
+* and the memory actually available right now, so a browser or a build
+  elsewhere on the machine counts too.
+
+Tasks start in command-file order; one that does not fit waits for running
+tasks to finish rather than letting smaller ones overtake it indefinitely. One
+that could never fit runs alone.
+
+Every start and finish goes to ``<sandbox>/local/journal.jsonl``, keyed by the
+command itself. A second ``run-local`` skips what the journal says finished,
+so an interrupted sweep resumes where it stopped (``--fresh`` starts over). Each
+task's output goes to ``<sandbox>/local/logs/<line>.log``.
+
+Ctrl-C (or a ``SIGTERM`` to the scheduler) does what slurm does to a cancelled
+job: ``SIGTERM`` to every running task's process group, so the runner records
+``KILLED`` and leaves a result behind, then ``SIGKILL`` after ``--kill-wait``
+seconds. A second Ctrl-C kills at once.
+
+The same scheduler runs inside a whole-node slurm job (``generate
+--packed-nodes``). There ``--stride I/N`` takes every N-th command starting at
+the I-th, so N nodes share one command file; ``--pin-cores`` gives each running
+task a core of its own, so two tasks never share one and neither's time is
+measured against the other's; and the memory the job was allocated
+(``SLURM_MEM_PER_NODE``) bounds the tasks' limits when it is less than what the
+node has available.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+from .generator import Sandbox, read_commands, solve_arguments
+from .runner import PINNED_ENV
+from .shards import ENV as SHARD_ENV
+
+DEFAULT_KILL_WAIT = 30                # slurm's default KillWait
+_POLL_SECONDS = 0.2
+# Share of the memory available at start-up the tasks' limits may add up to.
+_MEMORY_SHARE = 0.9
+
+
+class CommandTask:
+    """One solve command of a command file, as ``run-local`` and ``worker`` run it."""
+
+    def __init__(self, line: int, command: str, memory_mb: Optional[int]):
+        self.line = line
+        self.command = command
+        self.memory_mb = memory_mb
+        self.key = hashlib.sha1(command.encode()).hexdigest()
+        self.process: Optional[subprocess.Popen] = None
+        self.started = 0.0
+        self.reserved = 0
+        self.core: Optional[int] = None
+        # Set by `--cutoff`: the parsed solve arguments, and the domain they belong to.
+        self.pair = None
+        self.chain = None
+
+
+def run_local(args) -> int:
+    sandbox = Sandbox(args.sandbox_dir)
+    cmd_files = args.cmd_file or [os.path.join(sandbox.cmds_dir, 'generated_cmds.sh')]
+    try:
+        tasks = read_tasks(cmd_files)
+    except OSError as error:
+        print(f'{error.filename}: {error.strerror}', file=sys.stderr)
+        return 1
+    if getattr(args, 'stride', None):
+        try:
+            tasks = _stride(tasks, args.stride)
+        except ValueError as error:
+            print(f'--stride {args.stride}: {error}', file=sys.stderr)
+            return 1
+    if not tasks:
+        print(f'No solve commands in {", ".join(cmd_files)}', file=sys.stderr)
+        return 1
+
+    local_dir = os.path.join(sandbox.root, 'local')
+    logs_dir = os.path.join(local_dir, 'logs')
+    os.makedirs(logs_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(local_dir, 'journal.jsonl')
+    if args.fresh and os.path.exists(journal_path):
+        os.remove(journal_path)
+    finished = _finished(journal_path)
+    pending = [task for task in tasks if task.key not in finished]
+
+    jobs, pinned, capacity = local_resources(args)
+    print(f'[run-local] {len(pending)} of {len(tasks)} task(s) to run'
+          + (f', {len(tasks) - len(pending)} already done per {journal_path}'
+             if len(pending) < len(tasks) else '')
+          + f'; {jobs} job(s)' + (' pinned to cores' if pinned else '')
+          + (f', {capacity:.0f} MB for task limits' if capacity else ', memory not tracked'))
+    kill_wait = args.kill_wait if args.kill_wait is not None else DEFAULT_KILL_WAIT
+    if getattr(args, 'cutoff', None):
+        from .cutoff import CutoffScheduler
+        scheduler = CutoffScheduler(tasks, finished, args.cutoff, jobs, capacity, journal_path,
+                                    logs_dir, kill_wait, cores=pinned)
+    else:
+        scheduler = Scheduler(pending, jobs, capacity, journal_path, logs_dir, kill_wait,
+                              cores=pinned)
+    return scheduler.run()
+
+
+def read_tasks(cmd_files: Sequence[str]) -> List['CommandTask']:
+    """Every solve command of `cmd_files`, numbered from 1 across all of them."""
+    tasks: List[CommandTask] = []
+    for path in cmd_files:
+        commands = read_commands(path)
+        tasks.extend(CommandTask(line, command, _memory_limit(command))
+                     for line, command in enumerate(commands, start=len(tasks) + 1))
+    return tasks
+
+
+def local_resources(args):
+    """``(jobs, cores to pin to or None, MB the task limits may add up to or None)``."""
+    cores = _usable_cores()
+    jobs = args.jobs or cores
+    pinned = None
+    if getattr(args, 'pin_cores', False):
+        pinned = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None
+        if not pinned:
+            print('note: --pin-cores needs sched_setaffinity; running unpinned', file=sys.stderr)
+        elif jobs > len(pinned):
+            print(f'note: --jobs {jobs} capped at the {len(pinned)} core(s) to pin to',
+                  file=sys.stderr)
+            jobs = len(pinned)
+    if jobs > cores:
+        print(f'note: --jobs {jobs} on {cores} usable core(s); concurrent tasks will '
+              f'share cores and their times will show it', file=sys.stderr)
+    available = _available_mb()
+    allocated = _allocated_mb()
+    if allocated and (available is None or allocated < available):
+        available = allocated
+    capacity = args.memory_mb or (available * _MEMORY_SHARE if available else None)
+    return jobs, pinned, capacity
+
+
+class Scheduler:
+    """Runs tasks side by side as their memory fits: ``run-local``, and the base of
+    ``worker`` and ``run-local --cutoff``."""
+
+    # What the progress and summary lines start with.
+    name = 'run-local'
+
+    def __init__(self, pending: Sequence[CommandTask], jobs: int, capacity: Optional[float],
+                 journal_path: str, logs_dir: str, kill_wait: float,
+                 cores: Optional[Sequence[int]] = None):
+        self.pending = list(pending)
+        self.total = len(self.pending)
+        self.jobs = max(1, jobs)
+        self.capacity = capacity
+        self.journal_path = journal_path
+        self.logs_dir = logs_dir
+        self.kill_wait = kill_wait
+        self.running: List[CommandTask] = []
+        self.reserved = 0
+        # Cores not held by a running task; None when tasks are not pinned.
+        self.free_cores: Optional[List[int]] = list(cores) if cores else None
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.stopping: Optional[float] = None          # when the first stop signal came
+        self.killed = False
+        # Solves writing to shards (--result-sink shards) share this scheduler's.
+        self.env = dict(os.environ, **{SHARD_ENV: f'{self.name}-{socket.gethostname()}-'
+                                                  f'{os.getpid()}'})
+
+    def run(self) -> int:
+        previous = {signum: signal.signal(signum, self._stop)
+                    for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            while self.pending or self.running or self._waiting():
+                if self.stopping is None:
+                    self._admit()
+                elif not self.running:
+                    break
+                elif not self.killed and time.monotonic() - self.stopping >= self.kill_wait:
+                    self._signal_all(signal.SIGKILL)
+                time.sleep(_POLL_SECONDS)
+                self._reap()
+                self._tick()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        if self.stopping is not None:
+            print(f'[{self.name}] stopped with {len(self.pending)} task(s) not started; '
+                  f'run it again to resume', file=sys.stderr)
+            return 130
+        print(f'[{self.name}] done: {self.done} task(s) in {_clock(time.monotonic() - self.started)}'
+              + (f', {self.failed} exited abnormally (see {self.logs_dir})' if self.failed else ''))
+        return 0
+
+    # -- admission -------------------------------------------------------
+
+    def _admit(self) -> None:
+        while self.pending and len(self.running) < self.jobs:
+            task = self.pending[0]
+            need = self._reservation(task)
+            if self.running and not self._fits(need):
+                return
+            self.pending.pop(0)
+            self._start(task, need)
+
+    def _waiting(self) -> bool:
+        """Whether to keep going with nothing pending or running; see ``worker``."""
+        return False
+
+    def _tick(self) -> None:
+        """Called once per poll, after finished tasks are reaped."""
+
+    def _reservation(self, task: CommandTask) -> int:
+        if task.memory_mb:
+            return task.memory_mb
+        return int(self.capacity / self.jobs) if self.capacity else 0
+
+    def _fits(self, need: int) -> bool:
+        if self.capacity and self.reserved + need > self.capacity:
+            return False
+        available = _available_mb()
+        return available is None or available >= need
+
+    def _start(self, task: CommandTask, need: int) -> None:
+        pin, env = None, self.env
+        if self.free_cores is not None:
+            task.core = self.free_cores.pop(0)
+            pin = _pin_to(task.core)
+            env = dict(self.env, **{PINNED_ENV: str(task.core)})
+        log = open(os.path.join(self.logs_dir, f'{task.line}.log'), 'wb')
+        try:
+            # A session of its own: the terminal's Ctrl-C reaches the scheduler
+            # only, which forwards it the way slurm would.
+            task.process = subprocess.Popen(['bash', '-c', task.command], stdout=log,
+                                            stderr=subprocess.STDOUT, start_new_session=True,
+                                            preexec_fn=pin, env=env)
+        finally:
+            log.close()
+        task.started = time.monotonic()
+        task.reserved = need
+        self.reserved += need
+        self.running.append(task)
+        entry = {'event': 'start', 'key': task.key, 'line': task.line,
+                 'pid': task.process.pid, 'reserved-mb': need}
+        if task.core is not None:
+            entry['core'] = task.core
+        self._journal(entry)
+
+    # -- completion ------------------------------------------------------
+
+    def _reap(self) -> None:
+        for task in list(self.running):
+            code = task.process.poll()
+            if code is None:
+                continue
+            self.running.remove(task)
+            self.reserved -= task.reserved
+            if task.core is not None:
+                self.free_cores.append(task.core)
+            seconds = round(time.monotonic() - task.started, 2)
+            if self.stopping is not None:
+                # Cut short: not finished, so a resumed run starts it again.
+                self._journal({'event': 'stopped', 'key': task.key, 'line': task.line,
+                               'exit': code, 'seconds': seconds})
+                self._released(task, code, seconds, finished=False)
+                continue
+            self.done += 1
+            if code != 0:
+                self.failed += 1
+            self._journal({'event': 'done', 'key': task.key, 'line': task.line,
+                           'exit': code, 'seconds': seconds})
+            self._released(task, code, seconds, finished=True)
+            self._progress()
+
+    def _released(self, task: CommandTask, code: int, seconds: float, finished: bool) -> None:
+        """Called when a task's process is gone; `finished` unless it was stopped."""
+
+    def _progress(self) -> None:
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        eta = _clock(remaining / rate) if rate > 0 else '?'
+        memory = f', {self.reserved}/{self.capacity:.0f} MB reserved' if self.capacity else ''
+        print(f'[{self.name}] {self.done}/{self.total} done, {len(self.running)} running{memory} | '
+              f'{60.0 * rate:.1f} tasks/min | ETA {eta}', flush=True)
+
+    # -- stopping --------------------------------------------------------
+
+    def _stop(self, signum, frame) -> None:                  # noqa: ARG002
+        if self.stopping is not None:
+            self._signal_all(signal.SIGKILL)
+            return
+        self.stopping = time.monotonic()
+        print(f'\n[{self.name}] {signal.Signals(signum).name}: stopping {len(self.running)} '
+              f'running task(s) (SIGTERM, SIGKILL after {self.kill_wait:g}s)',
+              file=sys.stderr, flush=True)
+        self._signal_all(signal.SIGTERM)
+
+    def _signal_all(self, signum: int) -> None:
+        if signum == signal.SIGKILL:
+            self.killed = True
+        for task in self.running:
+            try:
+                os.killpg(task.process.pid, signum)
+            except OSError:
+                pass
+
+    def _journal(self, entry: Dict[str, object]) -> None:
+        entry['time'] = round(time.time(), 3)
+        with open(self.journal_path, 'a') as handle:
+            handle.write(json.dumps(entry) + '\n')
+
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+
+def _memory_limit(command: str) -> Optional[int]:
+    """The ``--memory-limit`` of a solve command, in MB; ``None`` for none."""
+    arguments = solve_arguments(command) or []
+    for flag, value in zip(arguments, arguments[1:]):
+        if flag == '--memory-limit':
+            try:
+                return int(value) or None
+            except ValueError:
+                return None
+        if flag == '--from-index':
+            from .pairindex import read_settings
+            try:
+                return int(read_settings(value).get('memory-limit', 8192)) or None
+            except (OSError, ValueError, TypeError):
+                return 8192
+    return 8192                                              # solve's own default
+
+
+def _stride(tasks: List[CommandTask], spec: str) -> List[CommandTask]:
+    """Every N-th task starting at the I-th (0-based), for ``--stride I/N``."""
+    first, _, step = str(spec).partition('/')
+    first, step = int(first), int(step or 1)
+    if step < 1 or not 0 <= first < step:
+        raise ValueError('expected I/N with 0 <= I < N')
+    return tasks[first::step]
+
+
+def _pin_to(core: int):
+    """A ``preexec_fn`` that binds the child, and everything it starts, to `core`."""
+    def pin() -> None:
+        os.sched_setaffinity(0, {core})
+    return pin
+
+
+def _finished(journal_path: str) -> set:
+    """Keys of the commands the journal records as done."""
+    done = set()
+    try:
+        with open(journal_path, 'r') as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue                                 # a line cut short by a crash
+                if entry.get('event') == 'done':
+                    done.add(entry.get('key'))
+    except OSError:
+        pass
+    return done
+
+
+def _usable_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def _available_mb() -> Optional[float]:
+    """``MemAvailable`` in MB; ``None`` where there is no ``/proc/meminfo``."""
+    try:
+        with open('/proc/meminfo', 'r') as handle:
+            for line in handle:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _allocated_mb() -> Optional[float]:
+    """The memory slurm gave this job on its node, in MB; ``None`` outside slurm."""
+    try:
+        value = int(os.environ.get('SLURM_MEM_PER_NODE') or 0)
+    except ValueError:
+        return None
+    return float(value) if value > 0 else None
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(seconds)
+    return f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
@@ -0,0 +1,210 @@
+"""Append-only result logs: ``generate --result-sink shards``.
+
+By default every pair costs the shared filesystem a ``.running`` marker, a
+``.tmp.<pid>`` file, a rename to ``<slug>.json`` and the marker's removal --
+four metadata operations on Lustre or NFS -- and a 50,000-pair sweep leaves
+50,000 small files for ``analyze`` to walk and parse one by one.
+
+With ``--result-sink shards``, every solve command carries ``--shard-dir
+<sandbox>/shards``, and the runner appends to one file per job instead:
+
+* ``shards/<job>.log``, where ``<job>`` is the slurm array job and one of
+  ``BUCKETS`` buckets its elements are spread over (``<array job id>_<task id
+  mod BUCKETS>``), the slurm job, the ``run-local``/``worker`` process
+  (through ``PYPMTEVAL_SHARD``), or else the host and process id -- a
+  10,000-element array writes ``BUCKETS`` shards, not 10,000;
+* a *start* record when a pair starts, standing in for the marker, and a
+  *result* record with the whole result when it ends.
+
+A record is a 12-byte header -- ``PMTR``, the payload's length and its CRC-32,
+little-endian -- then the payload, compact JSON. Writers take an exclusive
+``flock`` for the one ``write`` of a record, so the pairs ``solve-batch
+--jobs`` or ``run-local`` run side by side never interleave. A job killed in
+the middle of a write leaves a torn tail: :func:`read` stops at the first
+record that is short or fails its checksum, and says how many bytes it
+skipped.
+
+``analyze``, ``report``, ``merge`` and ``generate --skip-existing`` read the
+shards beside the per-pair files: a pair's latest result wins wherever it is,
+and a start record with no result after it counts as ``KILLED``, like a
+leftover marker. Tracebacks, profiles and the ``--result-store`` copies are
+still written as files.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import socket
+import struct
+import sys
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+MAGIC = b'PMTR'
+_HEADER = struct.Struct('<4sII')
+START = 'start'
+RESULT = 'result'
+
+# Set by `run-local` and `worker` for the solves they start: their shard.
+ENV = 'PYPMTEVAL_SHARD'
+# The shards the elements of one slurm array share.
+BUCKETS = 32
+
+
+def shard_name() -> str:
+    """The name of this job's shard: one per bucket of a slurm array, slurm job or scheduler."""
+    name = os.environ.get(ENV)
+    if name:
+        return name
+    array_job = os.environ.get('SLURM_ARRAY_JOB_ID')
+    if array_job:
+        try:
+            bucket = int(os.environ.get('SLURM_ARRAY_TASK_ID') or 0) % BUCKETS
+        except ValueError:
+            bucket = 0
+        return f'{array_job}_{bucket}'
+    if os.environ.get('SLURM_JOB_ID'):
+        return os.environ['SLURM_JOB_ID']
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def shard_path(shard_dir: str) -> str:
+    return os.path.join(shard_dir, f'{shard_name()}.log')
+
+
+def append(path: str, kind: str, payload: Dict[str, Any]) -> None:
+    """Append one record to the shard at `path`."""
+    body = json.dumps({'record': kind, 'payload': payload}, separators=(',', ':'),
+                      default=str).encode()
+    frame = _HEADER.pack(MAGIC, len(body), zlib.crc32(body)) + body
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        view = memoryview(frame)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)                                         # releases the lock
+
+
+def read(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """``(kind, payload)`` of every whole record of a shard, in the order written.
+
+    Stops at a torn tail: a header or payload cut short, or a payload whose
+    checksum does not match.
+    """
+    for body in _bodies(path):
+        try:
+            record = json.loads(body)
+        except ValueError:
+            return
+        yield record.get('record'), record.get('payload') or {}
+
+
+def find(shard_dir: Optional[str], tag: str, task_id: str) -> Optional[Dict[str, Any]]:
+    """The latest result of one pair in the shards of `shard_dir`; ``None`` without one.
+
+    For a solve that needs its own pair's last result (the rung below, a
+    cutoff's count): only the records that mention the task id are decoded.
+    """
+    if not shard_dir or not os.path.isdir(shard_dir):
+        return None
+    needle = b'"task-id":' + json.dumps(task_id).encode()
+    found = None
+    for name in sorted(os.listdir(shard_dir)):
+        if not name.endswith('.log'):
+            continue
+        for body in _bodies(os.path.join(shard_dir, name)):
+            if needle not in body:
+                continue
+            try:
+                record = json.loads(body)
+            except ValueError:
+                break
+            payload = record.get('payload') or {}
+            if (record.get('record') == RESULT and _key(payload) == (tag, task_id)
+                    and _started(payload) >= _started(found)):
+                found = payload
+    return found
+
+
+def _bodies(path: str) -> Iterator[bytes]:
+    """The payload of every whole record of a shard; a note on stderr for a torn tail."""
+    try:
+        handle = open(path, 'rb')
+    except OSError:
+        return
+    with handle:
+        data = handle.read()
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        magic, length, crc = _HEADER.unpack_from(data, offset)
+        body = data[offset + _HEADER.size:offset + _HEADER.size + length]
+        if magic != MAGIC or len(body) < length or zlib.crc32(body) != crc:
+            break
+        offset += _HEADER.size + length
+        yield body
+    if offset < len(data):
+        print(f'note: {path}: {len(data) - offset} byte(s) of a torn record at the end, '
+              f'skipped', file=sys.stderr)
+
+
+class ShardResults:
+    """What the shards of a sandbox hold: the latest result of each pair, and the pairs
+    that started without ever reporting one."""
+
+    def __init__(self):
+        self.results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.started: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, shard_dir: Optional[str]) -> 'ShardResults':
+        shards = cls()
+        if not shard_dir or not os.path.isdir(shard_dir):
+            return shards
+        for name in sorted(os.listdir(shard_dir)):
+            if not name.endswith('.log'):
+                continue
+            for kind, payload in read(os.path.join(shard_dir, name)):
+                key = _key(payload)
+                if kind == RESULT:
+                    if _started(payload) >= _started(shards.results.get(key)):
+                        shards.results[key] = payload
+                elif kind == START:
+                    if _started(payload) >= _started(shards.started.get(key)):
+                        shards.started[key] = payload
+        return shards
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def result(self, tag: str, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.results.get((tag, task_id))
+
+    def unfinished(self) -> Iterator[Dict[str, Any]]:
+        """Start records with no result as late as themselves: killed before reporting."""
+        for key, payload in self.started.items():
+            if _started(payload) > _started(self.results.get(key)):
+                yield payload
+
+
+def latest(on_file: Optional[Dict[str, Any]], sharded: Optional[Dict[str, Any]]):
+    """The later of a pair's result file and its shard record, either of which may be missing."""
+    if sharded is None:
+        return on_file
+    if on_file is None:
+        return sharded
+    return sharded if _started(sharded) > _started(on_file) else on_file
+
+
+def _key(payload: Dict[str, Any]) -> Tuple[str, str]:
+    return ((payload.get('planner') or {}).get('tag'), (payload.get('task') or {}).get('task-id'))
+
+
+def _started(payload: Optional[Dict[str, Any]]) -> float:
+    if payload is None:
+        return float('-inf')
+    return float((payload.get('run') or {}).get('started') or 0.0)
@@ -0,0 +1,309 @@
+"""An out-of-process watchdog for one solve: ``solve --supervise``.
+
+The runner's own limits live inside the solving process: ``signal.alarm`` and
+``RLIMIT_AS``. Both have blind spots. A solve stuck in native code never gets
+back to the interpreter to see SIGALRM, and an engine that shells out (Fast
+Downward's translator and search, ENHSP's JVM) gets an address-space cap *per
+process* and no wall-clock cap at all. Either way the job runs until slurm
+kills it, and the pair comes back as a ``KILLED`` row that cost its whole
+allocation.
+
+With ``--supervise`` the solve runs in a forked child, in a process group of its
+own, while the parent stays small and watches it from outside:
+
+* the wall clock, with a short grace after the task's limit so the child's own
+  alarm still gets the first chance to report;
+* the resident memory of the whole process tree, summed over ``/proc``;
+* a cgroup v2 of the child's own when the hierarchy is writable, whose
+  ``memory.max`` the kernel enforces on the tree and whose ``oom_kill`` count
+  tells a memory kill apart from a crash.
+
+At a limit the whole group is killed, and the parent -- which never ran the
+solve and so is in no state to be stuck -- writes the ``TIMEOUT``/``MEMOUT``
+result itself. The child's own limits stay armed; the watchdog only adds a
+second line behind them, one that fires before slurm's.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from . import proctree
+from .runner import KILLED, MEMOUT, TIMEOUT
+
+# How often the tree is polled, and how long after the task's time limit the
+# child's own SIGALRM handler is given to write its result before the watchdog
+# kills it.
+POLL_SECONDS = 0.5
+GRACE_SECONDS = 10.0
+# Between the polite signal a cancellation forwards and SIGKILL.
+KILL_WAIT_SECONDS = 5.0
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+@dataclass
+class Verdict:
+    """How a supervised child ended."""
+
+    pid: int
+    exit_code: Optional[int] = None          # set when it exited on its own
+    signal: Optional[int] = None             # set when a signal killed it
+    status: Optional[str] = None             # TIMEOUT / MEMOUT / KILLED when the watchdog acted
+    detail: str = ''
+    peak_rss_mb: float = 0.0
+    cpu_seconds: float = 0.0
+    cgroup: Optional[str] = None
+
+    @property
+    def clean(self) -> bool:
+        """The child finished by itself and reported success."""
+        return self.status is None and self.exit_code == 0
+
+
+def run_supervised(target: Callable[[], int], time_limit: Optional[int],
+                   memory_limit: Optional[int], started: float) -> Verdict:
+    """Run `target` in a forked child and watch it until it ends.
+
+    `started` is the ``time.monotonic()`` the task's budget is counted from, so
+    the watchdog's clock agrees with the child's alarm. The child never
+    returns from here: it runs `target` and exits with its return value.
+    """
+    ready_read, ready_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:                                             # the child
+        os.close(ready_write)
+        code = 1
+        try:
+            os.setpgid(0, 0)
+            # Wait until the parent has put us in our cgroup: the first
+            # allocation must already count against it.
+            os.read(ready_read, 1)
+            os.close(ready_read)
+            code = target() or 0
+        except BaseException:                                # noqa: BLE001 -- must not return into the caller
+            import traceback
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    os.close(ready_read)
+    try:
+        os.setpgid(pid, pid)                                 # whichever of us gets there first
+    except OSError:
+        pass
+    cgroup = _Cgroup.create(pid, memory_limit)
+    os.write(ready_write, b'x')
+    os.close(ready_write)
+    return _watch(pid, cgroup, time_limit, memory_limit, started)
+
+
+def _watch(pid: int, cgroup: Optional['_Cgroup'], time_limit: Optional[int],
+           memory_limit: Optional[int], started: float) -> Verdict:
+    verdict = Verdict(pid=pid, cgroup=cgroup.path if cgroup else None)
+    cancelled = []
+
+    def forward(signum, frame):                              # noqa: ARG001
+        # A cancellation reaches the watchdog too; pass it on, so the child's
+        # own handler records KILLED, and give it a moment before SIGKILL.
+        if not cancelled:
+            cancelled.append((signum, time.monotonic()))
+            _signal_tree(pid, signum)
+
+    previous = {}
+    for signame in ('SIGTERM', 'SIGUSR1', 'SIGINT'):
+        signum = getattr(signal, signame, None)
+        if signum is not None:
+            try:
+                previous[signum] = signal.signal(signum, forward)
+            except (ValueError, OSError):
+                pass
+
+    deadline = started + time_limit + GRACE_SECONDS if time_limit and time_limit > 0 else None
+    try:
+        while True:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                _record_exit(verdict, status)
+                break
+
+            usage = proctree.tree_usage(pid)
+            verdict.peak_rss_mb = max(verdict.peak_rss_mb, usage['rss-mb'],
+                                      cgroup.peak_mb() if cgroup else 0.0)
+            verdict.cpu_seconds = max(verdict.cpu_seconds, usage['cpu-seconds'])
+
+            if memory_limit and memory_limit > 0 and usage['rss-mb'] > memory_limit:
+                _kill(pid, cgroup, verdict, MEMOUT,
+                      f'The process tree ({usage["processes"]} processes) reached '
+                      f'{usage["rss-mb"]:.0f}MB resident, over the {memory_limit}MB limit; '
+                      f'killed by the watchdog.')
+            elif deadline is not None and time.monotonic() > deadline:
+                _kill(pid, cgroup, verdict, TIMEOUT,
+                      f'Still running {GRACE_SECONDS:.0f}s past the {time_limit}s limit '
+                      f'(stuck where the alarm cannot reach it); killed by the watchdog.')
+            elif cancelled and time.monotonic() - cancelled[0][1] > KILL_WAIT_SECONDS:
+                _kill(pid, cgroup, verdict, KILLED,
+                      f'Cancelled by signal {cancelled[0][0]} and did not stop in '
+                      f'{KILL_WAIT_SECONDS:.0f}s; killed by the watchdog.')
+            if verdict.status:
+                _, status = os.waitpid(pid, 0)
+                _record_exit(verdict, status)
+                break
+            time.sleep(POLL_SECONDS)
+    finally:
+        for signum, handler in previous.items():
+            try:
+                signal.signal(signum, handler)
+            except (ValueError, OSError):
+                pass
+        if cgroup:
+            verdict.peak_rss_mb = max(verdict.peak_rss_mb, cgroup.peak_mb())
+            # An OOM kill the child survived (a translator it restarted, an
+            # engine that reported the failure itself) is the child's to report.
+            if verdict.status is None and verdict.exit_code != 0 and cgroup.oom_killed():
+                verdict.status = MEMOUT
+                verdict.detail = (f'The kernel OOM-killed a process of the run at the '
+                                  f'{memory_limit}MB cgroup limit.')
+            cgroup.remove()
+    return verdict
+
+
+def _record_exit(verdict: Verdict, status: int) -> None:
+    if os.WIFSIGNALED(status):
+        verdict.signal = os.WTERMSIG(status)
+    else:
+        verdict.exit_code = os.WEXITSTATUS(status)
+
+
+def _kill(pid: int, cgroup: Optional['_Cgroup'], verdict: Verdict, status: str,
+          detail: str) -> None:
+    verdict.status = status
+    verdict.detail = detail
+    if cgroup:
+        cgroup.kill()
+    _signal_tree(pid, signal.SIGKILL)
+
+
+def _signal_tree(pid: int, signum: int) -> None:
+    """Signal the child's process group, and every descendant that left it.
+
+    An engine that starts its workers in a session of their own is out of the
+    group, but still in the tree.
+    """
+    members = proctree.tree(pid)
+    try:
+        os.killpg(pid, signum)
+    except OSError:
+        pass
+    for member in members:
+        try:
+            os.kill(member, signum)
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------------------------
+# cgroup v2
+# ----------------------------------------------------------------------
+
+class _Cgroup:
+    """A cgroup v2 of the supervised child's own, when the hierarchy allows it.
+
+    Creating one needs a writable cgroup2 mount with the memory controller
+    delegated to the cgroup we run in -- which a systemd user slice or a slurm
+    job with ``ConstrainRAMSpace`` often is, and a container often is not.
+    Every step is best-effort: without a cgroup the watchdog falls back to
+    polling ``/proc``, which is slower to react but sees the same tree.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def create(cls, pid: int, memory_limit: Optional[int]) -> Optional['_Cgroup']:
+        if not memory_limit or memory_limit <= 0:
+            return None
+        parent = _own_cgroup()
+        if parent is None:
+            return None
+        path = os.path.join(parent, f'pypmteval-{pid}')
+        try:
+            with open(os.path.join(parent, 'cgroup.subtree_control'), 'r') as handle:
+                enabled = handle.read().split()
+            if 'memory' not in enabled:
+                with open(os.path.join(parent, 'cgroup.subtree_control'), 'w') as handle:
+                    handle.write('+memory')
+            os.mkdir(path)
+        except OSError:
+            return None
+        cgroup = cls(path)
+        try:
+            cgroup._write('memory.max', str(int(memory_limit) * 1024 * 1024))
+            # Swapping a run past its limit would turn a MEMOUT into a TIMEOUT.
+            cgroup._write('memory.swap.max', '0', required=False)
+            cgroup._write('cgroup.procs', str(pid))
+        except OSError:
+            cgroup.remove()
+            return None
+        return cgroup
+
+    def oom_killed(self) -> bool:
+        for line in self._read('memory.events').splitlines():
+            key, _, value = line.partition(' ')
+            if key == 'oom_kill' and value.strip().isdigit():
+                return int(value) > 0
+        return False
+
+    def peak_mb(self) -> float:
+        text = self._read('memory.peak').strip()      # kernel 5.19 and later
+        return int(text) / (1024.0 * 1024.0) if text.isdigit() else 0.0
+
+    def kill(self) -> None:
+        self._write('cgroup.kill', '1', required=False)   # kernel 5.14 and later
+
+    def remove(self) -> None:
+        # Only an empty cgroup can be removed; its processes may still be dying.
+        for _attempt in range(20):
+            try:
+                os.rmdir(self.path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    def _read(self, name: str) -> str:
+        try:
+            with open(os.path.join(self.path, name), 'r') as handle:
+                return handle.read()
+        except OSError:
+            return ''
+
+    def _write(self, name: str, value: str, required: bool = True) -> None:
+        try:
+            with open(os.path.join(self.path, name), 'w') as handle:
+                handle.write(value)
+        except OSError:
+            if required:
+                raise
+
+
+def _own_cgroup() -> Optional[str]:
+    """The cgroup2 directory this process lives in, if there is a writable one."""
+    if not os.path.isfile(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+        return None                                          # no unified hierarchy here
+    try:
+        with open('/proc/self/cgroup', 'r') as handle:
+            for line in handle:
+                hierarchy, _, rest = line.strip().partition(':')
+                controllers, _, relative = rest.partition(':')
+                if hierarchy == '0' and not controllers:
+                    path = os.path.join(CGROUP_ROOT, relative.lstrip('/'))
+                    return path if os.access(path, os.W_OK) else None
+    except OSError:
+        return None
+    return None
@@ -0,0 +1,261 @@
+"""Share one sweep between machines without slurm: ``pypmtevalcli worker``.
+
+``run_local.sh`` splits nothing: it runs the whole command file on the machine
+it is started on, and ``run-local --stride`` can only split it up front, so a
+slow workstation holds up the sweep while a fast one idles. ``worker --queue
+<sandbox>`` instead takes pairs one at a time from the sandbox's command file,
+as its cores and memory free up (it admits them exactly as ``run-local``
+does). Start one on every machine that mounts the sandbox, at any time; each
+ends when there is nothing left to take.
+
+Everything the workers agree on lives in ``<sandbox>/queue/``, and nothing but
+the filesystem is shared:
+
+* A pair is taken by creating ``leases/<key>.lease`` with ``O_CREAT|O_EXCL``,
+  which exactly one worker can do (NFSv3 and later honour it). The key is the
+  SHA-1 of the command, as in ``run-local``'s journal.
+* While the pair runs its worker touches the lease every ``--heartbeat``
+  seconds. A lease untouched for ``--lease-seconds`` belongs to a worker that
+  died: another worker renames it out of the way (only one rename can win),
+  then takes the pair as if it were new. Ages are measured against the file
+  server's clock, not the workers', so a host whose clock is off neither
+  steals live leases nor keeps dead ones.
+* A finished pair gets ``done/<key>.json`` and its lease is dropped. A pair
+  stopped by Ctrl-C (its runner records ``KILLED``) only drops its lease, so
+  whoever is still running takes it again.
+
+A worker with nothing left to take stays up while other workers still hold
+leases, in case one of them dies and its pairs come back. Results land in
+``results/<tag>/`` as usual; at worst, a worker taken for dead while it was
+only unreachable runs a pair a second time, and its result replaces the
+first.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import time
+from typing import List, Optional, Sequence, Set
+
+from .generator import Sandbox
+from .scheduler import DEFAULT_KILL_WAIT, CommandTask, Scheduler, local_resources, read_tasks
+
+DEFAULT_HEARTBEAT = 30
+DEFAULT_LEASE_SECONDS = 600
+# How often an idle worker looks for pairs come back from a dead one.
+_IDLE_POLL = 5
+
+
+class WorkQueue:
+    """The lease and done files of one sandbox's queue."""
+
+    def __init__(self, root: str, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.root = root
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.leases_dir = os.path.join(root, 'leases')
+        self.done_dir = os.path.join(root, 'done')
+        self.logs_dir = os.path.join(root, 'logs')
+        self.workers_dir = os.path.join(root, 'workers')
+        for path in (self.leases_dir, self.done_dir, self.logs_dir, self.workers_dir):
+            os.makedirs(path, exist_ok=True)
+        self._clock = os.path.join(self.workers_dir, f'{worker}.clock')
+
+    def lease_path(self, key: str) -> str:
+        return os.path.join(self.leases_dir, f'{key}.lease')
+
+    def is_done(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.done_dir, f'{key}.json'))
+
+    def done_keys(self) -> Set[str]:
+        """The keys of every finished pair, from one listing of ``done/``."""
+        return {name[:-len('.json')] for name in os.listdir(self.done_dir)
+                if name.endswith('.json')}
+
+    def claim(self, task: CommandTask) -> bool:
+        """Take `task`, reclaiming it if its lease expired; whether it is now ours."""
+        path = self.lease_path(task.key)
+        if os.path.exists(path) and not self._expire(path):
+            return False
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False                           # another worker was quicker
+        with os.fdopen(fd, 'w') as handle:
+            json.dump({'worker': self.worker, 'line': task.line, 'claimed': time.time()}, handle)
+        # Someone may have finished it between our check and our claim.
+        if self.is_done(task.key):
+            self.release(task)
+            return False
+        return True
+
+    def heartbeat(self, task: CommandTask) -> bool:
+        """Touch `task`'s lease; ``False`` when it is no longer there to touch."""
+        try:
+            os.utime(self.lease_path(task.key))
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return True                            # the server is slow, not our lease gone
+
+    def finish(self, task: CommandTask, code: int, seconds: float) -> None:
+        path = os.path.join(self.done_dir, f'{task.key}.json')
+        tmp = f'{path}.{self.worker}.tmp'
+        with open(tmp, 'w') as handle:
+            json.dump({'worker': self.worker, 'line': task.line, 'exit': code,
+                       'seconds': seconds, 'finished': time.time()}, handle)
+        os.replace(tmp, path)
+        self.release(task)
+
+    def release(self, task: CommandTask) -> None:
+        """Drop `task`'s lease, unless another worker has taken it over meanwhile."""
+        path = self.lease_path(task.key)
+        try:
+            with open(path, 'r') as handle:
+                if json.load(handle).get('worker') != self.worker:
+                    return
+            os.remove(path)
+        except (OSError, ValueError):
+            pass
+
+    def live_leases(self) -> Set[str]:
+        """The keys of the leases that have not expired, whoever holds them."""
+        now = self.now()
+        live = set()
+        for name in os.listdir(self.leases_dir):
+            if not name.endswith('.lease'):
+                continue
+            try:
+                if now - os.stat(os.path.join(self.leases_dir, name)).st_mtime < self.lease_seconds:
+                    live.add(name[:-len('.lease')])
+            except FileNotFoundError:
+                continue
+        return live
+
+    def now(self) -> float:
+        """The file server's idea of the time, read off a file it just stamped."""
+        try:
+            with open(self._clock, 'a'):
+                pass
+            os.utime(self._clock)
+            return os.stat(self._clock).st_mtime
+        except OSError:
+            return time.time()
+
+    def _expire(self, path: str) -> bool:
+        """Move an expired lease out of the way; whether the pair is free to take."""
+        try:
+            if self.now() - os.stat(path).st_mtime < self.lease_seconds:
+                return False
+            grave = f'{path}.expired-{self.worker}'
+            os.rename(path, grave)                 # one worker's rename wins
+        except FileNotFoundError:
+            return True                            # released meanwhile
+        except OSError:
+            return False
+        try:
+            os.remove(grave)
+        except OSError:
+            pass
+        return True
+
+
+class _Worker(Scheduler):
+    name = 'worker'
+
+    def __init__(self, queue: WorkQueue, tasks: Sequence[CommandTask], jobs: int,
+                 capacity: Optional[float], journal_path: str, kill_wait: float,
+                 heartbeat: float, cores: Optional[Sequence[int]] = None):
+        super().__init__(tasks, jobs, capacity, journal_path, queue.logs_dir, kill_wait,
+                         cores=cores)
+        self.queue = queue
+        self.tasks = list(tasks)
+        self.heartbeat_every = heartbeat
+        self.last_beat = time.monotonic()
+        self.last_scan = 0.0
+        # Keys of `tasks` found done, here or by another worker, as they are noticed.
+        self.finished: Set[str] = set()
+
+    def _admit(self) -> None:
+        while self.pending and len(self.running) < self.jobs:
+            task = self.pending[0]
+            if self.queue.is_done(task.key):
+                self.finished.add(task.key)
+                self.pending.pop(0)
+                continue
+            need = self._reservation(task)
+            if self.running and not self._fits(need):
+                return
+            self.pending.pop(0)
+            if self.queue.claim(task):
+                self._start(task, need)
+
+    def _progress(self) -> None:
+        # The other workers' pairs count too, as far as this worker has seen
+        # them: a rate of this worker's alone would make a poor ETA for the sweep.
+        print(f'[worker] {self.done} run here; {len(self.finished)}/{len(self.tasks)} done in '
+              f'the queue, {len(self.running)} running here', flush=True)
+
+    def _released(self, task: CommandTask, code: int, seconds: float, finished: bool) -> None:
+        if finished:
+            self.queue.finish(task, code, seconds)
+            self.finished.add(task.key)
+        else:
+            self.queue.release(task)
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        if now - self.last_beat >= self.heartbeat_every:
+            self.last_beat = now
+            for task in self.running:
+                if not self.queue.heartbeat(task):
+                    print(f'[worker] the lease on line {task.line} is gone (taken for dead?); '
+                          f'it may run twice', file=sys.stderr)
+
+    def _waiting(self) -> bool:
+        """Nothing to take, nothing running: wait while other workers' leases may still expire."""
+        if self.stopping is not None:
+            return False
+        now = time.monotonic()
+        if now - self.last_scan < _IDLE_POLL:
+            return True
+        self.last_scan = now
+        # Pairs whose lease expired, or that a stopped worker gave back; the
+        # ones live workers hold stay theirs.
+        done, live = self.queue.done_keys(), self.queue.live_leases()
+        self.finished.update(task.key for task in self.tasks if task.key in done)
+        self.pending = [task for task in self.tasks
+                        if task.key not in done and task.key not in live]
+        return bool(self.pending) or bool(live)
+
+
+def worker(args) -> int:
+    sandbox = Sandbox(args.queue)
+    cmd_files = args.cmd_file or [os.path.join(sandbox.cmds_dir, 'generated_cmds.sh')]
+    try:
+        tasks = read_tasks(cmd_files)
+    except OSError as error:
+        print(f'{error.filename}: {error.strerror}', file=sys.stderr)
+        return 1
+    if not tasks:
+        print(f'No solve commands in {", ".join(cmd_files)}', file=sys.stderr)
+        return 1
+
+    name = args.name or f'{socket.gethostname()}-{os.getpid()}'
+    queue = WorkQueue(os.path.join(sandbox.root, 'queue'), name,
+                      args.lease_seconds or DEFAULT_LEASE_SECONDS)
+    done = queue.done_keys()
+    pending: List[CommandTask] = [task for task in tasks if task.key not in done]
+    jobs, pinned, capacity = local_resources(args)
+    print(f'[worker] {name}: {len(pending)} of {len(tasks)} task(s) not done yet; '
+          f'{jobs} job(s)' + (' pinned to cores' if pinned else '')
+          + (f', {capacity:.0f} MB for task limits' if capacity else ', memory not tracked'))
+    runner = _Worker(queue, pending, jobs, capacity,
+                     os.path.join(queue.workers_dir, f'{name}.jsonl'),
+                     args.kill_wait if args.kill_wait is not None else DEFAULT_KILL_WAIT,
+                     args.heartbeat or DEFAULT_HEARTBEAT, cores=pinned)
+    return runner.run()
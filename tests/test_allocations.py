@@ -0,0 +1,49 @@
+"""--trace-allocations: a run that crashes still records its snapshot, and tracing stops."""
+
+import json
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+from pypmt_eval_toolkit import allocations
+
+pytest.importorskip('unified_planning')
+
+DOMAIN = '(define (domain d) (:requirements :strips) (:predicates (p)) (:action a :effect (p)))'
+PROBLEM = '(define (problem q) (:domain d) (:init) (:goal (p)))'
+
+
+def test_a_crashed_run_records_its_allocations(tmp_path):
+    (tmp_path / 'domain.pddl').write_text(DOMAIN)
+    (tmp_path / 'p01.pddl').write_text(PROBLEM)
+    (tmp_path / 'planner.json').write_text(json.dumps(
+        {'planner-tag': 'Nowhere', 'up-planner-name': 'no-such-engine', 'planner-params': {}}))
+    subprocess.run(
+        [sys.executable, '-c', 'import sys; from pypmt_eval_toolkit.cli import main; '
+                               'sys.exit(main(sys.argv[1:]))',
+         'solve', '--planner-cfg', str(tmp_path / 'planner.json'),
+         '--domain', str(tmp_path / 'domain.pddl'), '--problem', str(tmp_path / 'p01.pddl'),
+         '--results-dir', str(tmp_path / 'results'), '--errors-dir', str(tmp_path / 'errors'),
+         '--suite', 'toy', '--domain-name', 'd', '--instance', 'p01',
+         '--time-limit', '60', '--memory-limit', '0', '--trace-allocations'],
+        check=False, capture_output=True, timeout=120)
+    [path] = (tmp_path / 'results').rglob('*.json')
+    result = json.loads(path.read_text())
+    assert result['status'] == 'ERROR'
+    assert result['allocations']['peak-traced-mb'] >= 0
+    assert result['allocations']['sites']
+
+
+def test_stop_ends_tracing_and_leaves_a_record_be():
+    allocations.start()
+    result = {}
+    allocations.record(result)
+    assert not tracemalloc.is_tracing()
+    allocations.stop()
+    assert 'allocations' in result
+
+    allocations.start()
+    allocations.stop()
+    assert not tracemalloc.is_tracing()
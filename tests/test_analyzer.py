@@ -0,0 +1,75 @@
+"""analyze streams its rows: the CSV and the tables come out as they did from the full list."""
+
+import csv
+import io
+import json
+
+from pypmt_eval_toolkit.analyzer import (_CSV_COLUMNS, _Collector, _is_solved, _pairwise_section,
+                                         iter_rows, load_rows)
+from pypmt_eval_toolkit.columns import Columns
+from pypmt_eval_toolkit.cube import Cube
+
+
+def _task(index):
+    return {'task_id': f'toy:d{index % 3}:p{index:02d}', 'suite': 'toy', 'track': 'classical',
+            'domain': f'd{index % 3}', 'instance': f'p{index:02d}'}
+
+
+def _result(tag, task, status, validated=True):
+    return {'status': status, 'planner': {'tag': tag, 'engine': tag},
+            'task': {'task-id': task['task_id'], 'track': task['track'],
+                     'domain': task['domain'], 'instance': task['instance']},
+            'metrics': {'validated': validated if status == 'SOLVED' else None},
+            'timings': {'total-seconds': 1.5}}
+
+
+def _sandbox(tmp_path):
+    tasks = [_task(index) for index in range(9)]
+    (tmp_path / 'tasks.json').write_text(json.dumps({
+        'tasks': tasks, 'expected': {'b': [t['task_id'] for t in tasks],
+                                     'a': [t['task_id'] for t in tasks]}}))
+    for tag in ('b', 'a'):
+        (tmp_path / 'results' / tag).mkdir(parents=True)
+    for index, task in enumerate(tasks[:6]):
+        for tag, status in (('a', 'SOLVED'), ('b', 'SOLVED' if index % 2 else 'TIMEOUT')):
+            path = tmp_path / 'results' / tag / f'{task["instance"]}.json'
+            path.write_text(json.dumps(_result(tag, task, status, validated=index != 4)))
+    marker = tmp_path / 'results' / 'a' / f'{tasks[6]["instance"]}.running'
+    marker.write_text(json.dumps({'planner': {'tag': 'a'}, 'task': {'task-id': tasks[6]['task_id']}}))
+    return tmp_path
+
+
+def test_rows_come_in_order_results_then_killed_then_missing(tmp_path):
+    rows = list(iter_rows(str(_sandbox(tmp_path)), jobs=1))
+    statuses = [row['status'] for row in rows]
+    assert statuses[:12].count('KILLED') == 0 and 'MISSING' not in statuses[:12]
+    assert statuses[12] == 'KILLED'
+    assert statuses[13:] == ['MISSING'] * 5
+    assert rows == load_rows(str(tmp_path), jobs=1)
+
+
+def test_the_collected_csv_is_the_sorted_rows(tmp_path):
+    rows = load_rows(str(_sandbox(tmp_path)), jobs=1)
+    collected = _Collector()
+    assert list(collected.rows(rows)) == rows
+    collected.write(str(tmp_path / 'results.csv'))
+
+    expected = io.StringIO(newline='')
+    writer = csv.DictWriter(expected, fieldnames=_CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for row in sorted(rows, key=lambda r: (r['planner'] or '', r['track'] or '',
+                                           r['domain'] or '', r['instance'] or '')):
+        writer.writerow(row)
+    with open(tmp_path / 'results.csv', newline='') as handle:
+        assert handle.read() == expected.getvalue()
+    assert collected.count == len(rows)
+    assert [row['status'] for row in collected.notable] == ['SOLVED']      # failed validation
+
+
+def test_head_to_head_from_the_columns(tmp_path):
+    cube = Cube()
+    cube.update(load_rows(str(_sandbox(tmp_path)), jobs=1), complete=True)
+    lines = _pairwise_section(Columns(cube.rows(), _is_solved), ['a', 'b'])
+    assert lines[0] == 'Head-to-head on the 9 tasks every planner attempted'
+    assert lines[4].split() == ['a', '5', '2']
+    assert lines[5].split() == ['b', '3', '0']
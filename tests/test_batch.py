@@ -0,0 +1,53 @@
+"""solve-batch: a planner whose engine fails to resolve is recorded as ERROR, the rest run on."""
+
+import argparse
+import json
+
+import pytest
+
+pytest.importorskip('unified_planning')
+
+from pypmt_eval_toolkit import engines  # noqa: E402
+from pypmt_eval_toolkit.batch import solve_batch  # noqa: E402
+from pypmt_eval_toolkit.runner import preload  # noqa: E402
+
+
+def _resolve(engine, **_kwargs):
+    if engine == 'broken':
+        raise RuntimeError('the plugin blew up on import')
+
+
+def _config(tmp_path, tag, engine):
+    path = tmp_path / f'{tag}.json'
+    path.write_text(json.dumps({'planner-tag': tag, 'up-planner-name': engine}))
+    return str(path)
+
+
+def test_preload_reports_any_failure_and_goes_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(engines, 'resolve_engine', _resolve)
+    broken, fine = _config(tmp_path, 'Broken', 'broken'), _config(tmp_path, 'Fine', 'fine')
+    failures = preload([broken, fine])
+    assert list(failures) == [broken]
+    assert isinstance(failures[broken], RuntimeError)
+
+
+def test_the_broken_planners_pairs_are_recorded_as_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(engines, 'resolve_engine', _resolve)
+    config = _config(tmp_path, 'Broken', 'broken')
+    commands = tmp_path / 'Broken.txt'
+    commands.write_text(''.join(
+        f'pypmtevalcli solve --planner-cfg {config} --task-id toy:d:{name} --suite toy '
+        f'--domain-name d --instance {name} --domain {tmp_path}/domain.pddl '
+        f'--problem {tmp_path}/{name}.pddl --results-dir {tmp_path}/results '
+        f'--errors-dir {tmp_path}/errors\n' for name in ('p01', 'p02')))
+    assert solve_batch(argparse.Namespace(cmd_file=str(commands), slice=None, indices=None,
+                                          jobs=1)) == 0
+    for name in ('p01', 'p02'):
+        result = json.loads((tmp_path / 'results' / f'toy_d_{name}.json').read_text())
+        assert result['status'] == 'ERROR'
+        assert result['error'] == {'type': 'RuntimeError',
+                                   'message': 'the plugin blew up on import'}
+        assert not (tmp_path / 'results' / f'toy_d_{name}.running').exists()
+        log = (tmp_path / 'errors' / f'Broken__toy_d_{name}.log').read_text()
+        assert 'RuntimeError: the plugin blew up on import' in log
+        assert 'Traceback' in log
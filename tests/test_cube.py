@@ -0,0 +1,84 @@
+"""The cube: kept up to date pair by pair, it has to equal one built from scratch."""
+
+import random
+
+import pytest
+
+from pypmt_eval_toolkit.cube import Cube, refresh
+from pypmt_eval_toolkit.report import RUNTIMES
+
+PLANNERS = ('fd', 'lama', 'pyperplan', 'symk')
+STATUSES = ('SOLVED', 'SOLVED', 'SOLVED', 'TIMEOUT', 'MEMOUT', 'ERROR', 'UNSOLVABLE')
+
+
+def _row(rng, planner, task):
+    status = rng.choice(STATUSES)
+    solved = status == 'SOLVED'
+    seconds = round(rng.uniform(0.001, 300.0), 6)
+    return {
+        'planner': planner, 'task_id': f'ipc:{task // 20}:p{task:03d}', 'engine': planner,
+        'track': rng.choice(('classical', 'numeric')), 'domain': f'd{task // 20}',
+        'status': status, 'validated': solved if solved else None,
+        'total_seconds': seconds, 'end_to_end_seconds': seconds + 0.5,
+        'search_seconds': seconds * 0.8 if rng.random() < 0.8 else None,
+        'solve_seconds': seconds * 0.9, 'peak_memory_mb': round(rng.uniform(10, 8000), 1),
+        'plan_length': rng.randint(1, 200) if solved else None,
+        'makespan': None, 'time_limit': 300,
+    }
+
+
+def _sweep(rng, tasks=120):
+    return {(planner, task): _row(rng, planner, task)
+            for planner in PLANNERS for task in range(tasks)}
+
+
+def _state(cube):
+    return (cube.pairs, dict(cube.counts), cube.histograms, cube.best_time, cube.best_cost)
+
+
+def _from_scratch(rows):
+    cube = Cube()
+    cube.update(rows, complete=True)
+    return cube
+
+
+def test_incremental_updates_equal_a_full_build(tmp_path):
+    rng = random.Random(7)
+    sweep = _sweep(rng)
+    cube = _from_scratch(sweep.values())
+    for _round in range(200):
+        for key in rng.sample(sorted(sweep), 5):
+            sweep[key] = _row(rng, *key)
+        for key in rng.sample(sorted(sweep), 1):
+            del sweep[key]
+        cube.update(sweep.values(), complete=True)
+    fresh = _from_scratch(sweep.values())
+    assert _state(cube) == _state(fresh)
+    for basis in RUNTIMES:
+        assert cube.scores(PLANNERS, basis) == fresh.scores(PLANNERS, basis)
+
+
+def test_a_saved_cube_loads_back_the_same(tmp_path):
+    rows = list(_sweep(random.Random(3)).values())
+    sandbox = tmp_path / 'sandbox'
+    (sandbox / 'results').mkdir(parents=True)
+    saved = refresh(str(sandbox), None, rows)
+    loaded = Cube.load(str(sandbox / 'analysis' / 'cube.json'))
+    assert loaded.update(rows, complete=True) == 0
+    assert _state(loaded) == _state(saved)
+    for basis in RUNTIMES:
+        assert loaded.scores(PLANNERS, basis) == saved.scores(PLANNERS, basis)
+
+
+def test_scores_follow_the_ipc_rules():
+    rows = [
+        {'planner': 'a', 'task_id': 't', 'status': 'SOLVED', 'validated': True,
+         'total_seconds': 1.0, 'plan_length': 10},
+        {'planner': 'b', 'task_id': 't', 'status': 'SOLVED', 'validated': True,
+         'total_seconds': 10.0, 'plan_length': 20},
+        {'planner': 'c', 'task_id': 't', 'status': 'TIMEOUT', 'total_seconds': 300.0},
+    ]
+    scores = _from_scratch(rows).scores(('a', 'b', 'c'), 'total')
+    assert scores == {'a': {'time': 1.0, 'quality': 1.0},
+                      'b': {'time': pytest.approx(0.5), 'quality': 0.5},
+                      'c': {'time': 0.0, 'quality': 0.0}}
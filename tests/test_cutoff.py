@@ -0,0 +1,35 @@
+"""run-local --cutoff: counting a domain's misses in a row."""
+
+import argparse
+
+import pytest
+
+from pypmt_eval_toolkit import cutoff
+from pypmt_eval_toolkit.cutoff import CutoffScheduler
+from pypmt_eval_toolkit.scheduler import CommandTask
+
+
+def _counter(statuses, monkeypatch, tmp_path):
+    """A scheduler with no pending pairs and `_status` answering from `statuses`."""
+    monkeypatch.setattr(cutoff, '_status', lambda pair, sharded=None: statuses[pair.task_id])
+    scheduler = CutoffScheduler([], set(), 3, 1, None, str(tmp_path / 'journal.jsonl'),
+                                str(tmp_path), 1)
+    tasks = []
+    for line, task_id in enumerate(statuses, start=1):
+        task = CommandTask(line, f'solve {task_id}', None)
+        task.pair = argparse.Namespace(task_id=task_id)
+        task.chain = ('results/fd', 'ipc', 'blocks')
+        tasks.append(task)
+    return scheduler, tasks
+
+
+@pytest.mark.parametrize('statuses, expected', [
+    ({'p1': 'TIMEOUT', 'p2': 'MEMOUT', 'p3': 'TIMEOUT'}, [1, 2, 3]),
+    ({'p1': 'TIMEOUT', 'p2': None, 'p3': 'TIMEOUT'}, [1, 1, 2]),        # a crash: no answer
+    ({'p1': 'TIMEOUT', 'p2': 'ERROR', 'p3': 'TIMEOUT'}, [1, 0, 1]),
+    ({'p1': 'TIMEOUT', 'p2': 'SOLVED', 'p3': 'TIMEOUT'}, [1, 0, 1]),
+    ({'p1': 'TIMEOUT', 'p2': 'SKIPPED-PREDICTED', 'p3': 'TIMEOUT'}, [1, 1, 2]),
+])
+def test_only_an_answer_resets_the_count(monkeypatch, tmp_path, statuses, expected):
+    scheduler, tasks = _counter(statuses, monkeypatch, tmp_path)
+    assert [scheduler._count(task) for task in tasks] == expected
@@ -0,0 +1,96 @@
+"""Fingerprints and the result store: what makes a result reusable."""
+
+import json
+
+import pytest
+
+from pypmt_eval_toolkit import fingerprint
+from pypmt_eval_toolkit.config import PlannerConfig
+from pypmt_eval_toolkit.generator import _fingerprint
+
+
+@pytest.fixture
+def pddl(tmp_path):
+    domain = tmp_path / 'domain.pddl'
+    problem = tmp_path / 'p01.pddl'
+    domain.write_text('(define (domain d))')
+    problem.write_text('(define (problem p) (:domain d))')
+    return str(domain), str(problem)
+
+
+def _compute(pddl, **mode):
+    return fingerprint.compute('pyperplan', {}, [], None, *pddl, 60, 4096, True,
+                               fingerprint.run_mode(**mode))
+
+
+def _result(pddl, status='SOLVED', **mode):
+    return {'status': status, 'fingerprint': _compute(pddl, **mode), 'plan': ['(a)']}
+
+
+def test_hash_ignores_where_the_pair_ran(pddl, tmp_path):
+    copy = tmp_path / 'elsewhere'
+    copy.mkdir()
+    for path in pddl:
+        (copy / path.rsplit('/', 1)[-1]).write_text(open(path).read())
+    moved = (str(copy / 'domain.pddl'), str(copy / 'p01.pddl'))
+    assert _compute(pddl)['hash'] == _compute(moved)['hash']
+
+
+@pytest.mark.parametrize('mode', [{'supervise': True}, {'cache_dir': '/tmp/cache'},
+                                  {'precompile': True}, {'profile': True},
+                                  {'trace_allocations': True}])
+def test_run_mode_changes_the_hash(pddl, mode):
+    plain, other = _compute(pddl), _compute(pddl, **mode)
+    assert plain['hash'] != other['hash']
+    assert fingerprint.changes(plain, other) == ['mode']
+
+
+def test_generate_computes_what_solve_records(pddl, tmp_path):
+    planner = PlannerConfig(tag='pyperplan', engine='pyperplan', precompile=True)
+    task = type('Task', (), {'domain_file': pddl[0], 'problem_file': pddl[1]})()
+    expected = _compute(pddl, supervise=True, cache_dir=str(tmp_path), precompile=True)
+    assert _fingerprint(planner, task, 60, 4096, True, True, str(tmp_path)) == expected
+
+
+def test_store_round_trip(pddl, tmp_path):
+    store = fingerprint.ResultStore(str(tmp_path / 'store'))
+    result = _result(pddl)
+    assert store.publish(result)
+    assert store.fetch(result['fingerprint']['hash']) == json.loads(json.dumps(result))
+
+    destination = tmp_path / 'sandbox' / 'p01.json'
+    store.import_into(store.fetch(result['fingerprint']['hash']), str(destination),
+                      {'task-id': 'x:p01'}, {'tag': 'pyperplan'})
+    imported = json.loads(destination.read_text())
+    assert imported['task']['task-id'] == 'x:p01'
+    assert imported['run']['imported-from'] == store.path(result['fingerprint']['hash'])
+
+
+@pytest.mark.parametrize('status', ['ERROR', 'KILLED'])
+def test_node_failures_are_not_published(pddl, tmp_path, status):
+    store = fingerprint.ResultStore(str(tmp_path))
+    assert not store.publish(_result(pddl, status))
+
+
+@pytest.mark.parametrize('mode', [{'profile': True}, {'trace_allocations': True}])
+def test_instrumented_runs_are_not_published(pddl, tmp_path, mode):
+    store = fingerprint.ResultStore(str(tmp_path))
+    result = _result(pddl, **mode)
+    assert not store.publish(result)
+    assert store.fetch(result['fingerprint']['hash']) is None
+
+
+def test_a_config_without_an_engine_is_recorded_as_error(pddl, tmp_path):
+    from pypmt_eval_toolkit.cli import main
+
+    config = tmp_path / 'planner.json'
+    config.write_text(json.dumps({'planner-tag': 'X'}))
+    assert main(['solve', '--planner-cfg', str(config), '--domain', pddl[0],
+                 '--problem', pddl[1], '--results-dir', str(tmp_path / 'results'),
+                 '--suite', 'toy', '--domain-name', 'd', '--instance', 'p01',
+                 '--result-store', str(tmp_path / 'store'), '--time-limit', '0',
+                 '--memory-limit', '0']) == 0
+    result = json.loads((tmp_path / 'results' / 'toy_d_p01.json').read_text())
+    assert result['status'] == 'ERROR'
+    assert any('"up-planner-name" is required' in line for line in result['logs'])
+    assert not (tmp_path / 'results' / 'toy_d_p01.running').exists()
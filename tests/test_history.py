@@ -0,0 +1,23 @@
+"""Resource classes: what --right-size asks the scheduler for."""
+
+import pytest
+
+from pypmt_eval_toolkit.history import resource_class
+
+INF = float('inf')
+
+
+@pytest.mark.parametrize('measured, expected', [
+    (None, (1800, 8000)),
+    ((10.0, 100.0), (112, 2000)),              # 1/16 of the time, 1/4 of the memory
+    ((200.0, 2500.0), (450, 4000)),            # 1/4 and 1/2
+    ((1000.0, 7000.0), (1800, 8000)),          # needs the full limits
+    ((10.0, None), (112, 8000)),               # no memory measured
+])
+def test_smallest_class_with_margin(measured, expected):
+    assert resource_class(measured, 1800, 8000) == expected
+
+
+@pytest.mark.parametrize('measured', [(INF, 100.0), (10.0, INF), (INF, INF), (INF, None)])
+def test_a_limit_hit_gets_the_full_limits(measured):
+    assert resource_class(measured, 1800, 8000) == (1800, 8000)
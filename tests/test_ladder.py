@@ -0,0 +1,51 @@
+"""Limit ladders: the rung a pair runs at next."""
+
+import json
+
+import pytest
+
+from pypmt_eval_toolkit.generator import next_rung
+
+
+def _result(status, rung=None):
+    return {'status': status, 'limits': {} if rung is None else {'rung': rung}}
+
+
+@pytest.mark.parametrize('payload, expected', [
+    (None, 0),
+    (_result('TIMEOUT', 0), 1),
+    (_result('MEMOUT', 1), 2),
+    (_result('TIMEOUT', 2), None),             # the last rung's limit
+    (_result('SOLVED', 0), None),
+    (_result('UNSOLVABLE', 1), None),
+    (_result('ERROR', 1), 1),                  # a crash: the same rung again
+    (_result('KILLED', 2), 2),
+    (_result('ERROR'), 0),                     # a crash in a flat sweep: run it on the ladder
+    (_result('KILLED'), 0),
+    (_result('TIMEOUT'), None),                # a flat sweep's answer at the full limits
+    (_result('SOLVED'), None),
+])
+def test_next_rung(payload, expected):
+    assert next_rung(payload, 3) == expected
+
+
+def test_packed_nodes_are_sized_for_the_rung_their_pairs_run_at(tmp_path, capsys):
+    from pypmt_eval_toolkit.cli import main
+
+    # A long first rung with little memory, then a short one with more.
+    (tmp_path / 'exp' / 'planners').mkdir(parents=True)
+    (tmp_path / 'exp' / 'exp-details.json').write_text(json.dumps({
+        'name': 't', 'cfgs': {'limit-ladder': [{'timelimit': '01:00:00', 'memorylimit': '1GB'},
+                                               {'timelimit': '00:10:00', 'memorylimit': '8GB'}]}}))
+    (tmp_path / 'exp' / 'planners' / 'pyperplan.json').write_text(json.dumps({
+        'planner-tag': 'pyperplan', 'up-planner-name': 'pyperplan'}))
+    domain = tmp_path / 'bench' / 'toy' / 'blocks'
+    domain.mkdir(parents=True)
+    (domain / 'domain.pddl').write_text('(define (domain blocks))')
+    for name in ('p01', 'p02'):
+        (domain / f'{name}.pddl').write_text('(define (problem p) (:domain blocks))')
+
+    assert main(['generate', '--exp-dir', str(tmp_path / 'exp'),
+                 '--sandbox-dir', str(tmp_path / 'sandbox'), '--tasks-dir', str(tmp_path / 'bench'),
+                 '--packed-nodes', '1', '--node-cores', '4', '--node-memory', '16GB']) == 0
+    assert '4 pairs at a time on 4 cores (slurm --time=01:05:00)' in capsys.readouterr().out
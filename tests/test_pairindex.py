@@ -0,0 +1,37 @@
+"""The pair index: written pairs before offsets, read back by number."""
+
+import os
+
+import pytest
+
+from pypmt_eval_toolkit import pairindex
+
+
+def test_the_pairs_are_replaced_before_their_offsets(tmp_path, monkeypatch):
+    path = str(tmp_path / 'FD.pairs')
+    replaced = []
+    real_replace = os.replace
+
+    def replace(source, target):
+        replaced.append(target)
+        real_replace(source, target)
+
+    monkeypatch.setattr(pairindex.os, 'replace', replace)
+    tasks = [{'task-id': f'toy:d:p{index:02d}'} for index in range(5)]
+    pairindex.write_index(path, {'planner-cfg': 'fd.json'}, tasks)
+    assert replaced == [path, pairindex.offsets_path(path)]
+    assert [pairindex.read_task(path, index) for index in range(5)] == tasks
+    assert pairindex.read_settings(path)['planner-cfg'] == 'fd.json'
+
+
+def test_stale_offsets_over_new_pairs_are_refused(tmp_path):
+    path = str(tmp_path / 'FD.pairs')
+    pairindex.write_index(path, {}, [{'task-id': f'toy:d:p{index:02d}'} for index in range(4)])
+    stale = open(pairindex.offsets_path(path), 'rb').read()
+    pairindex.write_index(path, {'planner-cfg': 'a-much-longer-configuration-path.json'},
+                          [{'task-id': f'toy:d:p{index:02d}'} for index in range(4)])
+    with open(pairindex.offsets_path(path), 'wb') as handle:
+        handle.write(stale)
+    for index in range(4):
+        with pytest.raises(pairindex.PairNotFound):
+            pairindex.read_task(path, index)
@@ -0,0 +1,30 @@
+"""A run records its cores only when run-local actually pinned it to one."""
+
+import os
+
+import pytest
+
+from pypmt_eval_toolkit import runner
+from pypmt_eval_toolkit.scheduler import CommandTask, Scheduler
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'),
+                                reason='needs sched_setaffinity')
+
+
+def test_a_narrow_affinity_alone_is_not_pinning(monkeypatch):
+    monkeypatch.delenv(runner.PINNED_ENV, raising=False)
+    monkeypatch.setattr(runner.os, 'sched_getaffinity', lambda pid: {3})
+    assert runner._pinned_cpus() is None
+    monkeypatch.setenv(runner.PINNED_ENV, '3')
+    assert runner._pinned_cpus() == [3]
+
+
+@pytest.mark.parametrize('pin', [True, False])
+def test_the_scheduler_marks_the_tasks_it_pins(tmp_path, pin):
+    core = min(os.sched_getaffinity(0))
+    out = tmp_path / 'seen'
+    task = CommandTask(1, f'echo "${{{runner.PINNED_ENV}:-}}" > {out}', None)
+    scheduler = Scheduler([task], 1, None, str(tmp_path / 'journal.jsonl'), str(tmp_path), 1,
+                          cores=[core] if pin else None)
+    assert scheduler.run() == 0
+    assert out.read_text().strip() == (str(core) if pin else '')
@@ -0,0 +1,65 @@
+"""Reading result files without their bulky sections: analyzer.read_result."""
+
+import json
+
+import pytest
+
+from pypmt_eval_toolkit import analyzer
+from pypmt_eval_toolkit.analyzer import read_result, skip_keys
+from pypmt_eval_toolkit.runner import BULKY, LAST_KEYS, _bulky_last, _write_json
+
+RESULT = {
+    'task': {'task-id': 'toy:p01', 'domain': 'blocks'},
+    'planner': {'tag': 'fd', 'params': {'search': 'astar(lmcut())'}},
+    'limits': {'time-seconds': 60, 'memory-mb': 4096},
+    'status': 'SOLVED',
+    'timings': {'total-seconds': 1.25, 'phases': {'parse': 0.5}},
+    'metrics': {'peak-memory-mb': 123.0, 'plan-length': 12},
+    'plan': [f'(move b{i} b{i + 1})' for i in range(200)],
+    'stats': {'expanded': 123456, 'notes': 'a "quoted" } brace'},
+    'logs': [f'log line {i}, {{not json}}' for i in range(100)],
+    'memory-series': [[round(i * 0.1, 1), 100.0 + i] for i in range(50)],
+}
+
+
+def _without(payload, skip):
+    return {key: value for key, value in payload.items() if key not in skip and key != LAST_KEYS}
+
+
+@pytest.fixture(params=[7, 64, 1 << 16], ids=['chunk7', 'chunk64', 'chunk64k'])
+def chunk(request, monkeypatch):
+    monkeypatch.setattr(analyzer, '_CHUNK', request.param)
+
+
+@pytest.mark.parametrize('skip', [(), skip_keys(False), skip_keys(True), ('plan',),
+                                  ('logs', 'memory-series'), ('stats', 'timings')])
+def test_matches_json_load_without_the_skipped_keys(tmp_path, chunk, skip):
+    path = str(tmp_path / 'p01.json')
+    _write_json(path, _bulky_last(RESULT))
+    assert read_result(path, skip) == _without(json.load(open(path)), skip) \
+        if skip else json.load(open(path))
+
+
+@pytest.mark.parametrize('tail', [('plan', 'stats', 'logs', 'memory-series'), ()])
+def test_older_layouts_are_read_whole(tmp_path, chunk, tail):
+    payload = {key: value for key, value in RESULT.items() if key not in tail}
+    if tail:
+        payload[LAST_KEYS] = list(tail)
+    payload.update((key, RESULT[key]) for key in tail)
+    path = tmp_path / 'p01.json'
+    path.write_text(json.dumps(payload, indent=2))
+    for memory_series in (False, True):
+        skip = skip_keys(memory_series)
+        assert read_result(str(path), skip) == _without(RESULT, skip)
+
+
+@pytest.mark.parametrize('memory_series', [False, True])
+def test_stops_after_the_last_section_needed(tmp_path, chunk, memory_series):
+    layout = json.dumps(_bulky_last(RESULT), indent=2)
+    cut = layout.index('"plan": [')
+    path = tmp_path / 'p01.json'
+    path.write_text(layout[:cut] + '"plan": [not json at all')
+    assert BULKY[0] == 'memory-series'
+    found = read_result(str(path), skip_keys(memory_series))
+    assert found == _without(RESULT, skip_keys(memory_series))
+    assert ('memory-series' in found) == memory_series
@@ -0,0 +1,86 @@
+"""Shard result logs, and the ladder and cutoff lookups that read them."""
+
+import argparse
+import json
+
+import pytest
+
+from pypmt_eval_toolkit import shards
+from pypmt_eval_toolkit.cutoff import _status
+from pypmt_eval_toolkit.runner import _lower_rungs, previous_result
+
+
+def _result(tag, task_id, status, started, rung=None):
+    result = {'task': {'task-id': task_id}, 'planner': {'tag': tag}, 'status': status,
+              'run': {'started': started}, 'timings': {'total-seconds': 1.5},
+              'metrics': {'peak-memory-mb': 80.0}}
+    if rung is not None:
+        result['limits'] = {'rung': rung, 'rungs': 3, 'time-seconds': 10 * (rung + 1),
+                            'memory-mb': 1024}
+    return result
+
+
+@pytest.fixture
+def pair(tmp_path):
+    planner_cfg = tmp_path / 'fd.json'
+    planner_cfg.write_text(json.dumps({'planner-tag': 'fd', 'up-planner-name': 'fast-downward'}))
+    results = tmp_path / 'results' / 'fd'
+    results.mkdir(parents=True)
+    return argparse.Namespace(planner_cfg=str(planner_cfg), results_dir=str(results),
+                              task_id='toy:p01', shard_dir=str(tmp_path / 'shards'))
+
+
+def test_read_skips_a_torn_tail(tmp_path, capsys):
+    path = str(tmp_path / 'job.log')
+    shards.append(path, shards.START, _result('fd', 'toy:p01', None, 1.0))
+    shards.append(path, shards.RESULT, _result('fd', 'toy:p01', 'SOLVED', 1.0))
+    with open(path, 'ab') as handle:
+        handle.write(shards._HEADER.pack(shards.MAGIC, 100, 0) + b'{"record":')
+    assert [kind for kind, _payload in shards.read(path)] == [shards.START, shards.RESULT]
+    assert 'torn record' in capsys.readouterr().err
+
+
+def test_find_takes_the_latest_result_of_the_pair(tmp_path):
+    shard_dir = str(tmp_path)
+    shards.append(f'{shard_dir}/a.log', shards.RESULT, _result('fd', 'toy:p01', 'TIMEOUT', 1.0))
+    shards.append(f'{shard_dir}/b.log', shards.RESULT, _result('fd', 'toy:p01', 'SOLVED', 2.0))
+    shards.append(f'{shard_dir}/b.log', shards.RESULT, _result('lama', 'toy:p01', 'ERROR', 3.0))
+    shards.append(f'{shard_dir}/a.log', shards.START, _result('fd', 'toy:p01', None, 4.0))
+    shards.append(f'{shard_dir}/a.log', shards.RESULT, _result('fd', 'toy:p010', 'ERROR', 5.0))
+    assert shards.find(shard_dir, 'fd', 'toy:p01')['status'] == 'SOLVED'
+    assert shards.find(shard_dir, 'fd', 'toy:p02') is None
+    assert shards.find(str(tmp_path / 'none'), 'fd', 'toy:p01') is None
+
+
+@pytest.mark.parametrize('element, bucket', [('0', 0), ('33', 1), ('31', 31)])
+def test_array_elements_share_a_bounded_number_of_shards(monkeypatch, element, bucket):
+    monkeypatch.delenv(shards.ENV, raising=False)
+    monkeypatch.setenv('SLURM_ARRAY_JOB_ID', '4711')
+    monkeypatch.setenv('SLURM_ARRAY_TASK_ID', element)
+    assert shards.shard_name() == f'4711_{bucket}'
+
+
+def test_lower_rungs_come_from_the_shards(pair):
+    shards.append(f'{pair.shard_dir}/4711_0.log', shards.RESULT,
+                  _result('fd', pair.task_id, 'TIMEOUT', 1.0, rung=0))
+    previous = previous_result(pair)
+    assert previous['status'] == 'TIMEOUT'
+    rungs = _lower_rungs(previous, 1)
+    assert [(rung['rung'], rung['status'], rung['time-seconds']) for rung in rungs] == \
+        [(0, 'TIMEOUT', 10)]
+
+
+def test_the_later_of_file_and_shard_wins(pair):
+    with open(f'{pair.results_dir}/toy_p01.json', 'w') as handle:
+        json.dump(_result('fd', pair.task_id, 'MEMOUT', 5.0, rung=1), handle)
+    shards.append(f'{pair.shard_dir}/4711_0.log', shards.RESULT,
+                  _result('fd', pair.task_id, 'TIMEOUT', 1.0, rung=0))
+    assert previous_result(pair)['status'] == 'MEMOUT'
+
+
+def test_cutoff_counts_sharded_results(pair):
+    assert _status(pair) is None
+    shards.append(f'{pair.shard_dir}/4711_0.log', shards.RESULT,
+                  _result('fd', pair.task_id, 'TIMEOUT', 1.0))
+    assert _status(pair) == 'TIMEOUT'
+    assert _status(pair, shards.ShardResults.load(pair.shard_dir)) == 'TIMEOUT'
@@ -0,0 +1,45 @@
+"""solve --supervise: a cancellation reaching the watchdog is recorded by the child as KILLED."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+
+WATCHED = '''
+import sys, time
+from pypmt_eval_toolkit import runner
+from pypmt_eval_toolkit.supervisor import run_supervised
+
+def target():
+    runner._install_limits(None, None)
+    try:
+        open(sys.argv[1] + '.ready', 'w').close()
+        time.sleep(60)
+        status = 'FINISHED'
+    except runner._LimitReached as limit:
+        status = limit.status
+    with open(sys.argv[1], 'w') as handle:
+        handle.write(status)
+    return 0
+
+verdict = run_supervised(target, None, None, time.monotonic())
+print(verdict.status, verdict.exit_code)
+'''
+
+
+def test_ctrl_c_on_the_watchdog_is_recorded_as_killed(tmp_path):
+    out = tmp_path / 'status'
+    watchdog = subprocess.Popen([sys.executable, '-c', WATCHED, str(out)],
+                                stdout=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 30
+    while not (tmp_path / 'status.ready').exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    watchdog.send_signal(signal.SIGINT)
+    stdout, _ = watchdog.communicate(timeout=30)
+    assert out.read_text() == 'KILLED'
+    assert stdout.split() == ['None', '0']
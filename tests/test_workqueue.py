@@ -0,0 +1,37 @@
+"""The worker queue: what an idle worker goes back for."""
+
+import os
+
+from pypmt_eval_toolkit.scheduler import CommandTask
+from pypmt_eval_toolkit.workqueue import WorkQueue, _Worker
+
+
+def _worker(root, name, tasks, lease_seconds=600):
+    queue = WorkQueue(str(root), name, lease_seconds)
+    return queue, _Worker(queue, tasks, 1, None, os.path.join(queue.workers_dir, f'{name}.jsonl'),
+                          1, 30)
+
+
+def test_idle_worker_leaves_live_leases_alone(tmp_path, capsys):
+    tasks = [CommandTask(line, f'pypmtevalcli solve --task-id p{line}', None)
+             for line in (1, 2, 3)]
+    other, _ = _worker(tmp_path, 'other', tasks)
+    assert other.claim(tasks[0])
+    assert other.claim(tasks[1])
+    other.finish(tasks[1], 0, 1.0)
+
+    _queue, idle = _worker(tmp_path, 'idle', tasks)
+    assert idle._waiting()
+    assert idle.pending == [tasks[2]]          # not the one `other` holds, nor the done one
+    assert idle.finished == {tasks[1].key}
+    idle._progress()
+    assert '1/3 done in the queue' in capsys.readouterr().out
+
+
+def test_expired_leases_come_back(tmp_path):
+    tasks = [CommandTask(1, 'pypmtevalcli solve --task-id p1', None)]
+    other, _ = _worker(tmp_path, 'other', tasks)
+    assert other.claim(tasks[0])
+    _queue, idle = _worker(tmp_path, 'idle', tasks, lease_seconds=-1)
+    assert idle._waiting()
+    assert idle.pending == tasks